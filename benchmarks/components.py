@@ -0,0 +1,411 @@
+"""
+Component micro-benchmarks: each hot path timed on its own, outside the
+request cycle.
+
+Stages:
+
+    process_file_csv   FileHandler.process_file on a CSV roster (both apps)
+    process_file_xlsx  FileHandler.process_file on the same roster as .xlsx
+    search             search_rows over session-sized rows (datasets kept in the session)
+    sort               sort_rows on three columns, both directions
+    dataset_publish    DatasetStore.publish of the roster (needs pyarrow)
+    search_arrow       the same queries on the memory-mapped dataset, as the views run them
+    sort_arrow         the same sorts on the memory-mapped dataset
+    table_image        TransportDataProcessor.generate_table_image (needs --images)
+    vendor_mime        EmailService.send_emaill building one vendor message
+    employee_body      grouping and HTML body generation for every recipient
+
+Every stage runs once to warm up and then ``--repeat`` times; the median is
+what gets compared. Save a run, then compare a later one against it:
+
+    python -m benchmarks.components --output components_before.json
+    python -m benchmarks.components --baseline components_before.json --threshold 0.15
+
+With ``--baseline`` the command exits with status 1 when any stage's median
+got slower than the baseline by more than the threshold (per stage with
+``--stage-threshold search=0.5``). Route images are rendered by
+dataframe_image through a headless Chrome, so ``table_image`` only runs with
+``--images``.
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from .rosters import write_csv
+
+STAGES = [
+    'process_file_csv', 'process_file_xlsx', 'search', 'sort', 'dataset_publish', 'search_arrow', 'sort_arrow',
+    'table_image', 'vendor_mime', 'employee_body',
+]
+
+SEARCH_QUERIES = ['ali', 'khan', 'morning', 'asf-m-1', 'gulberg', 'zzz-no-match']
+SORT_COLUMNS = ['Name', 'Route No', 'Pickup Time']
+SELECTED_DETAILS = ['Name', 'Shift', 'Pickup Time', 'Route No', 'Pickup Point']
+
+# Routes rendered per table_image run, and stand-in PNG attachments per vendor_mime run
+IMAGE_ROUTES = 5
+MIME_IMAGES = 30
+MIME_IMAGE_BYTES = 60 * 1024
+
+
+class SkipStage(Exception):
+    """Raised by a stage whose optional dependency is missing"""
+    pass
+
+
+class Fixtures:
+    """Rosters, parsed rows and scratch folders shared by the stages of one size"""
+
+    def __init__(self, size, workdir):
+        self.size = size
+        self.workdir = workdir
+        self._cache = {}
+
+    def csv(self, app):
+        path = os.path.join(self.workdir, f'{app}_{self.size}.csv')
+        if not os.path.exists(path):
+            write_csv(path, app, self.size, seed=self.size)
+        return path
+
+    def xlsx(self, app):
+        path = os.path.join(self.workdir, f'{app}_{self.size}.xlsx')
+        if not os.path.exists(path):
+            import pandas as pd
+            try:
+                pd.read_csv(self.csv(app)).to_excel(path, index=False)
+            except ImportError as e:
+                raise SkipStage(f'no Excel writer installed ({e})')
+        return path
+
+    def path(self, app, extension):
+        return self.csv(app) if extension == 'csv' else self.xlsx(app)
+
+    def rows(self, app):
+        """Rows exactly as the upload view stores them in the session"""
+        if app not in self._cache:
+            self._cache[app] = file_handler(app).process_file(self.csv(app)).to_dict(orient='records')
+        return self._cache[app]
+
+    def dataset_store(self):
+        """A dataset store in the scratch folder, with no size cap"""
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SkipStage('pyarrow not installed')
+        from employee_driver_management_app.dataset_store import DatasetStore
+        return DatasetStore(os.path.join(self.workdir, f'datasets_{self.size}'), max_bytes=0)
+
+    def table(self, app):
+        """The roster published and memory-mapped, as the views attach it"""
+        store = self.dataset_store()
+        return store.attach(store.publish(self.rows(app)))
+
+
+def file_handler(app):
+    if app == 'employee':
+        from employee_management.views import FileHandler
+    else:
+        from vendor_management.views import FileHandler
+    return FileHandler
+
+
+def stage_process_file(fixtures, extension):
+    # Inputs are written before timing starts
+    paths = {app: fixtures.path(app, extension) for app in ('employee', 'vendor')}
+
+    def run():
+        for app, path in paths.items():
+            file_handler(app).process_file(path)
+    return run, fixtures.size * len(paths), 'rows'
+
+
+def stage_search(fixtures):
+    from employee_driver_management_app.table_ops import search_rows
+
+    rows = fixtures.rows('employee')
+
+    def run():
+        for query in SEARCH_QUERIES:
+            search_rows(rows, query)
+    return run, len(SEARCH_QUERIES), 'queries'
+
+
+def stage_sort(fixtures):
+    from employee_driver_management_app.table_ops import sort_rows
+
+    rows = fixtures.rows('employee')
+
+    def run():
+        for column in SORT_COLUMNS:
+            for direction in ('asc', 'desc'):
+                sort_rows(rows, column, direction)
+    return run, len(SORT_COLUMNS) * 2, 'sorts'
+
+
+def stage_dataset_publish(fixtures):
+    store = fixtures.dataset_store()
+    rows = fixtures.rows('employee')
+
+    def run():
+        store.publish(rows)
+    return run, len(rows), 'rows'
+
+
+def stage_search_arrow(fixtures):
+    from employee_driver_management_app.dataset_store import materialize, search_table
+
+    table = fixtures.table('employee')
+
+    def run():
+        for query in SEARCH_QUERIES:
+            materialize(search_table(table, query))
+    return run, len(SEARCH_QUERIES), 'queries'
+
+
+def stage_sort_arrow(fixtures):
+    from employee_driver_management_app.dataset_store import materialize, sort_table
+
+    table = fixtures.table('employee')
+
+    def run():
+        for column in SORT_COLUMNS:
+            for direction in ('asc', 'desc'):
+                materialize(sort_table(table, column, direction))
+    return run, len(SORT_COLUMNS) * 2, 'sorts'
+
+
+def _vendor_routes(fixtures, count):
+    """The first ``count`` routes of one vendor with the selected details, as the send job groups them"""
+    rows = fixtures.rows('vendor')
+    vendor = rows[0]['Vendor Names']
+    routes = {}
+    for row in rows:
+        if row['Vendor Names'] != vendor:
+            continue
+        if row['Route No'] not in routes and len(routes) == count:
+            break
+        routes.setdefault(row['Route No'], []).append({key: row[key] for key in SELECTED_DETAILS})
+    return vendor.replace(' ', '_'), routes
+
+
+def stage_table_image(fixtures, args):
+    if not args.images:
+        raise SkipStage('pass --images to render route tables')
+    from vendor_management.transport_image import TransportDataProcessor
+    from vendor_management.workspace import JobWorkspace
+
+    vendor_name, routes = _vendor_routes(fixtures, IMAGE_ROUTES)
+
+    def run():
+        workspace = JobWorkspace(root=os.path.join(fixtures.workdir, 'images'))
+        TransportDataProcessor(routes, vendor_name, workspace).generate_table_image()
+        workspace.cleanup()
+    return run, len(routes), 'images'
+
+
+def stage_vendor_mime(fixtures):
+    from employee_driver_management_app.mail_transports import MemoryTransport
+    from vendor_management.views import EmailService
+    from vendor_management.workbook import build_vendor_workbook
+
+    vendor_name, _ = _vendor_routes(fixtures, 1)
+    entries = [row for row in fixtures.rows('vendor') if row['Vendor Names'].replace(' ', '_') == vendor_name]
+    try:
+        workbook = build_vendor_workbook(entries)
+    except ImportError as e:
+        raise SkipStage(f'xlsxwriter not installed ({e})')
+
+    # Stand-ins for rendered route images; only their size matters for MIME encoding
+    folder = os.path.join(fixtures.workdir, 'mime', vendor_name)
+    os.makedirs(folder, exist_ok=True)
+    payload = os.urandom(MIME_IMAGE_BYTES)
+    for number in range(MIME_IMAGES):
+        with open(os.path.join(folder, f'{vendor_name}_route_{number:03d}.png'), 'wb') as image_file:
+            image_file.write(payload)
+
+    email_service = EmailService(require_credentials=False)
+    email_service.transport = MemoryTransport()
+    body = EmailService.format_route_email_body(vendor_name)
+
+    def run():
+        email_service.send_emaill('Roaster', body, 'dispatch@example.com', folder, entries, vendor_name,
+                                  workbook=workbook)
+        MemoryTransport.clear()
+    return run, 1, 'messages'
+
+
+def stage_employee_body(fixtures):
+    from employee_management.views import Config, EmailService, group_rows_by_recipient
+
+    rows = fixtures.rows('employee')
+    units = len(group_rows_by_recipient(rows, Config.EMAIL_COLUMN))
+
+    def run():
+        for recipient_rows in group_rows_by_recipient(rows, Config.EMAIL_COLUMN).values():
+            details_html = "".join(
+                EmailService.format_employee_details(row, SELECTED_DETAILS) for row in recipient_rows
+            )
+            EmailService.format_employee_email_body('Dear colleague,', 'Regards,', details_html)
+    return run, units, 'bodies'
+
+
+def build_stage(name, fixtures, args):
+    """Prepares a stage's inputs and returns (run, units per run, unit)"""
+    if name == 'process_file_csv':
+        return stage_process_file(fixtures, 'csv')
+    if name == 'process_file_xlsx':
+        return stage_process_file(fixtures, 'xlsx')
+    if name == 'search':
+        return stage_search(fixtures)
+    if name == 'sort':
+        return stage_sort(fixtures)
+    if name == 'dataset_publish':
+        return stage_dataset_publish(fixtures)
+    if name == 'search_arrow':
+        return stage_search_arrow(fixtures)
+    if name == 'sort_arrow':
+        return stage_sort_arrow(fixtures)
+    if name == 'table_image':
+        return stage_table_image(fixtures, args)
+    if name == 'vendor_mime':
+        return stage_vendor_mime(fixtures)
+    return stage_employee_body(fixtures)
+
+
+def measure(run, repeat):
+    run()  # Warm-up: imports, caches, first-touch allocations
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def run_stages(args, workdir):
+    results = {}
+    for size in args.sizes:
+        fixtures = Fixtures(size, workdir)
+        for name in args.stages:
+            key = f'{name}@{size}'
+            try:
+                run, units, unit = build_stage(name, fixtures, args)
+                timings = measure(run, args.repeat)
+            except SkipStage as e:
+                results[key] = {'stage': name, 'rows': size, 'skipped': str(e)}
+                continue
+            median = statistics.median(timings)
+            results[key] = {
+                'stage': name,
+                'rows': size,
+                'median_ms': median * 1000,
+                'min_ms': min(timings) * 1000,
+                'max_ms': max(timings) * 1000,
+                'throughput': units / median if median else 0.0,
+                'throughput_unit': f'{unit}/s',
+                'repeat': len(timings),
+            }
+    return results
+
+
+def compare(results, baseline, threshold, stage_thresholds):
+    """Adds the change against the baseline to each result; returns the keys that regressed"""
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get(key, {}).get('median_ms')
+        if 'median_ms' not in result or not before:
+            continue
+        change = (result['median_ms'] - before) / before
+        limit = stage_thresholds.get(result['stage'], threshold)
+        result['baseline_ms'] = before
+        result['change'] = change
+        result['regressed'] = change > limit
+        if result['regressed']:
+            regressions.append(key)
+    return regressions
+
+
+def print_report(results):
+    header = f"{'stage':<20}{'rows':>8}{'median ms':>12}{'min ms':>10}{'throughput':>22}{'vs baseline':>14}"
+    print(header)
+    print('-' * len(header))
+    for result in results.values():
+        if 'skipped' in result:
+            print(f"{result['stage']:<20}{result['rows']:>8}  skipped: {result['skipped']}")
+            continue
+        throughput = f"{result['throughput']:.1f} {result['throughput_unit']}"
+        change = f"{result['change'] * 100:+.1f}%{' !' if result['regressed'] else ''}" if 'change' in result else ''
+        print(f"{result['stage']:<20}{result['rows']:>8}{result['median_ms']:>12.2f}{result['min_ms']:>10.2f}"
+              f"{throughput:>22}{change:>14}")
+
+
+def parse_stage_thresholds(parser, values):
+    thresholds = {}
+    for value in values:
+        name, _, limit = value.partition('=')
+        try:
+            thresholds[name] = float(limit)
+        except ValueError:
+            parser.error(f"--stage-threshold expects STAGE=FRACTION, got '{value}'")
+        if name not in STAGES:
+            parser.error(f"--stage-threshold: unknown stage '{name}' (choose from {', '.join(STAGES)})")
+    return thresholds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000], help='Roster sizes to run')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per stage after the warm-up')
+    parser.add_argument('--images', action='store_true', help='Also run table_image (needs a headless Chrome)')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare against results saved earlier with --output')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Allowed slowdown of a median against the baseline, as a fraction (0.2 = 20%%)')
+    parser.add_argument('--stage-threshold', action='append', default=[], metavar='STAGE=FRACTION',
+                        help='Per-stage override of --threshold; may be repeated')
+    parser.add_argument('--log-level', default='WARNING', help="Level for the 'django' logger during the run")
+    args = parser.parse_args()
+    stage_thresholds = parse_stage_thresholds(parser, args.stage_threshold)
+
+    # Configuration is read at import time, so it has to be in place before django.setup()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'employee_driver_management_app.settings')
+    os.environ['EMAIL_TRANSPORT'] = 'memory'
+
+    import django
+    django.setup()
+    logging.getLogger('django').setLevel(args.log_level)
+
+    from django.test import override_settings
+
+    workdir = tempfile.mkdtemp(prefix='components-')
+    try:
+        with override_settings(MEDIA_ROOT=os.path.join(workdir, 'media')):
+            results = run_stages(args, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+        regressions = compare(results, baseline, args.threshold, stage_thresholds)
+
+    print_report(results)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump({'python': sys.version, 'repeat': args.repeat, 'results': results}, output_file, indent=2)
+
+    if regressions:
+        print(f"\nRegressed past the threshold: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+"""
+End-to-end load harness: upload -> search -> sort -> send through the Django
+test client, with SMTP delivered to a local sink.
+
+Runs against a throwaway test database and media directory, so it never
+touches real data or sends real mail. For each roster size it reports
+throughput, p50/p95 latency and tracemalloc peak memory per stage:
+
+    python -m benchmarks.loadtest --sizes 1000 10000 50000 --output loadtest.json
+
+Vendor sends render route images with dataframe_image (a headless Chrome),
+so they only run with ``--vendor-send``. ``--transport memory`` keeps sent
+messages in process instead of going through the SMTP sink.
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from .rosters import write_csv
+from .smtp_sink import SMTPSink
+
+SEARCH_QUERIES = ['ali', 'khan', 'morning', 'asf-m-1', 'gulberg', 'zzz-no-match']
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def consume(response):
+    """Reads the whole body, including streamed responses, and returns its size"""
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+class StageRecorder:
+    """Collects per-request latency and tracemalloc peak for one stage"""
+
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+        self.latencies = []
+        self.units = 0
+        self.peak_bytes = 0
+
+    def __enter__(self):
+        tracemalloc.reset_peak()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed = time.perf_counter() - self.started
+        self.peak_bytes = tracemalloc.get_traced_memory()[1]
+
+    def timed(self, func, *args, **kwargs):
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.latencies.append(time.perf_counter() - started)
+        return result
+
+    def result(self, unit):
+        return {
+            'stage': self.name,
+            'rows': self.size,
+            'requests': len(self.latencies),
+            'throughput': self.units / self.elapsed if self.elapsed else 0.0,
+            'throughput_unit': f'{unit}/s',
+            'p50_ms': percentile(self.latencies, 0.5) * 1000 if self.latencies else 0.0,
+            'p95_ms': percentile(self.latencies, 0.95) * 1000 if self.latencies else 0.0,
+            'peak_memory_mb': self.peak_bytes / (1024 * 1024),
+        }
+
+
+def check_upload(client, response, app, size):
+    """The upload views answer 200 on failure too, so check the flashed messages and the stored dataset"""
+    from django.contrib.messages import constants, get_messages
+    from employee_driver_management_app.dataset_store import session_row_count
+
+    flashed = list(get_messages(response.wsgi_request))
+    errors = [message.message for message in flashed if message.level == constants.ERROR]
+    assert not errors and any(message.level == constants.SUCCESS for message in flashed), \
+        f'{app} upload failed: {errors or "no success message"}'
+    stored = session_row_count(client.session, 'data_dict' if app == 'employee' else 'vendor_data_dict')
+    assert stored == size, f'{app} upload stored {stored} rows instead of {size}'
+
+
+def run_app(client, sink, app, size, workdir, args):
+    """Runs every stage for one app and roster size"""
+    from django.urls import reverse
+
+    urls = {
+        'employee': ('handle_employee_form', 'employee_file', 'search_employee_data', 'sort_employee_data', 'send_employee_emails'),
+        'vendor': ('handle_vendor_form', 'vendor_file', 'search_vendor_data', 'sort_vendor_data', 'send_vendor_emails'),
+    }[app]
+    upload_url, field, search_url, sort_url, send_url = urls
+    roster_path = write_csv(os.path.join(workdir, f'{app}_{size}.csv'), app, size, seed=size)
+    results = []
+
+    with StageRecorder('upload', size) as stage:
+        for _ in range(args.upload_repeat):
+            with open(roster_path, 'rb') as roster_file:
+                response = stage.timed(client.post, reverse(upload_url), {field: roster_file})
+            assert response.status_code == 200, f'{app} upload failed: {response.status_code}'
+            check_upload(client, response, app, size)
+            stage.units += size
+    results.append(stage.result('rows'))
+
+    with StageRecorder('search', size) as stage:
+        for query in SEARCH_QUERIES * args.query_repeat:
+            stage.timed(lambda: consume(client.get(reverse(search_url), {'search': query, 'format': 'compact'})))
+            stage.units += 1
+    results.append(stage.result('requests'))
+
+    with StageRecorder('sort', size) as stage:
+        for column in ['Name', 'Route No', 'Pickup Time'] * args.query_repeat:
+            for direction in ('asc', 'desc'):
+                stage.timed(lambda: consume(client.get(reverse(sort_url), {'column': column, 'direction': direction, 'format': 'compact'})))
+                stage.units += 1
+    results.append(stage.result('requests'))
+
+    if app == 'employee' or args.vendor_send:
+        payload = {
+            'top_template': '<p>Dear colleague,</p><p>Your transport roster has been updated.</p>',
+            'bottom_template': '<p>Regards,<br>Admin Team</p>',
+            'selected_details': ['Name', 'Shift', 'Pickup Time', 'Route No', 'Pickup Point'],
+        }
+        from employee_driver_management_app.mail_transports import MemoryTransport
+
+        sink.reset()
+        MemoryTransport.clear()
+        with StageRecorder('send', size) as stage:
+            response = stage.timed(client.post, reverse(send_url), json.dumps(payload), content_type='application/json')
+            assert response.status_code == 200, f'{app} send failed: {response.status_code} {response.content[:200]}'
+        outbox = MemoryTransport.clear()
+        emails = sink.messages + len(outbox)
+        stage.units = emails
+        send_result = stage.result('emails')
+        send_result.update({'emails': emails, 'smtp_bytes': sink.bytes + sum(len(raw) for raw in outbox)})
+        results.append(send_result)
+
+    for result in results:
+        result['app'] = app
+    return results
+
+
+def print_report(results):
+    header = f"{'app':<9}{'rows':>8}  {'stage':<8}{'reqs':>6}{'throughput':>18}{'p50 ms':>11}{'p95 ms':>11}{'peak MB':>10}"
+    print(header)
+    print('-' * len(header))
+    for row in results:
+        throughput = f"{row['throughput']:.1f} {row['throughput_unit']}"
+        print(f"{row['app']:<9}{row['rows']:>8}  {row['stage']:<8}{row['requests']:>6}{throughput:>18}"
+              f"{row['p50_ms']:>11.1f}{row['p95_ms']:>11.1f}{row['peak_memory_mb']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000],
+                        help='Roster sizes to run (1k to 200k rows)')
+    parser.add_argument('--apps', nargs='+', choices=['employee', 'vendor'], default=['employee', 'vendor'])
+    parser.add_argument('--upload-repeat', type=int, default=3)
+    parser.add_argument('--query-repeat', type=int, default=3, help='Rounds of search and sort requests')
+    parser.add_argument('--vendor-send', action='store_true', help='Also run vendor sends (renders route images)')
+    parser.add_argument('--transport', choices=['smtp', 'memory'], default='smtp',
+                        help="'smtp' delivers to a local sink, 'memory' keeps messages in process")
+    parser.add_argument('--log-level', default='WARNING', help="Level for the 'django' logger during the run")
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    args = parser.parse_args()
+
+    sink = SMTPSink().start()
+    workdir = tempfile.mkdtemp(prefix='loadtest-')
+    sink_host, sink_port = sink.address
+
+    # Configuration is read at import time, so it has to be in place before django.setup()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'employee_driver_management_app.settings')
+    os.environ.update({
+        'EMAIL_HOST': sink_host,
+        'EMAIL_PORT': str(sink_port),
+        'EMAIL_USE_TLS': 'false',
+        'EMAIL_TRANSPORT': args.transport,
+        'EMAIL_HOST_USER': 'loadtest@example.com',
+        'EMAIL_HOST_PASSWORD': 'loadtest',
+        'NETWORK_ACCESS_MODE': 'cidr',
+        'ALLOWED_NETWORKS': '127.0.0.0/8',
+    })
+
+    import django
+    django.setup()
+    logging.getLogger('django').setLevel(args.log_level)
+
+    from django.db import connection
+    from django.test import Client, override_settings
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_db_name = connection.creation.create_test_db(verbosity=0)
+    tracemalloc.start()
+    results = []
+    try:
+        with override_settings(MEDIA_ROOT=os.path.join(workdir, 'media')):
+            for size in args.sizes:
+                for app in args.apps:
+                    # A fresh client per run starts with an empty session
+                    results.extend(run_app(Client(REMOTE_ADDR='127.0.0.1'), sink, app, size, workdir, args))
+    finally:
+        tracemalloc.stop()
+        connection.creation.destroy_test_db(old_db_name, verbosity=0)
+        teardown_test_environment()
+        sink.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(results)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump({'python': sys.version, 'results': results}, output_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
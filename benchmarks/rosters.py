@@ -0,0 +1,124 @@
+"""
+Synthetic employee and vendor rosters for load and component benchmarks.
+
+    python -m benchmarks.rosters --kind employee --rows 50000 --output employee_50k.csv
+"""
+import argparse
+import csv
+import random
+
+EMPLOYEE_COLUMNS = [
+    'S No', 'Employee ID', 'Name', 'Email', 'Department', 'Shift', 'Pickup Time',
+    'Route No', 'Pickup Point', 'Phone',
+]
+
+VENDOR_COLUMNS = [
+    'S No', 'Route No', 'Name', 'Vendor Names', 'Vendor Emails', 'Shift', 'Pickup Point',
+    'Pickup Time', 'Vehicle No', 'Driver Name', 'Driver Phone',
+]
+
+FIRST_NAMES = ['Ali', 'Sara', 'Omar', 'Ayesha', 'Bilal', 'Fatima', 'Hamza', 'Zainab', 'Usman', 'Hira']
+LAST_NAMES = ['Khan', 'Ahmed', 'Malik', 'Hussain', 'Iqbal', 'Raza', 'Sheikh', 'Qureshi', 'Butt', 'Chaudhry']
+DEPARTMENTS = ['Engineering', 'Finance', 'HR', 'Operations', 'Support', 'Sales']
+SHIFTS = ['Morning', 'Evening', 'Night']
+PICKUP_TIMES = ['06:30', '07:00', '07:30', '14:30', '15:00', '22:30', '23:00']
+PICKUP_POINTS = ['Gulberg', 'DHA Phase 5', 'Johar Town', 'Model Town', 'Cantt', 'Bahria Town', 'Wapda Town']
+VENDORS = ['Golden Ikon', 'Unique Tourism', 'NAEEN TRAVELS', 'City Movers', 'Metro Wheels', 'Star Transport']
+
+
+def employee_rows(count, seed=0, repeat_ratio=0.1, invalid_ratio=0.01):
+    """
+    Yields employee roster rows
+
+    Args:
+        count: Number of rows
+        seed: Random seed, so the same arguments give the same roster
+        repeat_ratio: Share of rows that reuse an earlier employee (extra shift or route)
+        invalid_ratio: Share of rows with a malformed email address
+    """
+    rng = random.Random(seed)
+    employees = []
+    for number in range(1, count + 1):
+        if employees and rng.random() < repeat_ratio:
+            employee_id, name, email = rng.choice(employees)
+        else:
+            employee_id = f"GL-{number:06d}"
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            email = f"{name.lower().replace(' ', '.')}.{number}@example.com"
+            if rng.random() < invalid_ratio:
+                email = email.replace('@', ' at ')
+            employees.append((employee_id, name, email))
+
+        yield {
+            'S No': number,
+            'Employee ID': employee_id,
+            'Name': name,
+            'Email': email,
+            'Department': rng.choice(DEPARTMENTS),
+            'Shift': rng.choice(SHIFTS),
+            'Pickup Time': rng.choice(PICKUP_TIMES),
+            'Route No': f"ASF-M-{rng.randint(100, 100 + max(1, count // 25))}",
+            'Pickup Point': rng.choice(PICKUP_POINTS),
+            'Phone': f"03{rng.randint(0, 99):02d}{rng.randint(0, 9999999):07d}",
+        }
+
+
+def vendor_rows(count, seed=0, rows_per_route=12):
+    """
+    Yields vendor roster rows grouped by route, as coordinators export them
+
+    Args:
+        count: Number of rows
+        seed: Random seed, so the same arguments give the same roster
+        rows_per_route: Average passengers per route
+    """
+    rng = random.Random(seed)
+    route_number = 100
+    vendor = rng.choice(VENDORS)
+    remaining_on_route = 0
+    for number in range(1, count + 1):
+        if remaining_on_route == 0:
+            route_number += 1
+            vendor = rng.choice(VENDORS)
+            remaining_on_route = max(1, int(rng.gauss(rows_per_route, rows_per_route / 4)))
+            driver = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            vehicle = f"LE{rng.randint(10, 99)}-{rng.randint(1000, 9999)}"
+        remaining_on_route -= 1
+
+        yield {
+            'S No': number,
+            'Route No': f"ASF-M-{route_number}",
+            'Name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            'Vendor Names': vendor,
+            'Vendor Emails': f"dispatch@{vendor.lower().replace(' ', '')}.example.com",
+            'Shift': rng.choice(SHIFTS),
+            'Pickup Point': rng.choice(PICKUP_POINTS),
+            'Pickup Time': rng.choice(PICKUP_TIMES),
+            'Vehicle No': vehicle,
+            'Driver Name': driver,
+            'Driver Phone': f"03{rng.randint(0, 99):02d}{rng.randint(0, 9999999):07d}",
+        }
+
+
+def write_csv(path, kind, count, seed=0):
+    """Writes a roster of ``kind`` ('employee' or 'vendor') to ``path``"""
+    columns, rows = (EMPLOYEE_COLUMNS, employee_rows(count, seed)) if kind == 'employee' else (VENDOR_COLUMNS, vendor_rows(count, seed))
+    with open(path, 'w', newline='', encoding='utf-8') as roster_file:
+        writer = csv.DictWriter(roster_file, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--kind', choices=['employee', 'vendor'], default='employee')
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', required=True)
+    args = parser.parse_args()
+    write_csv(args.output, args.kind, args.rows, args.seed)
+
+
+if __name__ == '__main__':
+    main()
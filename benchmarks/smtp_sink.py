@@ -0,0 +1,107 @@
+"""
+Minimal threaded SMTP server that accepts and discards every message.
+
+Enough of RFC 5321 for smtplib: EHLO/HELO, AUTH (any credentials), MAIL,
+RCPT, DATA, RSET, NOOP and QUIT. STARTTLS is not offered, so run the app
+with ``EMAIL_USE_TLS=false`` against it.
+"""
+import socketserver
+import threading
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+
+    def _reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        sink = self.server.sink
+        self._reply('220 smtp-sink ready')
+        recipients = 0
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', errors='replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+
+            if verb == 'EHLO':
+                self._reply('250-smtp-sink')
+                self._reply('250-8BITMIME')
+                self._reply('250-SIZE 104857600')
+                self._reply('250 AUTH PLAIN LOGIN')
+            elif verb == 'HELO':
+                self._reply('250 smtp-sink')
+            elif verb == 'AUTH':
+                parts = command.split()
+                if parts[1].upper() == 'LOGIN' and len(parts) == 2:
+                    self._reply('334 VXNlcm5hbWU6')
+                    self.rfile.readline()
+                    self._reply('334 UGFzc3dvcmQ6')
+                    self.rfile.readline()
+                elif parts[1].upper() == 'LOGIN':
+                    self._reply('334 UGFzc3dvcmQ6')
+                    self.rfile.readline()
+                self._reply('235 2.7.0 Authentication successful')
+            elif verb == 'MAIL':
+                recipients = 0
+                self._reply('250 OK')
+            elif verb == 'RCPT':
+                recipients += 1
+                self._reply('250 OK')
+            elif verb == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                size = 0
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line == b'.\r\n':
+                        break
+                    size += len(data_line)
+                sink.record(size, recipients)
+                self._reply('250 OK queued')
+            elif verb in ('RSET', 'NOOP'):
+                self._reply('250 OK')
+            elif verb == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('502 Command not implemented')
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    """Runs the sink on a background thread and counts what it receives"""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self._server = _Server((host, port), _SMTPHandler)
+        self._server.sink = self
+        self._lock = threading.Lock()
+        self.messages = 0
+        self.recipients = 0
+        self.bytes = 0
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def record(self, size, recipients):
+        with self._lock:
+            self.messages += 1
+            self.recipients += recipients
+            self.bytes += size
+
+    def reset(self):
+        with self._lock:
+            self.messages = self.recipients = self.bytes = 0
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name='smtp-sink', daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
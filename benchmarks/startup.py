@@ -0,0 +1,84 @@
+"""
+Measures worker cold-start cost: ``django.setup()`` plus importing the URLconf.
+
+Every sample runs in a fresh interpreter so nothing is cached between runs.
+Save a run before a change and compare against it afterwards:
+
+    python benchmarks/startup.py --output startup_before.json
+    python benchmarks/startup.py --baseline startup_before.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy modules whose presence after URL import shows they were loaded eagerly
+HEAVY_MODULES = ['pandas', 'dataframe_image', 'smtplib', 'email.mime.multipart', 'xlsxwriter', 'openpyxl']
+
+PROBE = """
+import json, os, sys, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'employee_driver_management_app.settings')
+started = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns  # imports every app's urls and views
+urls_done = time.perf_counter()
+print(json.dumps({
+    'setup_seconds': setup_done - started,
+    'urls_seconds': urls_done - setup_done,
+    'total_seconds': urls_done - started,
+    'loaded_heavy_modules': [name for name in %r if name in sys.modules],
+}))
+"""
+
+
+def run_sample():
+    output = subprocess.check_output([sys.executable, '-c', PROBE % (HEAVY_MODULES,)], cwd=BASE_DIR)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def summarize(samples):
+    summary = {}
+    for key in ('setup_seconds', 'urls_seconds', 'total_seconds'):
+        values = [sample[key] for sample in samples]
+        summary[key] = {'median': statistics.median(values), 'min': min(values), 'max': max(values)}
+    summary['loaded_heavy_modules'] = samples[-1]['loaded_heavy_modules']
+    summary['runs'] = len(samples)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10, help='Fresh interpreters to sample')
+    parser.add_argument('--output', help='Write the summary to this JSON file')
+    parser.add_argument('--baseline', help='Compare against a summary saved earlier with --output')
+    args = parser.parse_args()
+
+    summary = summarize([run_sample() for _ in range(args.runs)])
+
+    for key in ('setup_seconds', 'urls_seconds', 'total_seconds'):
+        print(f"{key:<16} median {summary[key]['median'] * 1000:8.1f} ms  "
+              f"(min {summary[key]['min'] * 1000:.1f}, max {summary[key]['max'] * 1000:.1f})")
+    print(f"heavy modules loaded at boot: {', '.join(summary['loaded_heavy_modules']) or 'none'}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        before = baseline['total_seconds']['median']
+        after = summary['total_seconds']['median']
+        print(f"total vs baseline: {before * 1000:.1f} ms -> {after * 1000:.1f} ms "
+              f"({(after - before) / before * 100:+.1f}%)")
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(summary, output_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .profiling import profiled_call
+
+# Threads that run parsing, rendering and SMTP work on behalf of async views
+BLOCKING_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("ASYNC_BLOCKING_WORKERS", 8)),
+    thread_name_prefix="blocking-io",
+)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Runs a blocking callable on the shared executor without stalling the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(BLOCKING_EXECUTOR, functools.partial(profiled_call(func), *args, **kwargs))
@@ -0,0 +1,63 @@
+import os
+from typing import Any, Callable, Iterable, List, Optional
+
+
+def columns_from_env(name: str) -> Optional[List[str]]:
+    """
+    Reads an optional comma-separated column whitelist from the environment
+
+    Args:
+        name: Environment variable, e.g. ``EMPLOYEE_COLUMNS``
+
+    Returns:
+        Optional[List[str]]: Column names, or None when unset or blank
+    """
+    columns = [column.strip() for column in os.getenv(name, '').split(',') if column.strip()]
+    return columns or None
+
+
+class ColumnProjection:
+    """
+    Picks the columns a reader should decode from a file's header
+
+    Without a whitelist the first ``max_columns`` columns are kept, as the
+    table always showed them; with one, only whitelisted columns are kept.
+    Required columns are kept either way, wherever they sit in the file.
+    The result is passed to pandas as ``usecols`` so every other column is
+    skipped while parsing.
+    """
+
+    def __init__(self, max_columns: int, required: Iterable[str], whitelist: Optional[Iterable[str]] = None):
+        self.max_columns = max_columns
+        self.required = set(required)
+        self.whitelist = set(whitelist) if whitelist else None
+
+    def __call__(self, header: List[str]) -> List[str]:
+        """
+        Args:
+            header: Column names in file order
+
+        Returns:
+            List[str]: Columns to read, in file order
+        """
+        if self.whitelist is not None:
+            return [column for column in header if column in self.whitelist or column in self.required]
+        return [
+            column for position, column in enumerate(header)
+            if position < self.max_columns or column in self.required
+        ]
+
+    def usecols(self, header: Iterable[Any]) -> Callable[[Any], bool]:
+        """
+        Returns a ``usecols`` callable for pandas readers
+
+        A callable, unlike a list of names, also accepts the non-string
+        headers (numbers, dates) that Excel cells can hold.
+
+        Args:
+            header: Column names read from the file with ``nrows=0``
+
+        Returns:
+            Callable[[Any], bool]: True for columns to read
+        """
+        return set(self(list(header))).__contains__
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import bisect
+import logging
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+logger = logging.getLogger('django')
+
+# Pragmatic address check: local part, a single "@", and a dotted domain with a TLD
+EMAIL_PATTERN = r"[A-Za-z0-9.!#$%&'*+/=?^_`{|}~-]+@[A-Za-z0-9](?:[A-Za-z0-9-]*[A-Za-z0-9])?(?:\.[A-Za-z0-9](?:[A-Za-z0-9-]*[A-Za-z0-9])?)*\.[A-Za-z]{2,}"
+
+# Number of example rows kept per finding for display
+SAMPLE_LIMIT = 20
+
+
+class DataQualityChecker:
+    """
+    Vectorized upload-time validation of recipient and required columns
+
+    A row is excluded from sends only when one of its recipient (email)
+    columns is empty or malformed; other required fields that are blank are
+    reported but the row is kept. The report holds counts and samples, never
+    one entry per row, so it stays small in the session; the excluded rows
+    are kept as ``[start, stop)`` position ranges, by which send jobs filter
+    the stored rows without checking their addresses again.
+    """
+
+    def __init__(self, email_columns: List[str], required_columns: List[str], recipient_column: Optional[str] = None):
+        self.email_columns = email_columns
+        self.required_columns = required_columns
+        self.recipient_column = recipient_column
+
+    @staticmethod
+    def _missing_mask(column: pd.Series) -> np.ndarray:
+        """Flags NaN and blank cells"""
+        return (column.isna() | column.astype(str).str.strip().eq('')).to_numpy()
+
+    @staticmethod
+    def _malformed_mask(values: pd.Series) -> np.ndarray:
+        """Flags cells that are not a comma-separated list of addresses"""
+        import pandas as pd
+
+        parts = pd.Series(values.to_numpy()).str.split(',').explode().str.strip()
+        blank = parts.eq('')
+        well_formed = (parts.str.fullmatch(EMAIL_PATTERN) | blank).groupby(level=0).all()
+        has_address = (~blank).groupby(level=0).any()
+        return ~(well_formed & has_address).to_numpy()
+
+    @staticmethod
+    def _row_numbers(mask: np.ndarray) -> List[int]:
+        """Converts a boolean mask into dataset row positions"""
+        return mask.nonzero()[0].tolist()
+
+    @staticmethod
+    def _row_ranges(mask: np.ndarray) -> List[List[int]]:
+        """Converts a boolean mask into ``[start, stop)`` runs of flagged row positions"""
+        import numpy as np
+
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+        return edges.reshape(-1, 2).tolist()
+
+    def check(self, data: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Validates the raw upload before missing values are filled
+
+        Args:
+            data: Parsed upload
+
+        Returns:
+            Dict[str, Any]: JSON-serializable quality report
+        """
+        import numpy as np
+
+        invalid = np.zeros(len(data), dtype=bool)
+
+        missing_fields = {}
+        for column in self.required_columns:
+            if column not in data.columns:
+                continue
+            missing = self._missing_mask(data[column])
+            if missing.any():
+                missing_fields[column] = {
+                    'count': int(missing.sum()),
+                    'rows': self._row_numbers(missing)[:SAMPLE_LIMIT],
+                }
+
+        invalid_emails = {}
+        recipient_columns = [column for column in self.email_columns if column in data.columns]
+        for column in recipient_columns:
+            values = data[column].astype(str).str.strip()
+            missing = self._missing_mask(data[column])
+            bad = ~missing & self._malformed_mask(values)
+            if bad.any():
+                invalid_emails[column] = {
+                    'count': int(bad.sum()),
+                    'samples': [
+                        {'row': row, 'value': values.iat[row]} for row in self._row_numbers(bad)[:SAMPLE_LIMIT]
+                    ],
+                }
+            # A row without a usable recipient can't be sent
+            invalid |= missing | bad
+
+        duplicates = {'count': 0, 'samples': []}
+        if self.recipient_column in data.columns:
+            recipients = data[self.recipient_column].astype(str).str.strip().str.lower()
+            counts = recipients[~invalid].value_counts()
+            repeated = counts[counts > 1]
+            duplicates = {
+                'count': int(repeated.size),
+                'samples': [{'value': value, 'rows': int(count)} for value, count in repeated.head(SAMPLE_LIMIT).items()],
+            }
+
+        invalid_count = int(invalid.sum())
+        report = {
+            'total_rows': int(len(data)),
+            'valid_rows': int(len(data) - invalid_count),
+            'invalid_count': invalid_count,
+            'invalid_samples': self._row_numbers(invalid)[:SAMPLE_LIMIT],
+            'invalid_ranges': self._row_ranges(invalid),
+            'recipient_columns': recipient_columns,
+            'invalid_emails': invalid_emails,
+            'missing_fields': missing_fields,
+            'duplicate_recipients': duplicates,
+        }
+
+        logger.info(
+            f"Data quality: {report['valid_rows']}/{report['total_rows']} valid rows, "
+            f"{duplicates['count']} duplicate recipients"
+        )
+        return report
+
+    @staticmethod
+    def row_filter(report: Optional[Dict[str, Any]]) -> Optional[Callable[[int], bool]]:
+        """
+        Returns a ``position -> sendable`` check for a stored dataset
+
+        Args:
+            report: Report produced by :meth:`check` for the dataset
+
+        Returns:
+            Optional[Callable]: None when every row is sendable
+        """
+        ranges = (report or {}).get('invalid_ranges')
+        if not ranges:
+            return None
+        starts = [start for start, _ in ranges]
+
+        def sendable(position: int) -> bool:
+            index = bisect.bisect_right(starts, position) - 1
+            return index < 0 or position >= ranges[index][1]
+
+        return sendable
+
+    @staticmethod
+    def valid_rows(rows: List[Dict[str, Any]], report: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Drops the rows the quality report marked invalid
+
+        Args:
+            rows: Dataset rows as stored in the session
+            report: Report produced by :meth:`check` for the same dataset
+
+        Returns:
+            List[Dict[str, Any]]: Rows known to be valid
+        """
+        ranges = (report or {}).get('invalid_ranges')
+        if not ranges:
+            return rows
+        kept = []
+        previous_stop = 0
+        for start, stop in ranges:
+            kept.extend(rows[previous_stop:start])
+            previous_stop = stop
+        kept.extend(rows[previous_stop:])
+        return kept
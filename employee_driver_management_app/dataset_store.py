@@ -0,0 +1,640 @@
+"""
+Parsed rosters shared by every worker process through memory-mapped Arrow files.
+
+An upload is published once as an uncompressed Arrow IPC file in
+``settings.DATASET_STORE_DIR`` (``/dev/shm`` by default, i.e. shared memory)
+and the session keeps only its id. Each worker memory-maps the file, so the
+table's buffers are the same physical pages in every process and attaching
+costs no parsing or copying. Search, sort, column listing and the upload
+page's preview run on the mapped table, so they only turn the rows they
+return into Python objects. Sends and roster diffs still need every row.
+
+Files are content-addressed, so identical uploads share one file. Every
+session that points at a dataset holds a reference, recorded as a file under
+``refs/<id>/`` so all processes see the same count. Replacing or releasing
+the last reference (also done on logout) deletes the dataset; references not
+read for ``DATASET_REFERENCE_TTL`` are treated as abandoned. The files live
+in RAM, so the store is capped at ``DATASET_STORE_MAX_BYTES``: the oldest
+unreferenced datasets are evicted to make room, and an upload that still
+doesn't fit (or whose write fails) keeps its rows in the session instead.
+
+Search matches ``table_ops.search_rows`` exactly: each row carries a hidden
+column with its values as ``str(value).lower()``. Columns mixing types are
+sorted by their text (``search_rows``'s Python sort raises on them) and
+their original values are restored from a hidden JSON column. Sorting
+numbers and text is otherwise the same, except that nulls and NaN sort last.
+
+pyarrow is optional: without it (or with ``DATASET_STORE_DIR`` empty) the
+rows stay in the session as before.
+"""
+import errno
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_out
+from django.dispatch import receiver
+
+from .async_utils import run_blocking
+from .table_ops import view_rows
+
+logger = logging.getLogger('django')
+
+# Session key suffix holding the dataset id that replaces the rows
+DATASET_ID_SUFFIX = '_dataset_id'
+
+# Datasets kept memory-mapped per process; mapping more costs address space, not RAM
+MAX_ATTACHED = 16
+
+# Record batch size of published files
+BATCH_ROWS = 64 * 1024
+
+# A reference's timestamp is refreshed at most this often while its session keeps reading it
+REF_TOUCH_INTERVAL = 300
+
+# Unreferenced files younger than this may be published but not referenced yet
+PUBLISH_GRACE_SECONDS = 60
+
+# Hidden columns written next to the dataset's own
+HIDDEN_PREFIX = '__gltm_'
+SEARCH_COLUMN = HIDDEN_PREFIX + 'search'
+RAW_PREFIX = HIDDEN_PREFIX + 'raw:'
+
+# Joins a row's values in the search column; a query can't match across two values
+SEARCH_SEPARATOR = '\x1f'
+
+
+class DatasetMissing(KeyError):
+    """Raised when a session points at a dataset that was already evicted"""
+    pass
+
+
+class DatasetStoreFull(OSError):
+    """Raised when a dataset doesn't fit in the store's byte budget"""
+
+    def __init__(self, message: str):
+        super().__init__(errno.ENOSPC, message)
+
+
+def _to_array(values: List[Any]) -> Tuple[Any, bool]:
+    """
+    Converts one column
+
+    Args:
+        values: The column's values in row order
+
+    Returns:
+        Tuple[Any, bool]: The Arrow array, and whether its values differ from the
+        originals (which are then kept in a hidden JSON column)
+    """
+    import pyarrow as pa
+
+    types = {type(value) for value in values if value is not None}
+    if len(types) <= 1:
+        try:
+            return pa.array(values), False  # NaN stays NaN, like in the session
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            pass
+    elif types <= {int, float}:
+        # Sorted as numbers, like sorted() does
+        return pa.array([None if value is None else float(value) for value in values], pa.float64()), True
+    # Mixed types (e.g. numbers and 'N/A' from fillna) are sorted as text
+    return pa.array([None if value is None else str(value) for value in values], pa.string()), True
+
+
+def build_table(rows: List[Dict[str, Any]]):
+    """Arrow table of the rows with the hidden search and raw-value columns"""
+    import pyarrow as pa
+
+    columns = list(rows[0].keys()) if rows else []
+    arrays = {}
+    for column in columns:
+        values = [row.get(column) for row in rows]
+        arrays[column], converted = _to_array(values)
+        if converted:
+            arrays[RAW_PREFIX + column] = pa.array([json.dumps(value, default=str) for value in values], pa.string())
+    arrays[SEARCH_COLUMN] = pa.array(
+        [SEARCH_SEPARATOR.join(str(value).lower() for value in row.values()) for row in rows], pa.string()
+    )
+    return pa.table(arrays)
+
+
+def visible_columns(table) -> List[str]:
+    return [name for name in table.column_names if not name.startswith(HIDDEN_PREFIX)]
+
+
+def materialize(table) -> List[Dict[str, Any]]:
+    """Rows of a stored table as the records that were published"""
+    raw_columns = [name for name in table.column_names if name.startswith(RAW_PREFIX)]
+    rows = table.select(visible_columns(table) + raw_columns).to_pylist()
+    for row in rows if raw_columns else ():
+        for name in raw_columns:
+            row[name[len(RAW_PREFIX):]] = json.loads(row.pop(name))
+    return rows
+
+
+def search_table(table, search_query: str):
+    """Keeps rows where any value contains the lower-cased query, exactly like ``search_rows``"""
+    import pyarrow.compute as pc
+
+    if not search_query:
+        return table
+    if SEARCH_SEPARATOR in search_query:
+        return table.slice(0, 0)
+    return table.filter(pc.match_substring(table[SEARCH_COLUMN], search_query))
+
+
+def sort_table(table, column: Optional[str], direction: str = 'asc'):
+    """Sorts on one column; ignored when empty or unknown, like ``view_rows``"""
+    if column and column in visible_columns(table):
+        # Arrow's sort is stable, like sorted()
+        table = table.sort_by([(column, 'descending' if direction == 'desc' else 'ascending')])
+    return table
+
+
+class DatasetStore:
+    """Content-addressed Arrow files with cross-process reference counts and a byte budget"""
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 ** 2, max_attached: int = MAX_ATTACHED,
+                 reference_ttl: float = 4 * 3600):
+        self.directory = directory
+        self.refs_directory = os.path.join(directory, 'refs')
+        self.max_attached = max_attached
+        self.reference_ttl = reference_ttl
+        self.touch_interval = min(REF_TOUCH_INTERVAL, reference_ttl / 4)
+        self._attached: 'OrderedDict[str, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(self.refs_directory, exist_ok=True)
+        # Never take more than half of the filesystem (a 64MB /dev/shm in many containers)
+        half_filesystem = shutil.disk_usage(directory).total // 2
+        self.max_bytes = min(max_bytes, half_filesystem) if max_bytes > 0 else half_filesystem
+
+    def _path(self, dataset_id: str) -> str:
+        return os.path.join(self.directory, f"{dataset_id}.arrow")
+
+    def exists(self, dataset_id: str) -> bool:
+        return os.path.exists(self._path(dataset_id))
+
+    def _datasets(self) -> List[Tuple[str, int, float]]:
+        """(dataset id, size, modification time) of every stored dataset"""
+        datasets = []
+        for filename in os.listdir(self.directory):
+            if filename.endswith('.arrow') and not filename.startswith('.'):
+                try:
+                    stat = os.stat(os.path.join(self.directory, filename))
+                except FileNotFoundError:
+                    continue
+                datasets.append((filename[:-len('.arrow')], stat.st_size, stat.st_mtime))
+        return datasets
+
+    def usage(self) -> int:
+        """Bytes taken by stored datasets"""
+        return sum(size for _, size, _ in self._datasets())
+
+    # Publishing and attaching
+
+    def publish(self, rows: List[Dict[str, Any]]) -> str:
+        """
+        Writes rows as an Arrow file unless identical content is already stored
+
+        Args:
+            rows: Records as produced by ``DataFrame.to_dict(orient='records')``
+
+        Returns:
+            str: Dataset id (SHA-256 of the file)
+
+        Raises:
+            DatasetStoreFull: If the file doesn't fit in the budget
+            OSError: If writing the file fails (e.g. the filesystem is full)
+        """
+        import pyarrow as pa
+
+        started = time.perf_counter()
+        table = build_table(rows)
+
+        fd, temp_path = tempfile.mkstemp(prefix='.publish.', suffix='.arrow', dir=self.directory)
+        os.close(fd)
+        try:
+            # Uncompressed, so readers can map the buffers instead of decoding them
+            with pa.OSFile(temp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table, max_chunksize=BATCH_ROWS)
+            digest = hashlib.sha256()
+            with open(temp_path, 'rb') as published:
+                for chunk in iter(lambda: published.read(1024 * 1024), b''):
+                    digest.update(chunk)
+            dataset_id = digest.hexdigest()
+            size = os.path.getsize(temp_path)
+            if os.path.exists(self._path(dataset_id)):
+                os.utime(self._path(dataset_id))  # Counts as recently used when evicting
+            else:
+                self._make_room(size)
+                os.replace(temp_path, self._path(dataset_id))
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        logger.info(
+            f"Published dataset {dataset_id[:12]} ({table.num_rows} rows, "
+            f"{size / (1024 * 1024):.1f}MB) in {time.perf_counter() - started:.2f}s"
+        )
+        return dataset_id
+
+    def _make_room(self, size: int) -> None:
+        """Evicts the oldest unreferenced datasets until ``size`` more bytes fit in the budget"""
+        if size > self.max_bytes:
+            raise DatasetStoreFull(f"Dataset of {size} bytes is larger than the store ({self.max_bytes} bytes)")
+        self._drop_stale_references()
+        datasets = sorted(self._datasets(), key=lambda dataset: dataset[2])
+        used = sum(dataset_size for _, dataset_size, _ in datasets)
+        for dataset_id, dataset_size, _ in datasets:
+            if used + size <= self.max_bytes:
+                break
+            if self._evict_if_unreferenced(dataset_id):
+                used -= dataset_size
+        if used + size > self.max_bytes:
+            raise DatasetStoreFull(
+                f"Dataset store is full: {used} of {self.max_bytes} bytes are referenced, {size} more needed"
+            )
+
+    def attach(self, dataset_id: str):
+        """
+        Returns the memory-mapped table for a dataset id
+
+        Raises:
+            DatasetMissing: If the dataset was evicted
+        """
+        import pyarrow as pa
+
+        path = self._path(dataset_id)
+        with self._lock:
+            table = self._attached.get(dataset_id)
+            if table is not None and os.path.exists(path):
+                self._attached.move_to_end(dataset_id)
+                return table
+            # Unmap datasets deleted by another process
+            self._attached.pop(dataset_id, None)
+
+        try:
+            with pa.memory_map(path, 'r') as source:
+                table = pa.ipc.open_file(source).read_all()  # Zero-copy: buffers point into the mapping
+        except FileNotFoundError:
+            raise DatasetMissing(dataset_id)
+
+        with self._lock:
+            self._attached[dataset_id] = table
+            while len(self._attached) > self.max_attached:
+                self._attached.popitem(last=False)
+        return table
+
+    def _prune_attached(self) -> None:
+        """Unmaps datasets other processes deleted, so their pages can be freed"""
+        with self._lock:
+            for dataset_id in [dataset_id for dataset_id in self._attached if not self.exists(dataset_id)]:
+                del self._attached[dataset_id]
+
+    # Reference counting
+
+    def _ref_path(self, dataset_id: str, owner: str) -> str:
+        return os.path.join(self.refs_directory, dataset_id, owner)
+
+    def acquire(self, dataset_id: str, owner: str) -> None:
+        """Records that ``owner`` (a session's dataset slot) points at the dataset"""
+        os.makedirs(os.path.join(self.refs_directory, dataset_id), exist_ok=True)
+        with open(self._ref_path(dataset_id, owner), 'w'):
+            pass
+
+    def touch(self, dataset_id: str, owner: str) -> None:
+        """Keeps an actively used reference from being collected as stale"""
+        path = self._ref_path(dataset_id, owner)
+        try:
+            if time.time() - os.path.getmtime(path) > self.touch_interval:
+                os.utime(path)
+        except FileNotFoundError:
+            pass
+
+    def release(self, dataset_id: str, owner: str) -> None:
+        """Drops one reference and deletes the dataset when none are left"""
+        try:
+            os.remove(self._ref_path(dataset_id, owner))
+        except FileNotFoundError:
+            pass
+        self._evict_if_unreferenced(dataset_id)
+
+    def refcount(self, dataset_id: str) -> int:
+        try:
+            return len(os.listdir(os.path.join(self.refs_directory, dataset_id)))
+        except FileNotFoundError:
+            return 0
+
+    def _evict_if_unreferenced(self, dataset_id: str) -> bool:
+        if self.refcount(dataset_id):
+            return False
+        try:
+            # Removing the reference folder fails if a reference was added meanwhile, which keeps the file
+            os.rmdir(os.path.join(self.refs_directory, dataset_id))
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return False
+        try:
+            os.remove(self._path(dataset_id))
+        except FileNotFoundError:
+            return False
+        # Processes that still map the file keep reading it until they drop it
+        with self._lock:
+            self._attached.pop(dataset_id, None)
+        logger.info(f"Evicted dataset {dataset_id[:12]}: no sessions reference it")
+        return True
+
+    def _drop_stale_references(self) -> None:
+        """Removes references of sessions that stopped reading their dataset"""
+        now = time.time()
+        for dataset_id in os.listdir(self.refs_directory):
+            directory = os.path.join(self.refs_directory, dataset_id)
+            for owner in os.listdir(directory) if os.path.isdir(directory) else ():
+                try:
+                    if now - os.path.getmtime(os.path.join(directory, owner)) > self.reference_ttl:
+                        os.remove(os.path.join(directory, owner))
+                except FileNotFoundError:
+                    continue
+
+    def collect(self) -> int:
+        """
+        Drops stale references and evicts unreferenced datasets
+
+        Returns:
+            int: Number of datasets deleted
+        """
+        self._drop_stale_references()
+        now = time.time()
+        evicted = 0
+        for dataset_id, _, modified in self._datasets():
+            if now - modified > PUBLISH_GRACE_SECONDS:
+                evicted += self._evict_if_unreferenced(dataset_id)
+        self._prune_attached()
+        return evicted
+
+
+_store: Optional[DatasetStore] = None
+_store_checked = False
+_store_lock = threading.Lock()
+
+
+def get_dataset_store() -> Optional[DatasetStore]:
+    """Returns the process-wide store, or None when pyarrow or the store directory is missing"""
+    global _store, _store_checked
+    with _store_lock:
+        if not _store_checked:
+            _store_checked = True
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                logger.info("pyarrow not installed; datasets stay in the session")
+            else:
+                if settings.DATASET_STORE_DIR:
+                    _store = DatasetStore(
+                        settings.DATASET_STORE_DIR,
+                        max_bytes=settings.DATASET_STORE_MAX_BYTES,
+                        reference_ttl=settings.DATASET_REFERENCE_TTL,
+                    )
+        return _store
+
+
+def _owner_name(session_key: str, key: str) -> str:
+    """Reference name for one dataset slot of one session; the session key itself is not written to disk"""
+    return f"{hashlib.sha256(session_key.encode('utf-8')).hexdigest()[:32]}.{key}"
+
+
+def _owner(session, key: str) -> str:
+    if session.session_key is None:
+        session.save()  # Assigns the key the reference is recorded under
+    return _owner_name(session.session_key, key)
+
+
+def store_session_rows(session, key: str, rows: List[Dict[str, Any]]) -> None:
+    """
+    Saves a dataset for the session: published to the shared store when
+    available and there is room, otherwise as rows in the session
+
+    Args:
+        session: The request's session
+        key: Session key of the dataset ('data_dict', 'vendor_data_dict')
+        rows: Records to store
+    """
+    store = get_dataset_store()
+    previous_id = session.get(key + DATASET_ID_SUFFIX)
+    dataset_id = None
+    if store is not None and rows:
+        owner = _owner(session, key)
+        try:
+            dataset_id = store.publish(rows)
+            store.acquire(dataset_id, owner)
+            if not store.exists(dataset_id):
+                store.publish(rows)  # Another process evicted the identical dataset before the reference landed
+        except OSError as e:
+            logger.warning(f"Dataset store unavailable for '{key}', keeping {len(rows)} rows in the session: {e}")
+            if dataset_id is not None and dataset_id != previous_id:
+                store.release(dataset_id, owner)
+            dataset_id = None
+
+    if dataset_id is None:
+        session[key] = rows
+        session.pop(key + DATASET_ID_SUFFIX, None)
+    else:
+        session[key + DATASET_ID_SUFFIX] = dataset_id
+        session.pop(key, None)
+
+    if store is not None:
+        if previous_id and previous_id != dataset_id:
+            store.release(previous_id, _owner(session, key))
+        store.collect()
+
+
+def release_session_datasets(session) -> None:
+    """Drops every dataset reference the session holds"""
+    store = get_dataset_store()
+    if store is None or session.session_key is None:
+        return
+    for slot in [slot for slot in session.keys() if slot.endswith(DATASET_ID_SUFFIX)]:
+        store.release(session.pop(slot), _owner_name(session.session_key, slot[:-len(DATASET_ID_SUFFIX)]))
+
+
+@receiver(user_logged_out, dispatch_uid='dataset_store_release_on_logout')
+def _release_on_logout(sender, request=None, **kwargs):
+    # Sent before logout() flushes the session, while its dataset ids are still readable
+    if request is not None:
+        release_session_datasets(request.session)
+
+
+def _table(session_key: Optional[str], key: str, dataset_id: str):
+    """Attaches a session's dataset, or returns None if it was evicted"""
+    store = get_dataset_store()
+    try:
+        table = store.attach(dataset_id)
+    except DatasetMissing:
+        logger.warning(f"Dataset {dataset_id[:12]} for '{key}' was evicted; the roster has to be uploaded again")
+        return None
+    if session_key:
+        store.touch(dataset_id, _owner_name(session_key, key))
+    return table
+
+
+def table_view(session_key: Optional[str], key: str, dataset_id: Optional[str], fallback_rows: List[Dict[str, Any]],
+               search_query: str = '', column: Optional[str] = None, direction: str = 'asc',
+               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Searches and sorts a dataset, on the mapped table when it is in the store
+
+    Args:
+        session_key: Session the dataset belongs to (for reference upkeep)
+        key: Session key of the dataset
+        dataset_id: Id stored in the session, or None
+        fallback_rows: Rows stored in the session when there is no id
+        search_query: Lower-cased query; empty keeps every row
+        column: Column to sort on; ignored when empty or unknown
+        direction: ``asc`` or ``desc``
+        limit: Return only the first ``limit`` rows
+
+    Returns:
+        List[Dict[str, Any]]: Matching rows, materialized only after filtering
+    """
+    if not dataset_id or get_dataset_store() is None:
+        rows = view_rows(fallback_rows, search_query, column, direction)
+        return rows if limit is None else rows[:limit]
+    table = _table(session_key, key, dataset_id)
+    if table is None:
+        return []
+    table = sort_table(search_table(table, search_query), column, direction)
+    return materialize(table if limit is None else table.slice(0, limit))
+
+
+def table_batches(session_key: Optional[str], key: str, dataset_id: Optional[str],
+                  fallback_rows: List[Dict[str, Any]], search_query: str = '', column: Optional[str] = None,
+                  direction: str = 'asc') -> Tuple[List[str], Iterator[List[Dict[str, Any]]]]:
+    """
+    Searches and sorts a dataset like :func:`table_view`, for streaming exports
+
+    On the mapped table only ``BATCH_ROWS`` rows at a time are turned into
+    Python objects, as the export consumes them.
+
+    Args:
+        session_key: Session the dataset belongs to (for reference upkeep)
+        key: Session key of the dataset
+        dataset_id: Id stored in the session, or None
+        fallback_rows: Rows stored in the session when there is no id
+        search_query: Lower-cased query; empty keeps every row
+        column: Column to sort on; ignored when empty or unknown
+        direction: ``asc`` or ``desc``
+
+    Returns:
+        Tuple[List[str], Iterator[List[Dict[str, Any]]]]: Column names, and the matching rows in batches
+    """
+    if not dataset_id or get_dataset_store() is None:
+        rows = view_rows(fallback_rows, search_query, column, direction)
+        return (list(rows[0].keys()) if rows else []), iter([rows])
+    table = _table(session_key, key, dataset_id)
+    if table is None:
+        return [], iter(())
+    table = sort_table(search_table(table, search_query), column, direction)
+    batches = (materialize(table.slice(offset, BATCH_ROWS)) for offset in range(0, table.num_rows, BATCH_ROWS))
+    return visible_columns(table), batches
+
+
+def table_columns(session_key: Optional[str], key: str, dataset_id: Optional[str],
+                  fallback_rows: List[Dict[str, Any]]) -> List[str]:
+    """Column names of a dataset, read from the schema when it is in the store"""
+    if not dataset_id or get_dataset_store() is None:
+        return list(fallback_rows[0].keys()) if fallback_rows else []
+    table = _table(session_key, key, dataset_id)
+    return visible_columns(table) if table is not None and table.num_rows else []
+
+
+def table_row_count(session_key: Optional[str], key: str, dataset_id: Optional[str],
+                    fallback_rows: List[Dict[str, Any]]) -> int:
+    """Number of rows in a dataset, without materializing them"""
+    if not dataset_id or get_dataset_store() is None:
+        return len(fallback_rows)
+    table = _table(session_key, key, dataset_id)
+    return table.num_rows if table is not None else 0
+
+
+def session_rows(session, key: str) -> List[Dict[str, Any]]:
+    """Every row of the session's dataset, wherever it is stored"""
+    return table_view(session.session_key, key, session.get(key + DATASET_ID_SUFFIX), session.get(key) or [])
+
+
+def session_head(session, key: str, limit: int) -> List[Dict[str, Any]]:
+    """The first ``limit`` rows of the session's dataset, for page previews"""
+    return table_view(session.session_key, key, session.get(key + DATASET_ID_SUFFIX), session.get(key) or [],
+                      limit=limit)
+
+
+def session_view(session, key: str, search_query: str = '', column: Optional[str] = None,
+                 direction: str = 'asc') -> List[Dict[str, Any]]:
+    """The session's dataset after the table's search and sort"""
+    return table_view(session.session_key, key, session.get(key + DATASET_ID_SUFFIX), session.get(key) or [],
+                      search_query, column, direction)
+
+
+def session_batches(session, key: str, search_query: str = '', column: Optional[str] = None,
+                    direction: str = 'asc') -> Tuple[List[str], Iterator[List[Dict[str, Any]]]]:
+    """The session's dataset after the table's search and sort, in batches for exports"""
+    return table_batches(session.session_key, key, session.get(key + DATASET_ID_SUFFIX), session.get(key) or [],
+                         search_query, column, direction)
+
+
+def session_columns(session, key: str) -> List[str]:
+    """Column names of the session's dataset"""
+    return table_columns(session.session_key, key, session.get(key + DATASET_ID_SUFFIX), session.get(key) or [])
+
+
+def session_row_count(session, key: str) -> int:
+    """Number of rows in the session's dataset"""
+    return table_row_count(session.session_key, key, session.get(key + DATASET_ID_SUFFIX), session.get(key) or [])
+
+
+async def asession_view(session, key: str, search_query: str = '', column: Optional[str] = None,
+                        direction: str = 'asc') -> List[Dict[str, Any]]:
+    """Async counterpart of :func:`session_view`; the table work runs on the blocking executor"""
+    return await run_blocking(
+        table_view, session.session_key, key, await session.aget(key + DATASET_ID_SUFFIX),
+        await session.aget(key) or [], search_query, column, direction,
+    )
+
+
+async def asession_batches(session, key: str, search_query: str = '', column: Optional[str] = None,
+                           direction: str = 'asc') -> Tuple[List[str], Iterator[List[Dict[str, Any]]]]:
+    """Async counterpart of :func:`session_batches`; iterate the batches on the blocking executor"""
+    return await run_blocking(
+        table_batches, session.session_key, key, await session.aget(key + DATASET_ID_SUFFIX),
+        await session.aget(key) or [], search_query, column, direction,
+    )
+
+
+async def asession_rows(session, key: str) -> List[Dict[str, Any]]:
+    """Async counterpart of :func:`session_rows`"""
+    return await asession_view(session, key)
+
+
+async def asession_row_count(session, key: str) -> int:
+    """Async counterpart of :func:`session_row_count`"""
+    return await run_blocking(
+        table_row_count, session.session_key, key, await session.aget(key + DATASET_ID_SUFFIX),
+        await session.aget(key) or [],
+    )
+
+
+async def asession_columns(session, key: str) -> List[str]:
+    """Async counterpart of :func:`session_columns`"""
+    return await run_blocking(
+        table_columns, session.session_key, key, await session.aget(key + DATASET_ID_SUFFIX),
+        await session.aget(key) or [],
+    )
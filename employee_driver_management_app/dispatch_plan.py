@@ -0,0 +1,86 @@
+import heapq
+import time
+from typing import Any, Dict, List, Tuple
+
+from .metrics import EMAIL_DELIVERY_SECONDS
+
+# Per-message delivery time assumed until this process has measured enough sends
+DEFAULT_SECONDS_PER_MESSAGE = 1.5
+
+# Sends needed before the measured average replaces the default
+MIN_MEASURED_SENDS = 5
+
+# Number of largest messages listed in the plan
+LARGEST_MESSAGES = 10
+
+# Number of messages itemized in ``per_recipient``; the totals still cover every message
+PER_RECIPIENT_LIMIT = 200
+
+
+def seconds_per_message(app: str) -> Tuple[float, str]:
+    """
+    Returns the average time to deliver one built message for ``app``
+
+    Only the hand-off to the transport is measured; building the message is
+    part of the dry run's own preparation time.
+
+    Args:
+        app: Metric label of the sending app ('employee' or 'vendor')
+
+    Returns:
+        Tuple[float, str]: Seconds per message and where the figure came from
+    """
+    count, total = EMAIL_DELIVERY_SECONDS.totals(app=app)
+    if count >= MIN_MEASURED_SENDS:
+        return total / count, 'measured'
+    return DEFAULT_SECONDS_PER_MESSAGE, 'default'
+
+
+class DispatchPlan:
+    """Collects the messages a dry run would send and summarizes them"""
+
+    def __init__(self, app: str):
+        self.app = app
+        self.started = time.perf_counter()
+        self.messages: List[Dict[str, Any]] = []
+
+    def add(self, recipient: str, message, **details: Any) -> None:
+        """
+        Records one fully built MIME message
+
+        Args:
+            recipient: Value of the To header
+            message: ``email.message.Message`` as it would be handed to SMTP
+            details: Extra per-message fields (rows covered, vendor name, ...)
+        """
+        attachments = sum(1 for part in message.walk() if part.get_filename())
+        self.messages.append({
+            'recipient': recipient,
+            'bytes': len(message.as_bytes()),
+            'attachments': attachments,
+            **details,
+        })
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Returns the plan as a JSON-serializable dict
+
+        The duration estimate is the time this dry run spent preparing the
+        messages (grouping, rendering, MIME building) plus the measured
+        average per message for delivery.
+        """
+        per_message, source = seconds_per_message(self.app)
+        preparation = time.perf_counter() - self.started
+        total_bytes = sum(message['bytes'] for message in self.messages)
+        return {
+            'messages': len(self.messages),
+            'total_bytes': total_bytes,
+            'average_bytes': total_bytes // len(self.messages) if self.messages else 0,
+            'largest': heapq.nlargest(LARGEST_MESSAGES, self.messages, key=lambda message: message['bytes']),
+            'per_recipient': self.messages[:PER_RECIPIENT_LIMIT],
+            'per_recipient_truncated': len(self.messages) > PER_RECIPIENT_LIMIT,
+            'preparation_seconds': round(preparation, 2),
+            'seconds_per_message': round(per_message, 3),
+            'estimate_source': source,
+            'estimated_seconds': round(preparation + per_message * len(self.messages), 1),
+        }
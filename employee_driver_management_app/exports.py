@@ -0,0 +1,132 @@
+import csv
+import tempfile
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List
+
+from django.http import FileResponse, HttpRequest, HttpResponse, StreamingHttpResponse
+
+from .async_utils import run_blocking
+
+# Value of the ``format`` query parameter that selects a workbook instead of CSV
+XLSX_FORMAT = 'xlsx'
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class Echo:
+    """File-like object whose ``write`` returns the value instead of storing it"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_csv(columns: List[str], batches: Iterable[List[Dict[str, Any]]]) -> Iterator[str]:
+    """
+    Yields the header and every row as CSV lines, one at a time
+
+    Args:
+        columns: Column names, in order
+        batches: Records in batches, read only as the lines are consumed
+
+    Returns:
+        Iterator[str]: CSV lines
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for rows in batches:
+        for row in rows:
+            yield writer.writerow([row.get(column) for column in columns])
+
+
+def write_xlsx(columns: List[str], batches: Iterable[List[Dict[str, Any]]]):
+    """
+    Writes rows into an anonymous temp file in xlsxwriter's constant_memory mode
+
+    Args:
+        columns: Column names, in order
+        batches: Records in batches, each written before the next is read
+
+    Returns:
+        File object positioned at the start of the workbook; deleted on close
+    """
+    import xlsxwriter
+
+    output = tempfile.TemporaryFile()
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+    worksheet = workbook.add_worksheet('Export')
+    worksheet.write_row(0, 0, columns, workbook.add_format({'bold': True}))
+    row_number = 0
+    for rows in batches:
+        for row in rows:
+            row_number += 1
+            worksheet.write_row(row_number, 0, [row.get(column) for column in columns])
+    workbook.close()
+    output.seek(0)
+    return output
+
+
+def _export_filename(basename: str) -> str:
+    return f"{basename}_{datetime.now().strftime('%Y-%m-%d_%H%M')}"
+
+
+def export_response(request: HttpRequest, columns: List[str], batches: Iterable[List[Dict[str, Any]]],
+                    basename: str) -> HttpResponse:
+    """
+    Returns rows as a downloadable file in the format requested by the client.
+
+    ``?format=csv`` (the default) streams the CSV line by line, reading the
+    next batch of rows only once the previous one was sent; ``?format=xlsx``
+    writes the workbook to a temp file batch by batch and serves it from disk.
+
+    Args:
+        request: The HTTP request object
+        columns: Column names, in order
+        batches: Records to export, in batches (see ``dataset_store.session_batches``)
+        basename: File name without date or extension
+
+    Returns:
+        HttpResponse: StreamingHttpResponse or FileResponse
+    """
+    filename = _export_filename(basename)
+    if request.GET.get('format') == XLSX_FORMAT:
+        return FileResponse(write_xlsx(columns, batches), as_attachment=True, filename=f"{filename}.xlsx",
+                            content_type=XLSX_CONTENT_TYPE)
+
+    response = StreamingHttpResponse(iter_csv(columns, batches), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+async def aiter_csv(columns: List[str], batches: Iterable[List[Dict[str, Any]]]) -> AsyncIterator[str]:
+    """Async counterpart of :func:`iter_csv`; each batch is read on the blocking executor"""
+    batches = iter(batches)
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    while (rows := await run_blocking(next, batches, None)) is not None:
+        for row in rows:
+            yield writer.writerow([row.get(column) for column in columns])
+
+
+async def aexport_response(request: HttpRequest, columns: List[str], batches: Iterable[List[Dict[str, Any]]],
+                           basename: str) -> HttpResponse:
+    """
+    Same as :func:`export_response`, but writes the workbook on the blocking
+    executor and streams the CSV with an async iterator
+
+    Args:
+        request: The HTTP request object
+        columns: Column names, in order
+        batches: Records to export, in batches (see ``dataset_store.asession_batches``)
+        basename: File name without date or extension
+
+    Returns:
+        HttpResponse: StreamingHttpResponse or FileResponse
+    """
+    filename = _export_filename(basename)
+    if request.GET.get('format') == XLSX_FORMAT:
+        return FileResponse(await run_blocking(write_xlsx, columns, batches), as_attachment=True,
+                            filename=f"{filename}.xlsx", content_type=XLSX_CONTENT_TYPE)
+
+    response = StreamingHttpResponse(aiter_csv(columns, batches), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
@@ -0,0 +1,193 @@
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows: rotation is then only safe with a single worker process
+    fcntl = None
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, including ``extra`` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class PayloadSamplingFilter(logging.Filter):
+    """
+    Keeps bulky INFO/DEBUG payload logs from dominating send time.
+
+    Records logged with ``extra={'payload': True}`` are sampled (one in
+    ``sample_rate`` is kept) and any INFO/DEBUG message longer than
+    ``max_length`` is truncated. WARNING and above always pass unchanged.
+
+    The decision is stored on the record, so a filter shared by several
+    handlers counts each record once and every handler keeps the same ones.
+    """
+
+    def __init__(self, max_length: int = 2000, sample_rate: int = 1, name: str = ''):
+        super().__init__(name)
+        self.max_length = max_length
+        self.sample_rate = max(1, sample_rate)
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        # Sampled-out payloads are dropped before their message is ever formatted
+        if getattr(record, 'payload', False):
+            keep = getattr(record, '_payload_sampled', None)
+            if keep is None:
+                keep = record._payload_sampled = next(self._counter) % self.sample_rate == 0
+            if not keep:
+                return False
+
+        message = record.getMessage()
+        if len(message) > self.max_length:
+            record.msg = f"{message[:self.max_length]}... [truncated {len(message) - self.max_length} chars]"
+            record.args = None
+        return True
+
+
+class SharedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Size-rotated file handler that several worker processes can share.
+
+    Every write holds an exclusive ``flock`` on ``<filename>.lock``, so one
+    process at a time checks the size, rotates and appends. A process whose
+    file was rotated away by another one reopens the new file first.
+    """
+
+    def __init__(self, filename: str, max_bytes: int, backup_count: int):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+        self.lock_path = f"{self.baseFilename}.lock"
+
+    def _reopen_if_rotated(self) -> None:
+        if self.stream is None:
+            return
+        try:
+            on_disk = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            on_disk = None
+        opened = os.fstat(self.stream.fileno())
+        if on_disk is None or (on_disk.st_dev, on_disk.st_ino) != (opened.st_dev, opened.st_ino):
+            self.stream.close()
+            self.stream = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # Opened per write so a forked worker never shares its parent's lock
+        with open(self.lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._reopen_if_rotated()
+                super().emit(record)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class QueuedFileHandler(logging.handlers.QueueHandler):
+    """
+    Non-blocking file handler: callers enqueue records and a background
+    listener thread formats and appends them to the file, rotating it once
+    it reaches ``max_bytes`` and keeping ``backup_count`` old files. Worker
+    processes share the file through ``SharedRotatingFileHandler``.
+
+    When the queue is full, records below ERROR are dropped instead of
+    blocking the request, while errors are written synchronously so they
+    are never lost. Drops are counted in ``log_records_dropped_total`` and
+    reported in the log as soon as the queue has room again.
+    """
+
+    def __init__(self, filename: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                 queue_size: int = 10000):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.target = SharedRotatingFileHandler(filename, max_bytes, backup_count)
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._unreported = 0
+        self._start_listener()
+        atexit.register(self._stop_listener)
+        # A worker forked after the listener started (gunicorn --preload) has no listener thread
+        os.register_at_fork(after_in_child=self._restart_after_fork)
+
+    def _start_listener(self) -> None:
+        self.listener = logging.handlers.QueueListener(self.queue, self.target, respect_handler_level=False)
+        self.listener.start()
+
+    def _restart_after_fork(self) -> None:
+        self.queue = queue.Queue(maxsize=self.queue_size)  # The parent's queue locks may be held
+        self._start_listener()
+
+    def setFormatter(self, fmt: logging.Formatter) -> None:
+        # Formatting happens on the listener thread, not in the request
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Freeze the message so later mutation of the arguments can't change it
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self._unreported:
+            self._report_dropped()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno >= logging.ERROR:
+                self.target.handle(record)  # The handler lock orders it with the listener's writes
+                return
+            self._record_drop()
+
+    def _record_drop(self) -> None:
+        from .metrics import LOG_RECORDS_DROPPED
+
+        self.dropped += 1
+        self._unreported += 1
+        LOG_RECORDS_DROPPED.inc(handler=self.name or os.path.basename(self.target.baseFilename))
+
+    def _report_dropped(self) -> None:
+        count = self._unreported
+        notice = logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            f"{count} log record(s) dropped because the log queue was full", None, None,
+        )
+        try:
+            self.queue.put_nowait(notice)
+        except queue.Full:
+            return
+        self._unreported -= count
+
+    def _stop_listener(self) -> None:
+        # Flushes queued records; safe to call more than once
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def close(self) -> None:
+        self._stop_listener()
+        self.target.close()
+        super().close()
@@ -0,0 +1,349 @@
+"""
+Pluggable delivery for the apps' ``EmailService`` classes.
+
+``smtp`` delivers in the request, as before. ``spool`` writes the serialized
+RFC822 message into a maildir-style directory (``tmp/`` then an atomic rename
+into ``new/``) and returns at disk speed; the ``relay_mail`` management
+command drains the spool over pooled SMTP connections. ``memory`` and
+``file`` keep messages local, for benchmarks and tests without a mail server.
+"""
+import itertools
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from email.message import Message
+from email.parser import BytesHeaderParser
+from email.utils import getaddresses
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger('django')
+
+_counter = itertools.count()
+_hostname = socket.gethostname().replace('/', '_').replace(':', '_')
+
+
+def _unique_name() -> str:
+    """Maildir-style unique file name: time, pid and a per-process counter, host"""
+    return f"{time.time_ns()}.P{os.getpid()}Q{next(_counter)}.{_hostname}"
+
+
+def envelope(raw: bytes) -> Tuple[str, List[str]]:
+    """Reads the envelope sender and recipients from a serialized message's headers"""
+    headers = BytesHeaderParser().parsebytes(raw)
+    sender = getaddresses(headers.get_all('From', []))
+    recipients = [address for _, address in getaddresses(
+        headers.get_all('To', []) + headers.get_all('Cc', []) + headers.get_all('Bcc', [])
+    ) if address]
+    return (sender[0][1] if sender else ''), recipients
+
+
+class SMTPTransport:
+    """Opens one SMTP connection per message (the original behaviour)"""
+
+    def __init__(self, host: str, port: int, use_tls: bool, username: Optional[str], password: Optional[str]):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+
+    def send(self, message: Message) -> None:
+        import smtplib
+
+        with smtplib.SMTP(self.host, self.port) as server:
+            if self.use_tls:
+                server.starttls()
+            server.login(self.username, self.password)
+            server.send_message(message)
+
+
+class SpoolTransport:
+    """Writes messages into a maildir-style spool for ``relay_mail`` to deliver"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        for subdirectory in ('tmp', 'new', 'cur', 'failed'):
+            os.makedirs(os.path.join(directory, subdirectory), exist_ok=True)
+
+    def send(self, message: Message) -> None:
+        name = _unique_name()
+        temp_path = os.path.join(self.directory, 'tmp', name)
+        with open(temp_path, 'wb') as spool_file:
+            spool_file.write(message.as_bytes())
+            spool_file.flush()
+            os.fsync(spool_file.fileno())
+        # The rename is atomic, so the relay never sees a partially written message
+        os.replace(temp_path, os.path.join(self.directory, 'new', name))
+
+
+class MemoryTransport:
+    """
+    Keeps serialized messages in a process-wide outbox
+
+    Only the newest ``MAX_OUTBOX`` messages are kept, so a server left on
+    this transport can't grow without bound.
+    """
+
+    MAX_OUTBOX = 1000
+
+    outbox: List[bytes] = []
+    _lock = threading.Lock()
+
+    def send(self, message: Message) -> None:
+        raw = message.as_bytes()
+        with self._lock:
+            self.outbox.append(raw)
+            if len(self.outbox) > self.MAX_OUTBOX:
+                del self.outbox[:len(self.outbox) - self.MAX_OUTBOX]
+
+    @classmethod
+    def clear(cls) -> List[bytes]:
+        """Empties the outbox and returns what it held"""
+        with cls._lock:
+            messages, cls.outbox[:] = list(cls.outbox), []
+        return messages
+
+
+class FileTransport:
+    """Writes each message to ``<directory>/<unique>.eml``"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def send(self, message: Message) -> None:
+        with open(os.path.join(self.directory, f"{_unique_name()}.eml"), 'wb') as eml_file:
+            eml_file.write(message.as_bytes())
+
+
+def get_transport(name: str, host: str = '', port: int = 0, use_tls: bool = True,
+                  username: Optional[str] = None, password: Optional[str] = None):
+    """
+    Returns the transport configured by ``EMAIL_TRANSPORT``
+
+    Args:
+        name: 'smtp', 'spool', 'memory' or 'file'
+        host, port, use_tls, username, password: SMTP settings (used by 'smtp')
+
+    Returns:
+        Transport with a ``send(message)`` method
+    """
+    from django.conf import settings
+
+    if name == 'spool':
+        return SpoolTransport(settings.EMAIL_SPOOL_DIR)
+    if name == 'memory':
+        return MemoryTransport()
+    if name == 'file':
+        return FileTransport(settings.EMAIL_FILE_DIR)
+    if name != 'smtp':
+        raise ValueError(f"Unknown EMAIL_TRANSPORT '{name}'")
+    return SMTPTransport(host, port, use_tls, username, password)
+
+
+class SMTPConnectionPool:
+    """Reuses authenticated SMTP connections across messages"""
+
+    def __init__(self, host: str, port: int, use_tls: bool, username: Optional[str], password: Optional[str],
+                 size: int = 4):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self._idle: 'queue.LifoQueue' = queue.LifoQueue(maxsize=size)
+
+    def _connect(self):
+        import smtplib
+
+        server = smtplib.SMTP(self.host, self.port, timeout=60)
+        if self.use_tls:
+            server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        return server
+
+    @contextmanager
+    def connection(self) -> Iterator:
+        """Yields an open connection; it is returned to the pool unless it failed"""
+        server = None
+        while server is None:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                server = self._connect()
+                break
+            # The server may have dropped an idle connection
+            try:
+                server.noop()
+            except Exception:
+                self._discard(server)
+                server = None
+        try:
+            yield server
+        except Exception:
+            self._discard(server)
+            raise
+        try:
+            self._idle.put_nowait(server)
+        except queue.Full:
+            self._discard(server)
+
+    @staticmethod
+    def _discard(server) -> None:
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+class SpoolRelay:
+    """
+    Drains a spool written by :class:`SpoolTransport`
+
+    Messages are claimed by renaming them from ``new/`` to ``cur/``, so
+    several relays can share a spool without sending anything twice. A
+    delivered message is deleted (or, if that fails, noted in
+    ``delivered.log`` so it is never requeued); a failed one goes back to
+    ``new/`` with its attempt count in the name (``<name>.retry<N>``) and is
+    retried with exponential backoff, and goes to ``failed/`` after
+    ``max_attempts``.
+    """
+
+    def __init__(self, directory: str, pool: SMTPConnectionPool, workers: int = 4, max_attempts: int = 5,
+                 retry_delay: float = 30):
+        self.directory = directory
+        self.retry_delay = retry_delay
+        self.pool = pool
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self._ledger_lock = threading.Lock()
+        SpoolTransport(directory)  # Creates the maildir layout
+
+    def _path(self, subdirectory: str, name: str) -> str:
+        return os.path.join(self.directory, subdirectory, name)
+
+    @staticmethod
+    def _attempts(name: str) -> Tuple[str, int]:
+        base, marker, attempts = name.rpartition('.retry')
+        if not marker or not attempts.isdigit():
+            return name, 0
+        return base, int(attempts)
+
+    @property
+    def ledger_path(self) -> str:
+        return os.path.join(self.directory, 'delivered.log')
+
+    def _delivered(self) -> set:
+        """Names of messages recorded as sent"""
+        try:
+            with open(self.ledger_path, encoding='utf-8') as ledger:
+                return {line.strip() for line in ledger if line.strip()}
+        except FileNotFoundError:
+            return set()
+
+    def recover(self, stale_seconds: float = 600) -> int:
+        """
+        Returns messages claimed by a relay that died mid-delivery to ``new/``
+
+        Messages the ledger records as sent are deleted instead, and the
+        ledger is emptied; call this only while no other relay is running.
+        """
+        recovered = 0
+        now = time.time()
+        delivered = self._delivered()
+        for name in os.listdir(os.path.join(self.directory, 'cur')):
+            path = self._path('cur', name)
+            try:
+                if name in delivered:
+                    os.remove(path)
+                elif now - os.path.getmtime(path) > stale_seconds:
+                    os.replace(path, self._path('new', name))
+                    recovered += 1
+            except FileNotFoundError:
+                continue
+        if delivered:
+            open(self.ledger_path, 'w').close()
+        return recovered
+
+    def _claim(self, name: str) -> Optional[str]:
+        try:
+            os.replace(self._path('new', name), self._path('cur', name))
+        except FileNotFoundError:
+            return None  # Another relay claimed it first
+        path = self._path('cur', name)
+        os.utime(path)  # Claim time, so recover() doesn't mistake it for a stale claim
+        return path
+
+    def _deliver(self, name: str) -> Optional[bool]:
+        path = self._claim(name)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as spool_file:
+                raw = spool_file.read()
+            sender, recipients = envelope(raw)
+            with self.pool.connection() as server:
+                server.sendmail(sender, recipients, raw)
+        except Exception as e:
+            base, attempts = self._attempts(name)
+            attempts += 1
+            target = 'failed' if attempts >= self.max_attempts else 'new'
+            os.replace(path, self._path(target, f"{base}.retry{attempts}"))
+            logger.error(f"Relay failed for spooled message {base} (attempt {attempts}, moved to {target}/): {e}")
+            return False
+
+        # Sent: from here on nothing may put the message back in the queue
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.error(f"Spooled message {name} was delivered but could not be removed from cur/: {e}")
+            # Keeps recover() from requeueing it on the next start
+            try:
+                with self._ledger_lock, open(self.ledger_path, 'a', encoding='utf-8') as ledger:
+                    ledger.write(name + '\n')
+            except OSError as ledger_error:
+                logger.error(f"Delivery of {name} not recorded; it will be sent again after a restart: {ledger_error}")
+        return True
+
+    def _due(self, name: str) -> bool:
+        """Whether a message is new or its retry backoff has passed"""
+        _, attempts = self._attempts(name)
+        if not attempts:
+            return True
+        try:
+            failed_at = os.path.getmtime(self._path('new', name))
+        except FileNotFoundError:
+            return False
+        return time.time() - failed_at >= self.retry_delay * 2 ** (attempts - 1)
+
+    def drain(self) -> Dict[str, int]:
+        """
+        Delivers every message in ``new/`` that is due
+
+        Returns:
+            Dict[str, int]: Counts of delivered and failed messages
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        names = [name for name in sorted(os.listdir(os.path.join(self.directory, 'new'))) if self._due(name)]
+        if not names:
+            return {'delivered': 0, 'failed': 0}
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='mail-relay') as executor:
+            results = list(executor.map(self._deliver, names))
+        delivered = results.count(True)
+        failed = results.count(False)
+        logger.info(f"Relayed {delivered} spooled messages, {failed} failed")
+        return {'delivered': delivered, 'failed': failed}
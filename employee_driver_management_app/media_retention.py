@@ -0,0 +1,386 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: the index is then only guarded within one process
+    fcntl = None
+
+from django.conf import settings
+
+from .metrics import MEDIA_EVICTED_BYTES, MEDIA_EVICTIONS
+
+logger = logging.getLogger('django')
+
+# Name of the index file kept at the root of MEDIA_ROOT, and of the lock file serializing its updates
+INDEX_FILENAME = '.retention_index.json'
+LOCK_FILENAME = '.retention_index.lock'
+
+# Prefix of entries renamed out of the way before they are deleted
+EVICTING_PREFIX = '.evicting-'
+
+# Entries used more recently than this are never evicted for size, so a send job
+# that is still rendering (or a roster just uploaded) is not pulled from under a request
+MIN_IDLE_SECONDS = 900
+
+# Seconds after which a lease left behind by a crashed job stops protecting its entry
+LEASE_SECONDS = 6 * 3600
+
+
+def _disk_usage(path: str) -> int:
+    """Returns the size of a file, or of every file below a directory"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for directory, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.path.getsize(os.path.join(directory, filename))
+            except OSError:
+                continue
+    return total
+
+
+class MediaRetentionManager:
+    """
+    Keeps MEDIA_ROOT within an age and total-size budget.
+
+    Uploads and send-job workspaces are registered in a JSON index as they are
+    created, so enforcing the budget never has to walk the media tree. Entries
+    older than ``max_age`` are dropped first, then the least recently used ones
+    until the total fits ``max_bytes``. Enforcement runs on a daemon thread,
+    woken after every registration and otherwise every ``interval`` seconds.
+
+    Every worker process and ``compact_media`` update the same index, so each
+    read-modify-write holds an exclusive ``flock`` on a lock file next to it.
+    Last use is refreshed by :meth:`track` (uploads and job workspaces are
+    used once, while they are created), by :meth:`touch` on route PDF cache
+    hits and when a :meth:`in_use` lease ends. Leased entries and entries used
+    within ``MIN_IDLE_SECONDS`` are never evicted, whatever their age.
+    """
+
+    def __init__(self, root: str, max_age: float, max_bytes: int, interval: float = 3600):
+        self.root = os.path.abspath(root)
+        self.index_path = os.path.join(self.root, INDEX_FILENAME)
+        self.lock_path = os.path.join(self.root, LOCK_FILENAME)
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._wakeup = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    # Index persistence
+
+    def _relative(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), self.root)
+
+    @contextmanager
+    def _locked(self) -> Iterator[Dict[str, Dict[str, Any]]]:
+        """
+        Holds the index lock across threads and processes and yields the
+        freshly read index; changes are kept only if the caller ``_save``s
+        """
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            with open(self.lock_path, 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield self._load()
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Reads the index from disk (caller holds the lock)"""
+        try:
+            with open(self.index_path, encoding='utf-8') as index_file:
+                self._entries = json.load(index_file)
+        except FileNotFoundError:
+            self._entries = {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Media retention index unreadable, starting empty: {e}")
+            self._entries = {}
+        return self._entries
+
+    def _save(self) -> None:
+        """Writes the index atomically (caller holds the lock)"""
+        fd, temp_path = tempfile.mkstemp(prefix=f'{INDEX_FILENAME}.', dir=self.root)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as temp_file:
+                json.dump(self._entries, temp_file)
+            os.replace(temp_path, self.index_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    # Registration
+
+    def track(self, path: str, kind: str) -> None:
+        """
+        Registers an upload or artifact directory and schedules enforcement.
+        Tracking an existing entry again refreshes its size and last use.
+
+        Args:
+            path: File or directory below MEDIA_ROOT
+            kind: Free-form category shown in reports ('upload', 'vendor_job', ...)
+        """
+        now = time.time()
+        size = _disk_usage(path)
+        with self._locked() as entries:
+            previous = entries.get(self._relative(path), {})
+            entry = {'kind': kind, 'size': size, 'created': previous.get('created', now), 'last_access': now}
+            if previous.get('leases'):
+                entry['leases'] = previous['leases']
+            entries[self._relative(path)] = entry
+            self._save()
+        self.schedule()
+
+    def touch(self, path: str) -> bool:
+        """
+        Marks a tracked entry as recently used
+
+        Returns:
+            bool: False if the entry is not tracked (e.g. it was just evicted)
+        """
+        with self._locked() as entries:
+            entry = entries.get(self._relative(path))
+            if entry is None:
+                return False
+            entry['last_access'] = time.time()
+            self._save()
+        return True
+
+    @contextmanager
+    def in_use(self, path: str) -> Iterator[None]:
+        """
+        Protects a tracked entry from eviction while a job reads it
+
+        The lease is recorded in the index, so it holds against every process;
+        one left behind by a crashed job expires after ``LEASE_SECONDS``.
+
+        Args:
+            path: File or directory below MEDIA_ROOT
+        """
+        key = self._relative(path)
+        token = uuid.uuid4().hex
+        with self._locked() as entries:
+            entry = entries.get(key)
+            if entry is not None:
+                entry.setdefault('leases', {})[token] = time.time() + LEASE_SECONDS
+                entry['last_access'] = time.time()
+                self._save()
+        try:
+            yield
+        finally:
+            with self._locked() as entries:
+                entry = entries.get(key)
+                if entry is not None:
+                    entry.get('leases', {}).pop(token, None)
+                    if not entry.get('leases'):
+                        entry.pop('leases', None)
+                    entry['last_access'] = time.time()
+                    self._save()
+
+    def rebuild(self, min_age: float = MIN_IDLE_SECONDS) -> int:
+        """
+        Indexes media that predates the index (or was written outside the app)
+
+        Top-level files of each media folder, every directory below a
+        ``vendor_<date>`` folder and every cached route PDF become one entry
+        each. Items modified within ``min_age`` seconds are skipped, as they
+        may still be in use.
+
+        Args:
+            min_age: Minimum age in seconds for an untracked item to be indexed
+
+        Returns:
+            int: Number of entries added
+        """
+        candidates = []
+        for app_dir in ('employee', 'vendor'):
+            app_path = os.path.join(self.root, app_dir)
+            if not os.path.isdir(app_path):
+                continue
+            for name in os.listdir(app_path):
+                path = os.path.join(app_path, name)
+                if os.path.isfile(path):
+                    candidates.append((path, 'upload'))
+                elif name.startswith('vendor_'):
+                    candidates.extend((os.path.join(path, child), 'vendor_job') for child in os.listdir(path))
+                elif name == 'route_pdfs':
+                    candidates.extend((os.path.join(path, child), 'route_pdf') for child in os.listdir(path))
+
+        now = time.time()
+        added = 0
+        with self._locked() as entries:
+            for path, kind in candidates:
+                key = self._relative(path)
+                if key in entries:
+                    continue
+                try:
+                    modified = os.path.getmtime(path)
+                except OSError:
+                    continue
+                if now - modified < min_age:
+                    continue
+                entries[key] = {'kind': kind, 'size': _disk_usage(path), 'created': modified, 'last_access': modified}
+                added += 1
+            self._save()
+        logger.info(f"Media retention index rebuilt: {added} untracked items added")
+        return added
+
+    # Eviction
+
+    def plan(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Returns the entries that enforcement would remove, without removing them
+
+        Args:
+            now: Reference time (defaults to the current time)
+
+        Returns:
+            List[Dict[str, Any]]: ``path``, ``size`` and ``reason`` per entry
+        """
+        with self._locked() as entries:
+            return self._select(entries, now or time.time())
+
+    def _select(self, entries: Dict[str, Dict[str, Any]], now: float) -> List[Dict[str, Any]]:
+        """Picks the entries to evict from a loaded index (caller holds the lock)"""
+        victims = []
+        remaining = []
+        for key, entry in entries.items():
+            busy = any(expires > now for expires in entry.get('leases', {}).values()) \
+                or now - entry['last_access'] < MIN_IDLE_SECONDS
+            if busy:
+                remaining.append((key, entry))
+            elif not os.path.exists(os.path.join(self.root, key)):
+                victims.append({'path': key, 'size': 0, 'reason': 'missing'})
+            elif self.max_age and now - entry['created'] > self.max_age:
+                victims.append({'path': key, 'size': entry['size'], 'reason': 'age'})
+            else:
+                remaining.append((key, entry))
+
+        total = sum(entry['size'] for _, entry in remaining)
+        # Least recently used first; busy entries count towards the total but are never evicted
+        for key, entry in sorted(remaining, key=lambda item: item[1]['last_access']):
+            if not self.max_bytes or total <= self.max_bytes:
+                break
+            if entry.get('leases') or now - entry['last_access'] < MIN_IDLE_SECONDS:
+                continue
+            victims.append({'path': key, 'size': entry['size'], 'reason': 'size'})
+            total -= entry['size']
+        return victims
+
+    def enforce(self, dry_run: bool = False) -> List[Dict[str, Any]]:
+        """
+        Removes expired and least recently used entries until the budget holds
+
+        Args:
+            dry_run: Only report what would be removed
+
+        Returns:
+            List[Dict[str, Any]]: Entries removed (or that would be removed)
+        """
+        # Victims are chosen and moved aside under the lock, so a touch or lease from another
+        # process either lands first (and keeps the entry) or finds it already gone
+        with self._locked() as entries:
+            victims = self._select(entries, time.time())
+            if dry_run or not victims:
+                return victims
+            for victim in victims:
+                entries.pop(victim['path'], None)
+                path = os.path.join(self.root, victim['path'])
+                if os.path.lexists(path):
+                    os.replace(path, os.path.join(self.root, f"{EVICTING_PREFIX}{uuid.uuid4().hex}"))
+                self._remove_empty_parents(os.path.dirname(path))
+            self._save()
+
+        # Deleting outside the lock keeps large removals from stalling other workers;
+        # this also finishes any removal a crashed process left behind
+        for name in os.listdir(self.root):
+            if not name.startswith(EVICTING_PREFIX):
+                continue
+            path = os.path.join(self.root, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass  # Removed by another process
+        for victim in victims:
+            MEDIA_EVICTIONS.inc(reason=victim['reason'])
+            MEDIA_EVICTED_BYTES.inc(victim['size'])
+        freed = sum(victim['size'] for victim in victims)
+        logger.info(f"Media retention evicted {len(victims)} entries ({freed / (1024 * 1024):.1f} MB)")
+        return victims
+
+    def _remove_empty_parents(self, directory: str) -> None:
+        """Drops folders left empty by an eviction, such as an old vendor_<date> folder"""
+        while directory.startswith(self.root) and directory != self.root:
+            if os.path.basename(directory) in ('employee', 'vendor'):
+                break
+            try:
+                os.rmdir(directory)
+            except OSError:
+                break
+            directory = os.path.dirname(directory)
+
+    def usage(self) -> Dict[str, Any]:
+        """Returns tracked entry count and bytes per kind"""
+        with self._locked() as index:
+            entries = list(index.values())
+        by_kind: Dict[str, Dict[str, int]] = {}
+        for entry in entries:
+            totals = by_kind.setdefault(entry['kind'], {'entries': 0, 'bytes': 0})
+            totals['entries'] += 1
+            totals['bytes'] += entry['size']
+        return {'entries': len(entries), 'bytes': sum(e['size'] for e in entries), 'by_kind': by_kind}
+
+    # Background worker
+
+    def schedule(self) -> None:
+        """Wakes the background evictor, starting it on first use"""
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='media-retention', daemon=True)
+                self._worker.start()
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.enforce()
+            except Exception as e:
+                logger.error(f"Media retention pass failed: {e}", exc_info=True)
+
+
+_manager: Optional[MediaRetentionManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_retention_manager() -> MediaRetentionManager:
+    """Returns the process-wide manager configured from settings"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = MediaRetentionManager(
+                root=settings.MEDIA_ROOT,
+                max_age=settings.MEDIA_RETENTION_MAX_AGE_DAYS * 86400,
+                max_bytes=settings.MEDIA_RETENTION_MAX_BYTES,
+                interval=settings.MEDIA_RETENTION_INTERVAL,
+            )
+        return _manager
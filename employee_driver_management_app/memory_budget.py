@@ -0,0 +1,258 @@
+"""
+Upload memory guardrails.
+
+A compact xlsx can expand many times over once pandas holds its text cells
+as Python objects. :func:`estimate_footprint` reads only the first
+``SAMPLE_ROWS`` rows, measures their in-memory size and scales it to the
+file's row count, so an oversized upload is rejected before it is parsed.
+:class:`PeakMemory` measures what the parse actually allocated.
+"""
+import logging
+import posixpath
+import threading
+import tracemalloc
+import zipfile
+from typing import Any, Dict, List, Optional
+from xml.etree import ElementTree
+
+from django.conf import settings
+
+from .column_projection import ColumnProjection
+from .metrics import UPLOAD_PEAK_BYTES
+from .sheet_ingest import _resolve_sheets
+
+logger = logging.getLogger('django')
+
+# Rows read to estimate the size of one row
+SAMPLE_ROWS = 2000
+
+# Bytes read at a time when counting CSV lines or sheet XML rows
+COUNT_CHUNK = 1024 * 1024
+
+_MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_REL_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+_PACKAGE_RELS_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+class MemoryBudgetExceeded(ValueError):
+    """Raised when an upload is estimated to need more memory than the dataset budget"""
+    pass
+
+
+def _mb(size: float) -> str:
+    return f"{size / (1024 * 1024):.1f}MB"
+
+
+def _count_csv_rows(file_path: str) -> int:
+    """Counts data rows by scanning for newlines, without parsing the file"""
+    lines = 0
+    last = b'\n'
+    with open(file_path, 'rb') as csv_file:
+        while chunk := csv_file.read(COUNT_CHUNK):
+            lines += chunk.count(b'\n')
+            last = chunk[-1:]
+    if last != b'\n':
+        lines += 1  # Last line without a trailing newline
+    return max(lines - 1, 0)  # Minus the header
+
+
+def _sheet_paths(archive: zipfile.ZipFile) -> Dict[str, str]:
+    """Maps sheet names to their XML part in an .xlsx archive"""
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    relations = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {
+        relation.get('Id'): relation.get('Target') for relation in relations.iter(f'{_PACKAGE_RELS_NS}Relationship')
+    }
+    paths = {}
+    for sheet in workbook.iter(f'{_MAIN_NS}sheet'):
+        target = targets[sheet.get(_REL_ID)]
+        paths[sheet.get('name')] = target.lstrip('/') if target.startswith('/') else posixpath.join('xl', target)
+    return paths
+
+
+def _count_sheet_rows(sheet_xml, limit: Optional[int] = None) -> int:
+    """
+    Counts rows holding a value by scanning a sheet's raw XML
+
+    The sheet's dimension record can't be trusted: formatted but empty
+    trailing rows inflate it, and writers may leave it at ``A1``. Scanning
+    the bytes for ``<row>`` elements with a ``<v>`` or inline ``<is>`` value
+    skips those rows without parsing the XML or building cells.
+
+    Args:
+        sheet_xml: The sheet part, opened from the archive
+        limit: Stop counting once this many rows were seen
+
+    Returns:
+        int: Non-empty rows, header included (at most ``limit + 1``)
+    """
+    rows = 0
+    carry = b''
+    while chunk := sheet_xml.read(COUNT_CHUNK):
+        *complete, carry = (carry + chunk).split(b'</row>')
+        rows += sum(1 for row in complete if b'<v>' in row or b'<v ' in row or b'<is>' in row)
+        if limit is not None and rows > limit:
+            break
+    return rows
+
+
+def _excel_row_counts(file_path: str, workbook, names: List[str], limit: Optional[int] = None) -> Dict[str, int]:
+    """
+    Data rows per sheet of an open ``pd.ExcelFile``
+
+    Args:
+        file_path: Path to the workbook, whose .xlsx archive is scanned
+        workbook: The open workbook
+        names: Sheets to count
+        limit: Data rows past which counting a sheet can stop, because the upload is over budget anyway
+
+    Returns:
+        Dict[str, int]: Data rows (header excluded) per sheet
+    """
+    book = workbook.book
+    if hasattr(book, 'sheet_by_name'):  # xlrd (.xls) records the real row count
+        return {name: max(book.sheet_by_name(name).nrows - 1, 0) for name in names}
+
+    counts = {}
+    with zipfile.ZipFile(file_path) as archive:
+        paths = _sheet_paths(archive)
+        for name in names:
+            with archive.open(paths[name]) as sheet_xml:
+                rows = _count_sheet_rows(sheet_xml, None if limit is None else limit + 1)
+            counts[name] = max(rows - 1, 0)
+    return counts
+
+
+def estimate_footprint(file_path: str, sheets: Optional[List[str]] = None, sample_rows: int = SAMPLE_ROWS,
+                       projection: Optional[ColumnProjection] = None, budget: int = 0) -> Dict[str, Any]:
+    """
+    Estimates the DataFrame memory an upload will need from a sample of its rows
+
+    Args:
+        file_path: Path to the .csv/.xlsx/.xls upload
+        sheets: Workbook sheets that will be ingested; None means all of them
+        sample_rows: Rows read per sheet to measure the size of a row
+        projection: Columns the parse will keep, so only those are measured
+        budget: Bytes allowed, if any; workbook rows are only counted until the budget is exceeded
+
+    Returns:
+        Dict[str, Any]: total_rows, sampled_rows, bytes_per_row, estimated_bytes and
+        rows_capped (counting stopped early; total_rows is a lower bound)
+    """
+    import pandas as pd
+
+    def usecols(header):
+        return projection.usecols(header) if projection is not None else None
+
+    def measure(samples):
+        sampled_rows = sum(len(sample) for sample in samples)
+        sampled_bytes = sum(int(sample.memory_usage(deep=True).sum()) for sample in samples)
+        return sampled_rows, sampled_bytes / sampled_rows if sampled_rows else 0
+
+    if file_path.endswith('.csv'):
+        header = pd.read_csv(file_path, nrows=0, encoding='utf-8').columns
+        sampled_rows, bytes_per_row = measure([
+            pd.read_csv(file_path, nrows=sample_rows, encoding='utf-8', low_memory=False, usecols=usecols(header))
+        ])
+        total_rows = _count_csv_rows(file_path)
+        rows_capped = False
+    else:
+        with pd.ExcelFile(file_path) as workbook:
+            names = _resolve_sheets(workbook.sheet_names, sheets)
+            samples = []
+            for name in names:
+                header = workbook.parse(name, nrows=0).columns
+                samples.append(workbook.parse(name, nrows=sample_rows, usecols=usecols(header)))
+            sampled_rows, bytes_per_row = measure(samples)
+            limit = int(budget // bytes_per_row) + 1 if budget and bytes_per_row else None
+            row_counts = _excel_row_counts(file_path, workbook, names, limit)
+            total_rows = sum(row_counts.values())
+            rows_capped = limit is not None and any(count > limit for count in row_counts.values())
+    return {
+        'total_rows': total_rows,
+        'rows_capped': rows_capped,
+        'sampled_rows': sampled_rows,
+        'bytes_per_row': round(bytes_per_row),
+        'estimated_bytes': int(bytes_per_row * total_rows),
+    }
+
+
+def check_memory_budget(file_path: str, sheets: Optional[List[str]] = None, budget: Optional[int] = None,
+                        projection: Optional[ColumnProjection] = None) -> Dict[str, Any]:
+    """
+    Rejects an upload whose estimated footprint exceeds the per-dataset budget
+
+    Args:
+        file_path: Path to the upload
+        sheets: Workbook sheets that will be ingested
+        budget: Bytes allowed per dataset; defaults to ``settings.DATASET_MEMORY_BUDGET`` (0 disables the check)
+        projection: Columns the parse will keep
+
+    Returns:
+        Dict[str, Any]: The estimate, with ``budget_bytes`` added
+
+    Raises:
+        MemoryBudgetExceeded: If the estimate is over budget
+    """
+    budget = settings.DATASET_MEMORY_BUDGET if budget is None else budget
+    estimate = estimate_footprint(file_path, sheets, projection=projection, budget=budget)
+    estimate['budget_bytes'] = budget
+    at_least = 'at least ' if estimate['rows_capped'] else ''
+    logger.info(
+        f"Memory estimate for {file_path}: {at_least}{estimate['total_rows']} rows x {estimate['bytes_per_row']} "
+        f"bytes = {_mb(estimate['estimated_bytes'])} (budget {_mb(budget) if budget else 'unlimited'})"
+    )
+    if budget and estimate['estimated_bytes'] > budget:
+        raise MemoryBudgetExceeded(
+            f"This file would need {at_least or 'about '}{_mb(estimate['estimated_bytes'])} of memory once loaded "
+            f"({at_least}{estimate['total_rows']} rows), over the {_mb(budget)} limit per upload. "
+            f"Split it into smaller files or upload only the sheets you need."
+        )
+    return estimate
+
+
+class PeakMemory:
+    """
+    Measures the peak memory allocated inside a ``with`` block with tracemalloc
+
+    tracemalloc keeps one peak for the whole process, so only one block is
+    measured at a time: a block entered while another is being measured
+    runs unmeasured (``peak_bytes`` stays None) instead of resetting the
+    other's peak. A measured peak can still include allocations of such
+    concurrent, unmeasured uploads.
+    """
+
+    # Held by the block being measured
+    _measuring = threading.Lock()
+
+    def __init__(self, label: str, app: str):
+        self.label = label
+        self.app = app
+        self.peak_bytes: Optional[int] = None
+        self._measured = False
+        self._started_tracing = False
+
+    def __enter__(self) -> 'PeakMemory':
+        self._measured = self._measuring.acquire(blocking=False)
+        if not self._measured:
+            logger.info(f"Peak memory for {self.label} not measured: another upload is being measured")
+            return self
+        # Tracing started elsewhere (e.g. ``python -X tracemalloc``) is left running afterwards
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        self._baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if not self._measured:
+            return
+        try:
+            self.peak_bytes = max(tracemalloc.get_traced_memory()[1] - self._baseline, 0)
+            if self._started_tracing:
+                tracemalloc.stop()
+        finally:
+            self._measuring.release()
+        UPLOAD_PEAK_BYTES.observe(self.peak_bytes, app=self.app)
+        logger.info(f"Peak memory for {self.label}: {_mb(self.peak_bytes)}{' (failed)' if exc_type else ''}")
@@ -0,0 +1,204 @@
+import bisect
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpRequest, HttpResponse
+
+# Prometheus text exposition format version served by the /metrics endpoint
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Latency buckets (seconds) wide enough for search keystrokes and whole SMTP batches
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+SIZE_BUCKETS = tuple(float(2 ** power * 1024 ** 2) for power in range(0, 13))  # 1MB .. 4GB
+
+
+def _label_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key: Tuple[Tuple[str, str], ...], extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[Tuple[Tuple[str, str], ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(key)} {value}')
+        return lines
+
+
+class Histogram:
+    """Cumulative bucket histogram with optional labels"""
+
+    def __init__(self, name: str, documentation: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple[Tuple[str, str], ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def totals(self, **labels: str) -> Tuple[int, float]:
+        """Returns (count, sum) of the observations for one label set"""
+        with self._lock:
+            series = self._series.get(_label_key(labels))
+            if series is None:
+                return 0, 0.0
+            return sum(series[0]), series[1]
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{_format_labels(key, [("le", repr(bound))])} {cumulative}')
+                cumulative += counts[-1]
+                lines.append(f'{self.name}_bucket{_format_labels(key, [("le", "+Inf")])} {cumulative}')
+                lines.append(f'{self.name}_sum{_format_labels(key)} {total}')
+                lines.append(f'{self.name}_count{_format_labels(key)} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """In-process metric store rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        metric = Counter(name, documentation)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_LATENCY = REGISTRY.histogram('http_request_duration_seconds', 'Request latency by URL name')
+REQUESTS = REGISTRY.counter('http_requests_total', 'Requests by URL name, method and status')
+RESPONSE_BYTES = REGISTRY.counter('http_response_bytes_total', 'Response body bytes by URL name')
+EMAILS_SENT = REGISTRY.counter('emails_sent_total', 'Emails handed to the mail transport (SMTP server or spool)')
+EMAILS_FAILED = REGISTRY.counter('emails_failed_total', 'Emails that could not be sent')
+EMAIL_SEND_SECONDS = REGISTRY.histogram('email_send_duration_seconds', 'Time to build and deliver one email')
+EMAIL_DELIVERY_SECONDS = REGISTRY.histogram('email_delivery_duration_seconds',
+                                            'Time to hand one built email to the transport')
+IMAGES_RENDERED = REGISTRY.counter('images_rendered_total', 'Route table images written to disk')
+IMAGE_RENDER_SECONDS = REGISTRY.histogram('image_render_duration_seconds', 'Time to render one route table image')
+ROUTE_PDFS = REGISTRY.counter('route_pdfs_total', 'Vendor route PDF bundles attached, by cache result (hit or render)')
+ROUTE_PDF_RENDER_SECONDS = REGISTRY.histogram('route_pdf_render_duration_seconds', 'Time to render one vendor route PDF')
+MEDIA_EVICTIONS = REGISTRY.counter('media_evictions_total', 'Media entries removed by retention, by reason')
+MEDIA_EVICTED_BYTES = REGISTRY.counter('media_evicted_bytes_total', 'Bytes freed by media retention')
+LOG_RECORDS_DROPPED = REGISTRY.counter('log_records_dropped_total', 'Log records dropped because the log queue was full')
+UPLOAD_PEAK_BYTES = REGISTRY.histogram('upload_peak_memory_bytes', 'Peak memory allocated while parsing one upload',
+                                       SIZE_BUCKETS)
+
+
+class RequestMetricsMiddleware:
+    """Records latency, status and response size for every request, keyed by URL name"""
+
+    # Runs natively under both WSGI and ASGI, so async views aren't pushed through a thread
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self.async_mode:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        return self.record(request, self.get_response(request), started)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        started = time.perf_counter()
+        return self.record(request, await self.get_response(request), started)
+
+    def record(self, request: HttpRequest, response: HttpResponse, started: float) -> HttpResponse:
+        """Counts the response and times it, after the body for streamed responses"""
+        match = getattr(request, 'resolver_match', None)
+        view = (match.url_name or match.view_name) if match else 'unmatched'
+        REQUESTS.inc(view=view, method=request.method, status=str(response.status_code))
+
+        if response.streaming:
+            # Latency and size are only known once the body has been consumed
+            if response.is_async:
+                response.streaming_content = self._observe_async_stream(response.streaming_content, view, started)
+            else:
+                response.streaming_content = self._observe_stream(response.streaming_content, view, started)
+        else:
+            REQUEST_LATENCY.observe(time.perf_counter() - started, view=view)
+            RESPONSE_BYTES.inc(len(response.content), view=view)
+        return response
+
+    @staticmethod
+    def _observe_stream(content, view: str, started: float):
+        size = 0
+        try:
+            for chunk in content:
+                size += len(chunk)
+                yield chunk
+        finally:
+            REQUEST_LATENCY.observe(time.perf_counter() - started, view=view)
+            RESPONSE_BYTES.inc(size, view=view)
+
+    @staticmethod
+    async def _observe_async_stream(content, view: str, started: float):
+        size = 0
+        try:
+            async for chunk in content:
+                size += len(chunk)
+                yield chunk
+        finally:
+            REQUEST_LATENCY.observe(time.perf_counter() - started, view=view)
+            RESPONSE_BYTES.inc(size, view=view)
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """Exposes the metrics of this worker process in the Prometheus text format"""
+    return HttpResponse(REGISTRY.render(), content_type=CONTENT_TYPE)
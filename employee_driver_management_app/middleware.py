@@ -1,8 +1,11 @@
+import ipaddress
 import logging
 import os
+import threading
+import time
 import environ
 import subprocess
-from django.http import HttpResponseForbidden
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.shortcuts import render
 
 # Load environment variables
@@ -13,59 +16,177 @@ environ.Env.read_env(env_file=os.path.join(os.path.dirname(os.path.dirname(__fil
 ALLOWED_HOSTS = env.list("ALLOWED_HOSTS", default=[])
 ALLOWED_SSIDS = env.list("ALLOWED_SSIDS", default=[])
 
+# "ssid" checks the server's WiFi network, "cidr" checks the client IP against ALLOWED_NETWORKS
+NETWORK_ACCESS_MODE = env.str("NETWORK_ACCESS_MODE", default="ssid").lower()
+ALLOWED_NETWORKS = env.list("ALLOWED_NETWORKS", default=[])
+TRUST_X_FORWARDED_FOR = env.bool("TRUST_X_FORWARDED_FOR", default=False)
+# Reverse proxies in front of the app that each append one X-Forwarded-For entry
+TRUSTED_PROXY_COUNT = env.int("TRUSTED_PROXY_COUNT", default=1)
+
+# Seconds a detected SSID stays valid before a background refresh is started
+SSID_CACHE_TTL = env.int("SSID_CACHE_TTL", default=60)
+
 logger = logging.getLogger(__name__)
 
+
+def detect_ssid():
+    """Get the current connected WiFi SSID (Windows & Linux/macOS)"""
+    try:
+        if os.name == "nt":  # Windows
+            output = subprocess.check_output(["netsh", "wlan", "show", "interfaces"], timeout=5).decode(errors="ignore")
+            for line in output.split("\n"):
+                if "SSID" in line and "BSSID" not in line:
+                    return line.split(": ", 1)[1].strip()
+
+        else:  # Linux/macOS
+            try:
+                output = subprocess.check_output(["iwgetid", "-r"], timeout=5).decode(errors="ignore").strip()
+                if output:
+                    return output  # ✅ Primary method works
+
+                # 🔄 Fallback: Check `/proc/net/wireless`
+                with open("/proc/net/wireless") as f:
+                    lines = f.readlines()
+                    if len(lines) > 2:
+                        return lines[2].split()[0].strip(":")
+            except FileNotFoundError:
+                logger.error("Command `iwgetid` not found. Install `wireless-tools` package.")
+                return None  # Explicitly return if command is missing
+
+    except Exception as e:
+        logger.error(f"Failed to get WiFi SSID: {e}")
+        return None  # ❌ Return None if SSID retrieval fails
+
+    else:
+        logger.info("No SSID found.")
+        return None  # ⬅ Explicitly return None in the `else` block
+
+
+class SSIDCache:
+    """Process-wide SSID value refreshed in a background thread once it is older than the TTL"""
+
+    def __init__(self, ttl, detector=detect_ssid):
+        self.ttl = ttl
+        self.detector = detector
+        self._value = None
+        self._expires_at = 0.0
+        self._loaded = False
+        self._refreshing = False
+        self._lock = threading.Lock()
+        # Held for the whole first probe, so callers arriving meanwhile wait for its result
+        self._first_load = threading.Lock()
+
+    def _refresh(self):
+        try:
+            value = self.detector()
+            with self._lock:
+                if value != self._value:
+                    logger.info(f"Detected SSID changed: {self._value} -> {value}")
+                self._value = value
+                self._expires_at = time.monotonic() + self.ttl
+                self._loaded = True
+        finally:
+            # A failed probe must not stop later refreshes
+            with self._lock:
+                self._refreshing = False
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def get(self):
+        """Return the cached SSID, probing synchronously (once, for every waiting caller) until it is loaded"""
+        if not self._loaded:
+            with self._first_load:
+                if not self._loaded:
+                    self._refresh()
+            return self._value
+
+        if time.monotonic() >= self._expires_at:
+            with self._lock:
+                start_refresh = not self._refreshing
+                self._refreshing = True
+            if start_refresh:
+                # Serve the last known value while the probe runs
+                threading.Thread(target=self._refresh, name="ssid-refresh", daemon=True).start()
+
+        return self._value
+
+
+ssid_cache = SSIDCache(SSID_CACHE_TTL)
+
+
 class IPWhitelistMiddleware:
+    # Runs natively under both WSGI and ASGI, so async views aren't pushed through a thread
+    async_capable = True
+    sync_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.mode = NETWORK_ACCESS_MODE
+        self.allowed_ssids = frozenset(ALLOWED_SSIDS)
+        self.allowed_networks = [ipaddress.ip_network(network, strict=False) for network in ALLOWED_NETWORKS]
+
+        logger.info(f"Network access mode: {self.mode} (SSIDs: {ALLOWED_SSIDS}, networks: {ALLOWED_NETWORKS})")
 
     def __call__(self, request):
-        current_ssid = self.get_current_ssid()
-        
-        # Debugging: Print loaded SSIDs
-        print(f"Loaded ALLOWED_SSIDS: {ALLOWED_SSIDS}")
-        print(f"Detected SSID: {current_ssid}")
+        if self.async_mode:
+            return self.__acall__(request)
+        forbidden = self.check_access(request)
+        return forbidden if forbidden is not None else self.get_response(request)
+
+    async def __acall__(self, request):
+        if self.mode != "cidr" and not ssid_cache.loaded:
+            # The first probe runs a subprocess; keep it off the event loop
+            await sync_to_async(ssid_cache.get, thread_sensitive=False)()
+        forbidden = self.check_access(request)
+        return forbidden if forbidden is not None else await self.get_response(request)
+
+    def check_access(self, request):
+        """Return the 403 response for a disallowed request, or None to let it through"""
+        if self.mode == "cidr":
+            client_ip = self.get_client_ip(request)
+            if self.is_ip_allowed(client_ip):
+                return None
+
+            logger.warning(f"Unauthorized access attempt (client IP: {client_ip})")
+            return self.custom_forbidden_response(request)
+
+        current_ssid = ssid_cache.get()
 
         # ✅ Allow if connected to the allowed WiFi SSID
-        if current_ssid and current_ssid in ALLOWED_SSIDS:
-            return self.get_response(request)
+        if current_ssid and current_ssid in self.allowed_ssids:
+            return None
 
         # ❌ Block access otherwise
         logger.warning(f"Unauthorized access attempt (SSID: {current_ssid})")
         return self.custom_forbidden_response(request)
 
-    def get_current_ssid(self):
-        """Get the current connected WiFi SSID (Windows & Linux/macOS)"""
+    def get_client_ip(self, request):
+        """Client address, taken from X-Forwarded-For only when a trusted proxy sets it"""
+        if TRUST_X_FORWARDED_FOR and TRUSTED_PROXY_COUNT > 0:
+            forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
+            if forwarded_for:
+                hops = [hop.strip() for hop in forwarded_for.split(",")]
+                # Entries left of the ones our proxies appended are whatever the client sent
+                if len(hops) >= TRUSTED_PROXY_COUNT:
+                    return hops[-TRUSTED_PROXY_COUNT]
+        return request.META.get("REMOTE_ADDR", "")
+
+    def is_ip_allowed(self, client_ip):
+        """Match the client address against the precompiled allow-list"""
         try:
-            if os.name == "nt":  # Windows
-                output = subprocess.check_output("netsh wlan show interfaces", shell=True).decode(errors="ignore")
-                for line in output.split("\n"):
-                    if "SSID" in line and "BSSID" not in line:
-                        return line.split(": ", 1)[1].strip()
-
-            else:  # Linux/macOS
-                try:
-                    output = subprocess.check_output("iwgetid -r", shell=True).decode(errors="ignore").strip()
-                    if output:
-                        return output  # ✅ Primary method works
-
-                    # 🔄 Fallback: Check `/proc/net/wireless`
-                    with open("/proc/net/wireless") as f:
-                        lines = f.readlines()
-                        if len(lines) > 2:
-                            return lines[2].split()[0].strip(":")
-                except FileNotFoundError:
-                    logger.error("Command `iwgetid` not found. Install `wireless-tools` package.")
-                    return None  # Explicitly return if command is missing
-
-        except Exception as e:
-            logger.error(f"Failed to get WiFi SSID: {e}")
-            return None  # ❌ Return None if SSID retrieval fails
-
-        else:  
-            logger.info("No SSID found.")  
-            return None  # ⬅ Explicitly return None in the `else` block
+            address = ipaddress.ip_address(client_ip)
+        except ValueError:
+            return False
+        return any(address in network for network in self.allowed_networks)
 
+    def get_current_ssid(self):
+        """Get the current connected WiFi SSID from the shared cache"""
+        return ssid_cache.get()
 
     def custom_forbidden_response(self, request):
         """Render a custom 403 Forbidden page"""
@@ -0,0 +1,239 @@
+import cProfile
+import functools
+import hmac
+import io
+import logging
+import os
+import pstats
+import threading
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+logger = logging.getLogger('django')
+
+# Request header carrying PROFILING_TOKEN, e.g. ``X-Profile-Request: <token>``
+PROFILE_HEADER = 'HTTP_X_PROFILE_REQUEST'
+
+# Query flag honoured for authenticated staff users, e.g. ``?_profile=1``
+PROFILE_QUERY_PARAM = '_profile'
+
+# Number of functions listed in the saved summary
+SUMMARY_LIMIT = 40
+
+
+class RequestProfile:
+    """
+    Profile of one request: the profiler on the request's own thread plus
+    those of pool work submitted through :func:`profiled_call`
+    """
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self._workers: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def add_worker(self, profiler: cProfile.Profile) -> None:
+        with self._lock:
+            self._workers.append(profiler)
+
+    def stats(self, stream: io.StringIO) -> pstats.Stats:
+        """Combined stats; worker time overlaps the request thread's, so totals can exceed wall time"""
+        stats = pstats.Stats(self.profiler, stream=stream)
+        with self._lock:
+            workers = list(self._workers)
+        if workers:
+            stats.add(*workers)
+        return stats
+
+
+# Profile of the request being profiled in the current thread or task
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar('request_profile', default=None)
+
+
+def _enable(profiler: cProfile.Profile) -> bool:
+    """
+    Starts a profiler, or returns False when the interpreter refuses
+
+    Python 3.12+ allows a single active profiler per interpreter (it raises
+    ValueError for a second one, e.g. a debugger, coverage or another
+    request's profiler); profiling must never fail the request.
+    """
+    try:
+        profiler.enable()
+    except ValueError:
+        return False
+    return True
+
+
+def profiled_call(func: Callable) -> Callable:
+    """
+    Wraps a callable about to be handed to a thread pool so that, when the
+    submitting request is being profiled, the worker's time is added to it.
+    Up to Python 3.11 cProfile only sees the thread that enabled it, so the
+    worker runs its own profiler that is merged into the request's. From
+    3.12 on that second profiler is refused, and the request's profiler
+    (built on ``sys.monitoring``) already receives the worker's events, so
+    the call simply runs as is.
+
+    Args:
+        func: Callable run on another thread
+
+    Returns:
+        Callable: ``func`` itself when no profile is active
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        return func
+
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        profiler = cProfile.Profile()
+        # Work the callable submits to further pools is attributed to the same request
+        token = _current_profile.set(profile)
+        enabled = _enable(profiler)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_profile.reset(token)
+            if enabled:
+                profiler.disable()
+                profile.add_worker(profiler)
+    return run
+
+
+class ProfilingMiddleware:
+    """
+    Captures a cProfile of a single request when explicitly asked to.
+
+    Profiling is triggered by the ``X-Profile-Request`` header matching
+    ``settings.PROFILING_TOKEN`` or by ``?_profile=1`` from a staff user.
+    The raw profile and a text summary of the hottest functions are written
+    to ``settings.PROFILES_DIR``. Untriggered requests only pay for two
+    dictionary lookups.
+
+    Up to Python 3.11 cProfile only sees the thread that enables it. Pool
+    work goes through :func:`profiled_call` (``run_blocking`` and sheet
+    parsing) and is merged in; anything else on other threads is not
+    profiled, including sync views that ASGI runs on asgiref's thread. When
+    the interpreter refuses to start the profiler (another one is active on
+    3.12+), the request is served unprofiled.
+    """
+
+    # Only one profiler can be active per interpreter at a time
+    _active = threading.Lock()
+
+    # Runs natively under both WSGI and ASGI, so async views aren't pushed through a thread
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.token = getattr(settings, 'PROFILING_TOKEN', '')
+        self.profiles_dir = getattr(settings, 'PROFILES_DIR', os.path.join('logs', 'profiles'))
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        if not self._active.acquire(blocking=False):
+            logger.warning(f"Profiling skipped for {request.path}: another request is being profiled")
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        if not _enable(profile.profiler):
+            self._active.release()
+            logger.warning(f"Profiling skipped for {request.path}: another profiler is active")
+            return self.get_response(request)
+
+        token = _current_profile.set(profile)
+        try:
+            try:
+                response = self.get_response(request)
+            finally:
+                profile.profiler.disable()
+        finally:
+            _current_profile.reset(token)
+            self._active.release()
+
+        profile_id = self.save_profile(profile, request)
+        response['X-Profile-Id'] = profile_id
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        if not self.should_profile(request):
+            return await self.get_response(request)
+
+        if not self._active.acquire(blocking=False):
+            logger.warning(f"Profiling skipped for {request.path}: another request is being profiled")
+            return await self.get_response(request)
+
+        # Profiles the event-loop thread, including other requests' coroutines that run meanwhile
+        profile = RequestProfile()
+        if not _enable(profile.profiler):
+            self._active.release()
+            logger.warning(f"Profiling skipped for {request.path}: another profiler is active")
+            return await self.get_response(request)
+
+        token = _current_profile.set(profile)
+        try:
+            try:
+                response = await self.get_response(request)
+            finally:
+                profile.profiler.disable()
+        finally:
+            _current_profile.reset(token)
+            self._active.release()
+
+        response['X-Profile-Id'] = await sync_to_async(self.save_profile, thread_sensitive=False)(profile, request)
+        return response
+
+    def should_profile(self, request: HttpRequest) -> bool:
+        """Checks the trigger header first, then the staff-only query flag"""
+        supplied = request.META.get(PROFILE_HEADER)
+        if self.token and supplied and hmac.compare_digest(supplied.encode(), self.token.encode()):
+            return True
+
+        if PROFILE_QUERY_PARAM not in request.META.get('QUERY_STRING', ''):
+            return False
+        user = getattr(request, 'user', None)
+        return bool(request.GET.get(PROFILE_QUERY_PARAM)) and user is not None and user.is_staff
+
+    def save_profile(self, profile: RequestProfile, request: HttpRequest) -> str:
+        """
+        Writes the raw profile and a summary sorted by cumulative time
+
+        Args:
+            profile: Finished request profile
+            request: The profiled request
+
+        Returns:
+            str: Identifier shared by the saved ``.prof`` and ``.txt`` files
+        """
+        match = getattr(request, 'resolver_match', None)
+        view = (match.url_name if match else None) or 'unmatched'
+        profile_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}_{view}"
+
+        os.makedirs(self.profiles_dir, exist_ok=True)
+        base_path = os.path.join(self.profiles_dir, profile_id)
+        summary = io.StringIO()
+        summary.write(f"{request.method} {request.get_full_path()}\n\n")
+        stats = profile.stats(summary)
+        stats.dump_stats(f"{base_path}.prof")
+        stats.strip_dirs()
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(SUMMARY_LIMIT)
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(SUMMARY_LIMIT)
+        with open(f"{base_path}.txt", 'w') as summary_file:
+            summary_file.write(summary.getvalue())
+
+        logger.info(f"Saved request profile {base_path}.prof ({stats.total_tt:.3f}s profiled)")
+        return profile_id
@@ -0,0 +1,295 @@
+"""
+Progress channels for long-running send jobs, served as Server-Sent Events.
+
+The page generates a ``job_id``, opens ``/progress/<job_id>`` with an
+EventSource and passes the same id in the send payload. The send loop
+publishes events through a :class:`ProgressReporter`, which appends them as
+JSON lines to ``settings.PROGRESS_DIR/<job_id>.jsonl``. Streams tail that
+file, so the stream and the send can be served by different worker
+processes.
+
+Only the send creates a channel, as its first step before the session's
+rows are loaded. A stream for a job that hasn't started within
+``JOB_START_SECONDS`` gets a 404, which makes EventSource give up instead
+of reconnecting. A stream ends when the job publishes ``done`` or
+stops writing for ``IDLE_TIMEOUT`` (e.g. its worker died). Under WSGI an open
+stream still occupies a worker thread for as long as the job runs, so use
+threaded workers or ``ASYNC_VIEWS`` for many concurrent sends.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.http import Http404, HttpRequest, HttpResponse, StreamingHttpResponse
+
+logger = logging.getLogger('django')
+
+# Client-generated job ids: letters, digits, '-' and '_'
+JOB_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+
+# Channel files kept before the oldest ones are deleted, and the age at which any is deleted
+MAX_CHANNELS = 256
+CHANNEL_TTL = 24 * 3600
+
+# Seconds a stream waits for its job's channel to appear; the page opens it just before posting the send
+JOB_START_SECONDS = 5
+
+# Seconds between reads of the channel file
+POLL_INTERVAL = 0.25
+
+# Seconds without events after which the stream sends a keep-alive comment
+HEARTBEAT_SECONDS = 15
+
+# Seconds without any event after which the job is presumed dead and the stream ends
+IDLE_TIMEOUT = 300
+
+# Hard limit on how long one stream stays open
+STREAM_TIMEOUT = 3600
+
+
+class ProgressChannel:
+    """Writer side of one job's event file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._sequence = 0
+        with open(path, 'w', encoding='utf-8'):
+            pass  # Created (or emptied) before the first event, so streams can find the job
+
+    def publish(self, event: str, data: Dict[str, Any]) -> None:
+        self._sequence += 1
+        line = json.dumps([self._sequence, event, data], default=str)
+        # One append per event; readers only consume complete lines
+        with open(self.path, 'a', encoding='utf-8') as channel_file:
+            channel_file.write(line + '\n')
+
+
+class ProgressTail:
+    """Reader side of one job's event file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._offset = 0
+        self.finished = False
+
+    def read(self) -> List[Tuple[int, str, Dict[str, Any]]]:
+        """Returns events written since the last read"""
+        try:
+            with open(self.path, 'rb') as channel_file:
+                channel_file.seek(self._offset)
+                chunk = channel_file.read()
+        except FileNotFoundError:
+            self.finished = True  # Deleted by cleanup; nothing more will arrive
+            return []
+        complete = chunk[:chunk.rfind(b'\n') + 1]
+        self._offset += len(complete)
+        events = []
+        for line in complete.splitlines():
+            sequence, event, data = json.loads(line)
+            events.append((sequence, event, data))
+            if event == 'done':
+                self.finished = True
+        return events
+
+    def idle_seconds(self) -> float:
+        """Seconds since the job last wrote an event"""
+        try:
+            return time.time() - os.path.getmtime(self.path)
+        except FileNotFoundError:
+            return float('inf')
+
+
+class ProgressBroker:
+    """Creates and finds job channels in the shared progress directory"""
+
+    def __init__(self, directory: Optional[str] = None, max_channels: int = MAX_CHANNELS):
+        self._directory = directory
+        self.max_channels = max_channels
+
+    @property
+    def directory(self) -> str:
+        directory = self._directory or settings.PROGRESS_DIR
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.jsonl")
+
+    def channel(self, job_id: str) -> ProgressChannel:
+        """Creates the channel for a starting job"""
+        self._prune()
+        return ProgressChannel(self._path(job_id))
+
+    def tail(self, job_id: str) -> Optional[ProgressTail]:
+        """Returns a reader for a job, or None if no send created its channel"""
+        path = self._path(job_id)
+        return ProgressTail(path) if os.path.exists(path) else None
+
+    def reporter(self, job_id: Optional[str], total: int = 0) -> 'ProgressReporter':
+        """Returns a reporter for ``job_id``; an invalid or missing id gives a no-op reporter"""
+        if not job_id or not JOB_ID_PATTERN.match(str(job_id)):
+            return ProgressReporter(None, total)
+        try:
+            return ProgressReporter(self.channel(job_id), total)
+        except OSError as e:
+            logger.warning(f"Progress for job {job_id} not published: {e}")
+            return ProgressReporter(None, total)
+
+    def _prune(self) -> None:
+        """Deletes expired channels and the oldest ones beyond ``max_channels``"""
+        channels = []
+        for filename in os.listdir(self.directory):
+            try:
+                channels.append((os.path.getmtime(os.path.join(self.directory, filename)), filename))
+            except FileNotFoundError:
+                continue
+        channels.sort(reverse=True)
+        now = time.time()
+        for position, (modified, filename) in enumerate(channels):
+            if position >= self.max_channels - 1 or now - modified > CHANNEL_TTL:
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except FileNotFoundError:
+                    pass
+
+
+class ProgressReporter:
+    """Producer-side helper that tracks counts and throughput for one job"""
+
+    def __init__(self, channel: Optional[ProgressChannel], total: int = 0):
+        self.channel = channel
+        self.started = time.perf_counter()
+        self.stage_name = 'send'
+        self.total = total
+        self.done = 0
+        self.failed = 0
+
+    def stage(self, name: str, total: int) -> None:
+        """Starts a new phase (e.g. ``render`` then ``send``) with its own counters"""
+        self.stage_name = name
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+        self.publish('stage', stage=name, total=total)
+
+    def step(self, ok: bool = True, **data: Any) -> None:
+        """Records one finished item (a recipient, a route image) and publishes it"""
+        self.done += 1
+        if not ok:
+            self.failed += 1
+        if self.channel is None:
+            return
+        elapsed = time.perf_counter() - self.started
+        self.publish(
+            'progress', stage=self.stage_name, ok=ok, done=self.done, failed=self.failed, total=self.total,
+            rate=round(self.done / elapsed, 2) if elapsed else None, **data
+        )
+
+    def finish(self, **summary: Any) -> None:
+        """Publishes the final result and closes the stream"""
+        self.publish('done', **summary)
+
+    def publish(self, event: str, **data: Any) -> None:
+        if self.channel is None:
+            return
+        try:
+            self.channel.publish(event, data)
+        except OSError as e:
+            # Progress is best effort; never fail the send over it
+            logger.warning(f"Progress event '{event}' not published: {e}")
+
+
+PROGRESS = ProgressBroker()
+
+
+def _format_event(sequence: int, event: str, data: Dict[str, Any]) -> bytes:
+    return f"id: {sequence}\nevent: {event}\ndata: {json.dumps(data, default=str)}\n\n".encode('utf-8')
+
+
+def _stream_step(tail: ProgressTail, last_id: int, state: Dict[str, float]) -> Tuple[List[bytes], bool]:
+    """One poll of a stream: the frames to send and whether the stream is over"""
+    now = time.monotonic()
+    frames = [_format_event(*item) for item in tail.read() if item[0] > last_id]
+    if frames:
+        state['last_frame'] = now
+    if tail.finished:
+        return frames, True
+    if now >= state['deadline'] or tail.idle_seconds() > IDLE_TIMEOUT:
+        # A closing 'done' keeps EventSource from reconnecting to a job that will never finish
+        frames.append(_format_event(0, 'done', {'error': 'The job stopped reporting progress'}))
+        return frames, True
+    if not frames and now - state['last_frame'] >= HEARTBEAT_SECONDS:
+        state['last_frame'] = now
+        frames.append(b": keep-alive\n\n")
+    return frames, False
+
+
+def iter_events(tail: ProgressTail, last_id: int = 0) -> Iterator[bytes]:
+    """Yields SSE frames until the job publishes ``done``, goes idle or the stream times out"""
+    state = {'deadline': time.monotonic() + STREAM_TIMEOUT, 'last_frame': time.monotonic()}
+    yield b"retry: 2000\n\n"
+    while True:
+        frames, over = _stream_step(tail, last_id, state)
+        yield from frames
+        if over:
+            return
+        time.sleep(POLL_INTERVAL)
+
+
+async def aiter_events(tail: ProgressTail, last_id: int = 0) -> AsyncIterator[bytes]:
+    """Async counterpart of :func:`iter_events` that sleeps on the event loop instead of a thread"""
+    state = {'deadline': time.monotonic() + STREAM_TIMEOUT, 'last_frame': time.monotonic()}
+    yield b"retry: 2000\n\n"
+    while True:
+        frames, over = _stream_step(tail, last_id, state)
+        for frame in frames:
+            yield frame
+        if over:
+            return
+        await asyncio.sleep(POLL_INTERVAL)
+
+
+def _wait_for_job(job_id: str) -> Optional[ProgressTail]:
+    deadline = time.monotonic() + JOB_START_SECONDS
+    while True:
+        tail = PROGRESS.tail(job_id)
+        if tail is not None or time.monotonic() >= deadline:
+            return tail
+        time.sleep(POLL_INTERVAL)
+
+
+def progress_view(request: HttpRequest, job_id: str) -> HttpResponse:
+    """
+    Streams the progress events of one send job as ``text/event-stream``
+
+    Args:
+        request: The HTTP request object
+        job_id: Id the client passed in the send payload
+
+    Returns:
+        HttpResponse: StreamingHttpResponse of SSE frames
+
+    Raises:
+        Http404: If no send started the job within ``JOB_START_SECONDS``
+    """
+    tail = _wait_for_job(job_id) if JOB_ID_PATTERN.match(job_id) else None
+    if tail is None:
+        raise Http404("Unknown job")
+
+    # EventSource resends the last id it saw when it reconnects
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    last_id = int(last_event_id) if last_event_id.isdigit() else 0
+    events = aiter_events(tail, last_id) if settings.ASYNC_VIEWS else iter_events(tail, last_id)
+
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Ask reverse proxies not to buffer the stream
+    # GZipMiddleware skips responses that already declare an encoding; compressing would hold events back
+    response['Content-Encoding'] = 'identity'
+    return response
@@ -44,12 +44,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'employee_driver_management_app.metrics.RequestMetricsMiddleware',
     'employee_driver_management_app.middleware.IPWhitelistMiddleware',
+    'django.middleware.gzip.GZipMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'employee_driver_management_app.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -74,6 +77,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'employee_driver_management_app.wsgi.application'
 
+# Serve the send/search/sort/column endpoints as coroutines (enable when deployed under ASGI)
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "false").lower() == "true"
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
@@ -126,6 +132,33 @@ STATIC_URL = 'static/'
 MEDIA_URL = 'media/'  # URL to access media files in development
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media') 
 
+# Email spool written by EMAIL_TRANSPORT=spool and drained by `manage.py relay_mail`,
+# and the directory used by EMAIL_TRANSPORT=file (see mail_transports.py)
+EMAIL_SPOOL_DIR = os.getenv("EMAIL_SPOOL_DIR", os.path.join(BASE_DIR, "spool", "mail"))
+EMAIL_FILE_DIR = os.getenv("EMAIL_FILE_DIR", os.path.join(BASE_DIR, "spool", "sent"))
+
+# Send progress events, shared by every worker process (see progress.py)
+PROGRESS_DIR = os.getenv("PROGRESS_DIR", os.path.join(BASE_DIR, "spool", "progress"))
+
+# Media retention (see employee_driver_management_app/media_retention.py); 0 disables a limit
+MEDIA_RETENTION_MAX_AGE_DAYS = float(os.getenv("MEDIA_RETENTION_MAX_AGE_DAYS", 14))
+MEDIA_RETENTION_MAX_BYTES = int(os.getenv("MEDIA_RETENTION_MAX_BYTES", 2 * 1024 ** 3))
+MEDIA_RETENTION_INTERVAL = float(os.getenv("MEDIA_RETENTION_INTERVAL", 3600))  # Seconds between background passes
+
+# Estimated in-memory size allowed per uploaded dataset (see memory_budget.py); 0 disables the check
+DATASET_MEMORY_BUDGET = int(os.getenv("DATASET_MEMORY_BUDGET", 512 * 1024 ** 2))
+
+# Parsed datasets shared by all worker processes as memory-mapped Arrow files (see dataset_store.py).
+# Needs pyarrow; an empty value keeps datasets in the session.
+DATASET_STORE_DIR = os.getenv(
+    "DATASET_STORE_DIR",
+    "/dev/shm/gltm-datasets" if os.path.isdir("/dev/shm") else os.path.join(BASE_DIR, "spool", "datasets"),
+)
+# Bytes the store may hold (it lives in RAM), never more than half its filesystem; 0 means just that half
+DATASET_STORE_MAX_BYTES = int(os.getenv("DATASET_STORE_MAX_BYTES", 256 * 1024 ** 2))
+# Seconds after which a dataset reference nobody read is dropped
+DATASET_REFERENCE_TTL = int(os.getenv("DATASET_REFERENCE_TTL", 4 * 3600))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -142,6 +175,10 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 LOGS_DIR = os.path.join(BASE_DIR, "logs")
 os.makedirs(LOGS_DIR, exist_ok=True)  # ✅ Create logs directory if it doesn't exist
 
+# Per-request profiling (see employee_driver_management_app/profiling.py)
+PROFILES_DIR = os.path.join(LOGS_DIR, "profiles")
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")  # Empty disables the header trigger
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -156,6 +193,18 @@ LOGGING = {
             'format': '[{levelname}] {message}',
             'style': '{',
         },
+        'json': {  # One structured record per line
+            '()': 'employee_driver_management_app.log_pipeline.JsonFormatter',
+        },
+    },
+
+    # Filters: Sample and truncate bulky payload logs (warnings and errors always pass)
+    'filters': {
+        'payload_sampling': {
+            '()': 'employee_driver_management_app.log_pipeline.PayloadSamplingFilter',
+            'max_length': int(os.getenv("LOG_PAYLOAD_MAX_LENGTH", 2000)),
+            'sample_rate': int(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", 20)),
+        },
     },
 
     # Handlers: Define where logs should be stored
@@ -163,16 +212,24 @@ LOGGING = {
         'console': {
             'class': 'logging.StreamHandler',
             'formatter': 'simple',
+            'filters': ['payload_sampling'],
         },
+        # File handlers enqueue records; a listener thread formats, writes and rotates them
         'file_general': {
-            'class': 'logging.FileHandler',
-            'filename': 'logs/general.log',  # Store general logs
-            'formatter': 'verbose',
+            '()': 'employee_driver_management_app.log_pipeline.QueuedFileHandler',
+            'filename': os.path.join(LOGS_DIR, 'general.log'),  # Store general logs
+            'max_bytes': 10 * 1024 * 1024,
+            'backup_count': 5,
+            'formatter': 'json',
+            'filters': ['payload_sampling'],
         },
         'file_email': {
-            'class': 'logging.FileHandler',
-            'filename': 'logs/email.log',  # Store email-specific logs
-            'formatter': 'verbose',
+            '()': 'employee_driver_management_app.log_pipeline.QueuedFileHandler',
+            'filename': os.path.join(LOGS_DIR, 'email.log'),  # Store email-specific logs
+            'max_bytes': 10 * 1024 * 1024,
+            'backup_count': 5,
+            'formatter': 'json',
+            'filters': ['payload_sampling'],
         },
     },
 
@@ -0,0 +1,55 @@
+from typing import Any, Dict, List, Optional
+
+
+def search_rows(rows: List[Dict[str, Any]], search_query: str) -> List[Dict[str, Any]]:
+    """
+    Filters rows containing ``search_query`` in any value (case-insensitive)
+
+    Args:
+        rows: Dataset rows as stored in the session
+        search_query: Lower-cased query; empty returns every row
+
+    Returns:
+        List[Dict[str, Any]]: Matching rows
+    """
+    if not search_query:
+        return rows  # Show all data if no search query
+    return [
+        row for row in rows
+        if any(search_query in str(value).lower() for value in row.values())
+    ]
+
+
+def sort_rows(rows: List[Dict[str, Any]], column: str, direction: str = 'asc') -> List[Dict[str, Any]]:
+    """
+    Sorts rows by one column
+
+    Args:
+        rows: Dataset rows as stored in the session
+        column: Column to sort on
+        direction: ``asc`` or ``desc``
+
+    Returns:
+        List[Dict[str, Any]]: New sorted list
+    """
+    return sorted(rows, key=lambda x: x[column], reverse=(direction == "desc"))
+
+
+def view_rows(rows: List[Dict[str, Any]], search_query: str, column: Optional[str] = None,
+              direction: str = 'asc') -> List[Dict[str, Any]]:
+    """
+    Applies the table's search and then its sort, as the user currently sees it
+
+    Args:
+        rows: Dataset rows as stored in the session
+        search_query: Lower-cased query; empty keeps every row
+        column: Column to sort on; ignored when empty or unknown
+        direction: ``asc`` or ``desc``
+
+    Returns:
+        List[Dict[str, Any]]: Filtered (and sorted) rows
+    """
+    filtered = search_rows(rows, search_query)
+    if column and filtered and column in filtered[0]:
+        filtered = sort_rows(filtered, column, direction)
+    return filtered
@@ -0,0 +1,28 @@
+import os
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from employee_driver_management_app.column_projection import ColumnProjection, columns_from_env
+
+HEADER = ['S No', 'Name', 'Shift', 'Cab', 'Notes', 'Email']
+
+
+class ColumnProjectionTests(SimpleTestCase):
+    def test_first_columns_plus_required_ones(self):
+        projection = ColumnProjection(3, required=['Email'])
+        self.assertEqual(projection(HEADER), ['S No', 'Name', 'Shift', 'Email'])
+
+    def test_whitelist_replaces_the_column_limit(self):
+        projection = ColumnProjection(3, required=['Email'], whitelist=['Notes', 'Name', 'Unknown'])
+        self.assertEqual(projection(HEADER), ['Name', 'Notes', 'Email'])
+
+    def test_usecols_accepts_non_string_headers(self):
+        usecols = ColumnProjection(2, required=[]).usecols(['Name', 2024, 'Email'])
+        self.assertEqual([column for column in ['Name', 2024, 'Email'] if usecols(column)], ['Name', 2024])
+
+    def test_columns_from_env(self):
+        with mock.patch.dict(os.environ, {'EMPLOYEE_COLUMNS': ' Name, ,Email '}):
+            self.assertEqual(columns_from_env('EMPLOYEE_COLUMNS'), ['Name', 'Email'])
+        with mock.patch.dict(os.environ, {'EMPLOYEE_COLUMNS': ' '}):
+            self.assertIsNone(columns_from_env('EMPLOYEE_COLUMNS'))
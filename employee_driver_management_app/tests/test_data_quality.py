@@ -0,0 +1,75 @@
+from unittest import mock
+
+import pandas as pd
+from django.test import SimpleTestCase
+
+from employee_driver_management_app import data_quality
+from employee_driver_management_app.data_quality import DataQualityChecker
+
+
+def vendor_checker():
+    return DataQualityChecker(email_columns=['Vendor Emails'],
+                              required_columns=['S No', 'Name', 'Vendor Emails'])
+
+
+class DataQualityCheckerTests(SimpleTestCase):
+    def setUp(self):
+        self.data = pd.DataFrame({
+            'S No': [1, None, 3, 4, 5],
+            'Name': ['Asha', 'Ravi', None, 'Meera', 'Kiran'],
+            'Vendor Emails': ['a@example.com, b@example.org', 'ops@example.com', 'c@example.com',
+                              'not-an-address', None],
+        })
+
+    def test_comma_separated_recipients_are_valid(self):
+        values = pd.Series(['a@example.com, b@example.org', 'a@example.com,', 'a@example.com, nope', ',', 'N/A'])
+        self.assertEqual(DataQualityChecker._malformed_mask(values).tolist(), [False, False, True, True, True])
+
+    def test_only_recipient_problems_exclude_rows(self):
+        report = vendor_checker().check(self.data)
+
+        self.assertEqual(report['valid_rows'], 3)
+        self.assertEqual(report['invalid_count'], 2)
+        self.assertEqual(report['invalid_samples'], [3, 4])
+        self.assertEqual(report['invalid_ranges'], [[3, 5]])
+        self.assertEqual(report['invalid_emails']['Vendor Emails']['samples'], [{'row': 3, 'value': 'not-an-address'}])
+        # Blank non-recipient fields are reported, but their rows are still sent
+        self.assertEqual(report['missing_fields']['S No'], {'count': 1, 'rows': [1]})
+        self.assertEqual(report['missing_fields']['Name'], {'count': 1, 'rows': [2]})
+
+    def test_report_keeps_samples_not_every_row(self):
+        data = pd.DataFrame({'Email': ['broken'] * 50})
+        with mock.patch.object(data_quality, 'SAMPLE_LIMIT', 5):
+            report = DataQualityChecker(['Email'], ['Email'], recipient_column='Email').check(data)
+        self.assertEqual(report['invalid_count'], 50)
+        self.assertEqual(report['invalid_samples'], [0, 1, 2, 3, 4])
+        self.assertEqual(report['invalid_ranges'], [[0, 50]])
+
+    def test_valid_rows_matches_the_report_on_filled_rows(self):
+        report = vendor_checker().check(self.data)
+        rows = self.data.fillna('N/A').to_dict(orient='records')
+
+        kept = DataQualityChecker.valid_rows(rows, report)
+        self.assertEqual(len(kept), report['valid_rows'])
+        self.assertEqual([row['Name'] for row in kept], ['Asha', 'Ravi', 'N/A'])
+
+    def test_duplicate_recipients_ignore_invalid_rows(self):
+        data = pd.DataFrame({'Email': ['a@example.com', 'A@example.com ', 'bad', 'bad']})
+        report = DataQualityChecker(['Email'], ['Email'], recipient_column='Email').check(data)
+        self.assertEqual(report['duplicate_recipients'], {'count': 1, 'samples': [{'value': 'a@example.com', 'rows': 2}]})
+
+    def test_rows_are_filtered_by_position(self):
+        data = pd.DataFrame({'Email': ['bad', 'a@example.com', 'bad', 'bad', 'b@example.com', 'bad']})
+        report = DataQualityChecker(['Email'], ['Email'], recipient_column='Email').check(data)
+        self.assertEqual(report['invalid_ranges'], [[0, 1], [2, 4], [5, 6]])
+
+        rows = data.to_dict(orient='records')
+        self.assertEqual(DataQualityChecker.valid_rows(rows, report), [rows[1], rows[4]])
+        sendable = DataQualityChecker.row_filter(report)
+        self.assertEqual([position for position in range(len(rows)) if sendable(position)], [1, 4])
+
+    def test_clean_report_keeps_every_row(self):
+        rows = [{'Email': 'a@example.com'}]
+        report = DataQualityChecker(['Email'], ['Email']).check(pd.DataFrame(rows))
+        self.assertIs(DataQualityChecker.valid_rows(rows, report), rows)
+        self.assertIsNone(DataQualityChecker.row_filter(report))
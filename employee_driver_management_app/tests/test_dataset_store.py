@@ -0,0 +1,190 @@
+import math
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from django.contrib.sessions.backends.cache import SessionStore
+from django.test import SimpleTestCase
+
+from employee_driver_management_app import dataset_store
+from employee_driver_management_app.table_ops import search_rows, view_rows
+
+try:
+    import pyarrow  # noqa: F401
+except ImportError:
+    pyarrow = None
+
+ROWS = [
+    {'S No': 1, 'Name': 'Asha', 'Shift': 1.0, 'Cab': 'N/A', 'Active': True, 'Score': float('nan')},
+    {'S No': 2, 'Name': 'Ravi', 'Shift': 'N/A', 'Cab': 12, 'Active': False, 'Score': 7.5},
+    {'S No': 3, 'Name': 'Meera', 'Shift': 2.5, 'Cab': 3, 'Active': True, 'Score': None},
+]
+
+
+def same_rows(left, right):
+    """Row equality that treats NaN as equal to NaN"""
+    def normalize(value):
+        return 'NaN' if isinstance(value, float) and math.isnan(value) else (type(value).__name__, value)
+    return [[(key, normalize(value)) for key, value in row.items()] for row in left] == \
+        [[(key, normalize(value)) for key, value in row.items()] for row in right]
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow not installed")
+class ArrowTableTests(SimpleTestCase):
+    def setUp(self):
+        self.table = dataset_store.build_table(ROWS)
+
+    def test_materialize_restores_published_values(self):
+        self.assertTrue(same_rows(dataset_store.materialize(self.table), ROWS))
+
+    def test_hidden_columns_are_not_listed(self):
+        self.assertEqual(dataset_store.visible_columns(self.table), list(ROWS[0].keys()))
+
+    def test_search_matches_search_rows(self):
+        for query in ['1.0', 'nan', 'none', 'n/a', 'true', '12', 'ee', '2.5', 'asha', '', 'zzz', 'a\x1fr']:
+            with self.subTest(query=query):
+                arrow_rows = dataset_store.materialize(dataset_store.search_table(self.table, query))
+                self.assertTrue(same_rows(arrow_rows, search_rows(ROWS, query)))
+
+    def test_sort_matches_view_rows_for_single_type_columns(self):
+        for column in ['S No', 'Name', 'Active']:
+            for direction in ['asc', 'desc']:
+                with self.subTest(column=column, direction=direction):
+                    sorted_table = dataset_store.sort_table(self.table, column, direction)
+                    self.assertTrue(same_rows(dataset_store.materialize(sorted_table),
+                                              view_rows(ROWS, '', column, direction)))
+
+    def test_mixed_columns_sort_as_text(self):
+        # sorted() raises TypeError on int vs str; the Arrow path orders the text instead
+        sorted_rows = dataset_store.materialize(dataset_store.sort_table(self.table, 'Cab'))
+        self.assertEqual([row['Cab'] for row in sorted_rows], [12, 3, 'N/A'])
+
+    def test_unknown_sort_column_is_ignored(self):
+        sorted_table = dataset_store.sort_table(self.table, dataset_store.SEARCH_COLUMN)
+        self.assertTrue(same_rows(dataset_store.materialize(sorted_table), ROWS))
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow not installed")
+class DatasetStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.store = dataset_store.DatasetStore(self.directory.name)
+
+    def age(self, dataset_id, seconds):
+        then = time.time() - seconds
+        os.utime(self.store._path(dataset_id), (then, then))
+
+    def test_identical_content_shares_one_file(self):
+        self.assertEqual(self.store.publish(ROWS), self.store.publish(list(ROWS)))
+        self.assertEqual(len(self.store._datasets()), 1)
+
+    def test_attach_round_trip(self):
+        dataset_id = self.store.publish(ROWS)
+        self.assertTrue(same_rows(dataset_store.materialize(self.store.attach(dataset_id)), ROWS))
+
+    def test_release_of_last_reference_evicts(self):
+        dataset_id = self.store.publish(ROWS)
+        self.store.acquire(dataset_id, 'a')
+        self.store.acquire(dataset_id, 'b')
+        self.assertEqual(self.store.refcount(dataset_id), 2)
+
+        self.store.release(dataset_id, 'a')
+        self.assertTrue(self.store.exists(dataset_id))
+        self.store.release(dataset_id, 'b')
+        self.assertFalse(self.store.exists(dataset_id))
+        with self.assertRaises(dataset_store.DatasetMissing):
+            self.store.attach(dataset_id)
+
+    def test_collect_drops_stale_references(self):
+        dataset_id = self.store.publish(ROWS)
+        self.store.acquire(dataset_id, 'a')
+        stale = time.time() - self.store.reference_ttl - 1
+        os.utime(self.store._ref_path(dataset_id, 'a'), (stale, stale))
+        self.age(dataset_id, dataset_store.PUBLISH_GRACE_SECONDS + 1)
+
+        self.assertEqual(self.store.collect(), 1)
+        self.assertFalse(self.store.exists(dataset_id))
+
+    def test_collect_keeps_fresh_unreferenced_files(self):
+        dataset_id = self.store.publish(ROWS)
+        self.assertEqual(self.store.collect(), 0)
+        self.assertTrue(self.store.exists(dataset_id))
+
+    def test_budget_evicts_oldest_unreferenced(self):
+        with tempfile.TemporaryDirectory() as scratch:
+            scratch_store = dataset_store.DatasetStore(scratch)
+            new_size = os.path.getsize(scratch_store._path(scratch_store.publish(ROWS)))
+        old_id = self.store.publish(ROWS[:1])
+        self.age(old_id, 100)
+        kept_id = self.store.publish(ROWS[1:])
+        self.store.acquire(kept_id, 'a')
+        self.age(kept_id, 200)
+        # Room for the kept dataset and the new one, not for the old one as well
+        self.store.max_bytes = os.path.getsize(self.store._path(kept_id)) + new_size
+
+        new_id = self.store.publish(ROWS)
+        self.assertFalse(self.store.exists(old_id))
+        self.assertTrue(self.store.exists(kept_id))
+        self.assertTrue(self.store.exists(new_id))
+
+    def test_budget_never_evicts_referenced(self):
+        dataset_id = self.store.publish(ROWS[:1])
+        self.store.acquire(dataset_id, 'a')
+        self.store.max_bytes = self.store.usage() + 10
+
+        with self.assertRaises(dataset_store.DatasetStoreFull):
+            self.store.publish(ROWS)
+        self.assertTrue(self.store.exists(dataset_id))
+        self.assertEqual([name for name in os.listdir(self.directory.name) if name.startswith('.publish')], [])
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow not installed")
+class SessionRowsTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.store = dataset_store.DatasetStore(self.directory.name)
+        patcher = mock.patch.object(dataset_store, 'get_dataset_store', return_value=self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.session = SessionStore()
+
+    def test_rows_are_replaced_by_a_reference(self):
+        dataset_store.store_session_rows(self.session, 'data_dict', ROWS)
+        dataset_id = self.session['data_dict' + dataset_store.DATASET_ID_SUFFIX]
+        self.assertNotIn('data_dict', self.session)
+        self.assertEqual(self.store.refcount(dataset_id), 1)
+        self.assertTrue(same_rows(dataset_store.session_rows(self.session, 'data_dict'), ROWS))
+        self.assertEqual(dataset_store.session_row_count(self.session, 'data_dict'), 3)
+        self.assertEqual(len(dataset_store.session_head(self.session, 'data_dict', 2)), 2)
+
+    def test_replacing_a_dataset_releases_the_previous_one(self):
+        dataset_store.store_session_rows(self.session, 'data_dict', ROWS)
+        first_id = self.session['data_dict' + dataset_store.DATASET_ID_SUFFIX]
+        dataset_store.store_session_rows(self.session, 'data_dict', ROWS[:1])
+        self.assertFalse(self.store.exists(first_id))
+
+    def test_write_failure_falls_back_to_session_rows(self):
+        with mock.patch.object(self.store, 'publish', side_effect=OSError(28, 'No space left on device')):
+            dataset_store.store_session_rows(self.session, 'data_dict', ROWS)
+        self.assertEqual(self.session['data_dict'], ROWS)
+        self.assertTrue(same_rows(dataset_store.session_rows(self.session, 'data_dict'), ROWS))
+
+    def test_batches_match_the_table_view(self):
+        dataset_store.store_session_rows(self.session, 'data_dict', ROWS)
+        with mock.patch.object(dataset_store, 'BATCH_ROWS', 2):
+            columns, batches = dataset_store.session_batches(self.session, 'data_dict', 'a', 'S No', 'desc')
+            batches = list(batches)
+        self.assertEqual(columns, list(ROWS[0].keys()))
+        self.assertEqual([len(batch) for batch in batches], [2, 1])
+        self.assertTrue(same_rows([row for batch in batches for row in batch], view_rows(ROWS, 'a', 'S No', 'desc')))
+
+    def test_release_session_datasets(self):
+        dataset_store.store_session_rows(self.session, 'data_dict', ROWS)
+        dataset_id = self.session['data_dict' + dataset_store.DATASET_ID_SUFFIX]
+        dataset_store.release_session_datasets(self.session)
+        self.assertFalse(self.store.exists(dataset_id))
+        self.assertNotIn('data_dict' + dataset_store.DATASET_ID_SUFFIX, self.session)
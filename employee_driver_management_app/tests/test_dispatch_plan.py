@@ -0,0 +1,45 @@
+from email.message import EmailMessage
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from employee_driver_management_app import dispatch_plan
+from employee_driver_management_app.dispatch_plan import DispatchPlan
+from employee_driver_management_app.metrics import EMAIL_DELIVERY_SECONDS, EMAIL_SEND_SECONDS
+
+
+def make_message(body_size):
+    message = EmailMessage()
+    message['To'] = 'vendor@example.com'
+    message.set_content('x' * body_size)
+    return message
+
+
+class DispatchPlanTests(SimpleTestCase):
+    app = 'plan-test'
+
+    def test_estimate_uses_delivery_time_only(self):
+        for _ in range(dispatch_plan.MIN_MEASURED_SENDS):
+            EMAIL_DELIVERY_SECONDS.observe(0.2, app=self.app)
+            EMAIL_SEND_SECONDS.observe(5.0, app=self.app)  # Includes building, which the dry run already timed
+
+        plan = DispatchPlan(self.app)
+        for size in (10, 20):
+            plan.add('vendor@example.com', make_message(size))
+        result = plan.result()
+
+        self.assertEqual(result['estimate_source'], 'measured')
+        self.assertEqual(result['seconds_per_message'], 0.2)
+        self.assertLess(result['estimated_seconds'], result['preparation_seconds'] + 1)
+
+    def test_per_recipient_is_capped_but_totals_are_not(self):
+        plan = DispatchPlan('plan-cap-test')
+        with mock.patch.object(dispatch_plan, 'PER_RECIPIENT_LIMIT', 3):
+            for size in range(5):
+                plan.add(f'{size}@example.com', make_message(100 * size))
+            result = plan.result()
+
+        self.assertEqual(result['messages'], 5)
+        self.assertEqual(len(result['per_recipient']), 3)
+        self.assertTrue(result['per_recipient_truncated'])
+        self.assertEqual(result['largest'][0]['recipient'], '4@example.com')
@@ -0,0 +1,105 @@
+import logging
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from employee_driver_management_app.log_pipeline import (
+    PayloadSamplingFilter, QueuedFileHandler, SharedRotatingFileHandler,
+)
+
+
+def make_record(level=logging.INFO, message='message', **extra):
+    record = logging.LogRecord('test', level, __file__, 1, message, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class PayloadSamplingFilterTests(SimpleTestCase):
+    def test_shared_filter_counts_each_record_once(self):
+        sampling = PayloadSamplingFilter(sample_rate=2)
+        decisions = []
+        for _ in range(6):
+            record = make_record(payload=True)
+            # The same record passes through three handlers sharing the filter
+            decisions.append([sampling.filter(record) for _ in range(3)])
+        self.assertEqual(decisions, [[True] * 3, [False] * 3] * 3)
+
+    def test_warnings_are_never_sampled(self):
+        sampling = PayloadSamplingFilter(sample_rate=1000)
+        self.assertTrue(all(sampling.filter(make_record(logging.WARNING, payload=True)) for _ in range(5)))
+
+    def test_long_messages_are_truncated(self):
+        record = make_record(message='x' * 50)
+        PayloadSamplingFilter(max_length=10).filter(record)
+        self.assertEqual(record.getMessage(), 'x' * 10 + '... [truncated 40 chars]')
+
+
+class QueuedFileHandlerTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'test.log')
+
+    def handler(self, **kwargs):
+        handler = QueuedFileHandler(self.path, **kwargs)
+        handler.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+        self.addCleanup(handler.close)
+        return handler
+
+    def test_records_are_written_by_the_listener(self):
+        handler = self.handler()
+        handler.handle(make_record(message='hello'))
+        handler.close()
+        with open(self.path) as log_file:
+            self.assertEqual(log_file.read(), 'INFO hello\n')
+
+    def test_full_queue_drops_info_but_writes_errors(self):
+        handler = self.handler(queue_size=1)
+        handler.listener.stop()  # Nothing drains the queue, as after a fork without a listener
+        handler.handle(make_record(message='fills the queue'))
+
+        handler.handle(make_record(logging.ERROR, 'error'))
+        handler.handle(make_record(message='info'))
+        self.assertEqual(handler.dropped, 1)
+        with open(self.path) as log_file:
+            self.assertEqual(log_file.read(), 'ERROR error\n')
+
+    def test_drops_are_reported_once_there_is_room(self):
+        handler = self.handler(queue_size=1)
+        handler.listener.stop()
+        handler.handle(make_record(message='fills the queue'))
+        handler.handle(make_record(message='dropped'))
+
+        handler.queue.get_nowait()
+        handler.handle(make_record(message='next'))
+        notice = handler.queue.get_nowait()
+        self.assertEqual(notice.levelno, logging.WARNING)
+        self.assertIn('1 log record(s) dropped', notice.getMessage())
+
+
+class SharedRotatingFileHandlerTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'test.log')
+
+    def handler(self):
+        handler = SharedRotatingFileHandler(self.path, max_bytes=100, backup_count=2)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        self.addCleanup(handler.close)
+        return handler
+
+    def test_workers_sharing_a_file_rotate_it_once(self):
+        # Two handlers on one file stand in for two worker processes
+        first, second = self.handler(), self.handler()
+        for number in range(6):
+            (first if number % 2 else second).handle(make_record(message=f'{number:02d}' + 'x' * 37))
+
+        logs = sorted(name for name in os.listdir(self.directory.name) if not name.endswith('.lock'))
+        self.assertEqual(logs, ['test.log', 'test.log.1', 'test.log.2'])
+        lines = []
+        for name in reversed(logs):
+            with open(os.path.join(self.directory.name, name)) as log_file:
+                lines.extend(line[:2] for line in log_file)
+        self.assertEqual(lines, ['00', '01', '02', '03', '04', '05'])
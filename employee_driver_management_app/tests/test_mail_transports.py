@@ -0,0 +1,111 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from email.message import EmailMessage
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from employee_driver_management_app.mail_transports import MemoryTransport, SpoolRelay, SpoolTransport
+
+
+def make_message(recipient='vendor@example.com'):
+    message = EmailMessage()
+    message['From'] = 'roster@example.com'
+    message['To'] = recipient
+    message['Subject'] = 'Roaster'
+    message.set_content('body')
+    return message
+
+
+class FakeServer:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.sent = []
+
+    def sendmail(self, sender, recipients, raw):
+        if self.fail:
+            raise OSError('connection reset')
+        self.sent.append((sender, recipients))
+
+
+class FakePool:
+    def __init__(self, server):
+        self.server = server
+
+    @contextmanager
+    def connection(self):
+        yield self.server
+
+
+class SpoolRelayTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.spool = self.directory.name
+        self.transport = SpoolTransport(self.spool)
+
+    def listing(self, subdirectory):
+        return os.listdir(os.path.join(self.spool, subdirectory))
+
+    def test_spooled_messages_are_delivered_once(self):
+        self.transport.send(make_message('a@example.com'))
+        self.transport.send(make_message('b@example.com'))
+        server = FakeServer()
+        relay = SpoolRelay(self.spool, FakePool(server))
+
+        self.assertEqual(relay.drain(), {'delivered': 2, 'failed': 0})
+        self.assertEqual(relay.drain(), {'delivered': 0, 'failed': 0})
+        self.assertEqual(sorted(recipients for _, recipients in server.sent), [['a@example.com'], ['b@example.com']])
+        self.assertEqual(self.listing('new') + self.listing('cur'), [])
+
+    def test_failures_are_retried_then_parked(self):
+        self.transport.send(make_message())
+        relay = SpoolRelay(self.spool, FakePool(FakeServer(fail=True)), max_attempts=2, retry_delay=0)
+
+        self.assertEqual(relay.drain(), {'delivered': 0, 'failed': 1})
+        self.assertTrue(self.listing('new')[0].endswith('.retry1'))
+        self.assertEqual(relay.drain(), {'delivered': 0, 'failed': 1})
+        self.assertEqual(self.listing('new'), [])
+        self.assertTrue(self.listing('failed')[0].endswith('.retry2'))
+
+    def test_cleanup_failure_after_send_never_requeues(self):
+        self.transport.send(make_message())
+        server = FakeServer()
+        relay = SpoolRelay(self.spool, FakePool(server))
+
+        with mock.patch('employee_driver_management_app.mail_transports.os.remove', side_effect=PermissionError):
+            self.assertEqual(relay.drain(), {'delivered': 1, 'failed': 0})
+        self.assertEqual(self.listing('new'), [])
+        self.assertEqual(len(self.listing('cur')), 1)
+
+        # A restarted relay drops the delivered leftover instead of sending it again
+        self.assertEqual(relay.recover(stale_seconds=0), 0)
+        self.assertEqual(self.listing('cur') + self.listing('new'), [])
+        self.assertEqual(len(server.sent), 1)
+
+    def test_recover_requeues_stale_claims(self):
+        self.transport.send(make_message())
+        name = self.listing('new')[0]
+        os.replace(os.path.join(self.spool, 'new', name), os.path.join(self.spool, 'cur', name))
+        relay = SpoolRelay(self.spool, FakePool(FakeServer()))
+
+        self.assertEqual(relay.recover(stale_seconds=3600), 0)
+        self.assertEqual(relay.recover(stale_seconds=-1), 1)
+        self.assertEqual(self.listing('new'), [name])
+
+
+class MemoryTransportTests(SimpleTestCase):
+    def setUp(self):
+        MemoryTransport.clear()
+        self.addCleanup(MemoryTransport.clear)
+
+    def test_outbox_keeps_only_the_newest_messages(self):
+        transport = MemoryTransport()
+        with mock.patch.object(MemoryTransport, 'MAX_OUTBOX', 3):
+            for number in range(5):
+                transport.send(make_message(f'{number}@example.com'))
+        outbox = MemoryTransport.clear()
+        self.assertEqual(len(outbox), 3)
+        self.assertIn(b'4@example.com', outbox[-1])
+        self.assertIn(b'2@example.com', outbox[0])
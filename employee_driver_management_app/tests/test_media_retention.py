@@ -0,0 +1,119 @@
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from employee_driver_management_app import media_retention
+from employee_driver_management_app.media_retention import MediaRetentionManager
+
+
+def track_many(root, prefix, count):
+    """Registers ``count`` files from a separate process"""
+    manager = MediaRetentionManager(root, max_age=0, max_bytes=0)
+    for number in range(count):
+        path = os.path.join(root, 'employee', f'{prefix}{number}.csv')
+        with open(path, 'w') as upload:
+            upload.write('x')
+        manager.track(path, 'upload')
+
+
+class MediaRetentionTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.root = self.directory.name
+        os.makedirs(os.path.join(self.root, 'employee'))
+        self.manager = MediaRetentionManager(self.root, max_age=3600, max_bytes=0)
+        self.manager.schedule = lambda: None  # Enforcement is driven by the tests
+
+    def upload(self, name, size=10, idle=None):
+        path = os.path.join(self.root, 'employee', name)
+        with open(path, 'wb') as upload:
+            upload.write(b'x' * size)
+        self.manager.track(path, 'upload')
+        if idle is not None:
+            self.set_entry(path, created=time.time() - idle, last_access=time.time() - idle)
+        return path
+
+    def set_entry(self, path, **fields):
+        with self.manager._locked() as entries:
+            entries[self.manager._relative(path)].update(fields)
+            self.manager._save()
+
+    def test_expired_entries_are_removed(self):
+        old = self.upload('old.csv', idle=7200)
+        fresh = self.upload('fresh.csv')
+
+        victims = self.manager.enforce()
+        self.assertEqual([victim['reason'] for victim in victims], ['age'])
+        self.assertFalse(os.path.exists(old))
+        self.assertTrue(os.path.exists(fresh))
+        self.assertEqual(self.manager.usage()['entries'], 1)
+        self.assertEqual([name for name in os.listdir(self.root) if name.startswith('.evicting')], [])
+
+    def test_size_budget_evicts_least_recently_used(self):
+        self.manager.max_age = 0
+        older = self.upload('older.csv', idle=5000)
+        newer = self.upload('newer.csv', idle=4000)
+        self.manager.max_bytes = 15
+
+        self.manager.enforce()
+        self.assertFalse(os.path.exists(older))
+        self.assertTrue(os.path.exists(newer))
+
+    def test_touch_moves_an_entry_to_the_back_of_the_queue(self):
+        self.manager.max_age = 0
+        older = self.upload('older.csv', idle=5000)
+        newer = self.upload('newer.csv', idle=4000)
+        self.manager.max_bytes = 15
+
+        self.assertTrue(self.manager.touch(older))
+        self.assertFalse(self.manager.touch(os.path.join(self.root, 'employee', 'untracked.csv')))
+        self.set_entry(older, last_access=time.time() - media_retention.MIN_IDLE_SECONDS - 1)
+        self.manager.enforce()
+        self.assertTrue(os.path.exists(older))
+        self.assertFalse(os.path.exists(newer))
+
+    def test_leased_entries_survive_age_and_size_eviction(self):
+        self.manager.max_bytes = 1
+        path = self.upload('sending.csv', idle=7200)
+        with self.manager.in_use(path):
+            self.set_entry(path, last_access=time.time() - 7200)
+            self.assertEqual(self.manager.enforce(), [])
+            self.assertTrue(os.path.exists(path))
+        # Releasing the lease counts as a use
+        self.assertEqual(self.manager.enforce(), [])
+        self.set_entry(path, last_access=time.time() - 7200)
+        self.assertEqual(len(self.manager.enforce()), 1)
+
+    def test_expired_lease_no_longer_protects(self):
+        path = self.upload('crashed.csv', idle=7200)
+        self.set_entry(path, leases={'dead': time.time() - 1})
+        self.assertEqual(len(self.manager.enforce()), 1)
+
+    def test_recently_used_entries_are_not_evicted_for_age(self):
+        path = self.upload('reused.csv', idle=7200)
+        self.set_entry(path, last_access=time.time())
+        self.assertEqual(self.manager.enforce(), [])
+
+    def test_track_keeps_leases_and_creation_time(self):
+        path = self.upload('job.csv', idle=100)
+        with self.manager.in_use(path):
+            self.manager.track(path, 'upload')
+            entry = self.manager._load()[self.manager._relative(path)]
+            self.assertEqual(len(entry['leases']), 1)
+            self.assertLess(entry['created'], time.time() - 50)
+        self.assertNotIn('leases', self.manager._load()[self.manager._relative(path)])
+
+    def test_processes_do_not_lose_each_others_updates(self):
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=track_many, args=(self.root, prefix, 20)) for prefix in 'ab']
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        with open(os.path.join(self.root, media_retention.INDEX_FILENAME)) as index_file:
+            self.assertEqual(len(json.load(index_file)), 40)
@@ -0,0 +1,91 @@
+import os
+import re
+import tempfile
+import zipfile
+
+from django.test import SimpleTestCase
+
+from employee_driver_management_app.memory_budget import (
+    MemoryBudgetExceeded, PeakMemory, _count_csv_rows, check_memory_budget, estimate_footprint,
+)
+
+
+def write_workbook(path, rows, formatted_rows=0, dimension=None):
+    """Writes an .xlsx; ``formatted_rows`` adds styled empty rows, ``dimension`` overrides the recorded range"""
+    import openpyxl
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['Name', 'Email'])
+    for row in rows:
+        sheet.append(row)
+    if formatted_rows:
+        sheet.cell(row=len(rows) + 1 + formatted_rows, column=1).number_format = '0.00'
+    workbook.save(path)
+
+    if dimension is not None:
+        with zipfile.ZipFile(path) as archive:
+            parts = {name: archive.read(name) for name in archive.namelist()}
+        sheet_xml = parts['xl/worksheets/sheet1.xml'].decode('utf-8')
+        parts['xl/worksheets/sheet1.xml'] = re.sub(
+            r'<dimension ref="[^"]*"/>', f'<dimension ref="{dimension}"/>', sheet_xml
+        ).encode('utf-8')
+        with zipfile.ZipFile(path, 'w') as archive:
+            for name, data in parts.items():
+                archive.writestr(name, data)
+
+
+class RowCountTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.rows = [[f'Person {number}', f'person{number}@example.com'] for number in range(25)]
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_csv_rows_without_trailing_newline(self):
+        with open(self.path('roster.csv'), 'w') as roster:
+            roster.write('Name,Email\na,a@x.com\nb,b@x.com')
+        self.assertEqual(_count_csv_rows(self.path('roster.csv')), 2)
+
+    def test_formatted_trailing_rows_are_not_counted(self):
+        write_workbook(self.path('roster.xlsx'), self.rows, formatted_rows=100000)
+        self.assertEqual(estimate_footprint(self.path('roster.xlsx'))['total_rows'], 25)
+
+    def test_wrong_dimension_does_not_hide_rows(self):
+        write_workbook(self.path('roster.xlsx'), self.rows, dimension='A1')
+        estimate = estimate_footprint(self.path('roster.xlsx'))
+        self.assertEqual(estimate['total_rows'], 25)
+        self.assertGreater(estimate['estimated_bytes'], 0)
+
+    def test_each_requested_sheet_is_counted(self):
+        import pandas as pd
+
+        with pd.ExcelWriter(self.path('roster.xlsx'), engine='openpyxl') as writer:
+            for name, size in (('Morning', 3), ('Evening', 7), ('Night', 11)):
+                pd.DataFrame({'Name': ['x'] * size, 'Shift': [1.5] * size}).to_excel(writer, sheet_name=name, index=False)
+        estimate = estimate_footprint(self.path('roster.xlsx'), sheets=['Night', 'Morning'])
+        self.assertEqual(estimate['total_rows'], 14)
+
+    def test_over_budget_workbook_is_rejected(self):
+        write_workbook(self.path('roster.xlsx'), self.rows, dimension='A1')
+        with self.assertRaises(MemoryBudgetExceeded):
+            check_memory_budget(self.path('roster.xlsx'), budget=100)
+
+
+class PeakMemoryTests(SimpleTestCase):
+    def test_overlapping_block_does_not_reset_the_measured_peak(self):
+        with PeakMemory('outer', 'employee') as outer:
+            block = bytearray(4 * 1024 * 1024)
+            del block
+            with PeakMemory('inner', 'employee') as inner:
+                pass
+        self.assertIsNone(inner.peak_bytes)
+        self.assertGreaterEqual(outer.peak_bytes, 4 * 1024 * 1024)
+
+    def test_blocks_after_each_other_are_both_measured(self):
+        for _ in range(2):
+            with PeakMemory('upload', 'vendor') as peak:
+                bytearray(1024 * 1024)
+            self.assertGreaterEqual(peak.peak_bytes, 1024 * 1024)
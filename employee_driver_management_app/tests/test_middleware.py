@@ -0,0 +1,87 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from employee_driver_management_app import middleware
+from employee_driver_management_app.metrics import RequestMetricsMiddleware
+from employee_driver_management_app.profiling import ProfilingMiddleware
+
+
+def sync_view(request):
+    return HttpResponse('ok')
+
+
+async def async_view(request):
+    return HttpResponse('ok')
+
+
+@mock.patch.object(middleware, 'NETWORK_ACCESS_MODE', 'cidr')
+@mock.patch.object(middleware, 'ALLOWED_NETWORKS', ['10.0.0.0/8'])
+class AsyncCapableMiddlewareTests(SimpleTestCase):
+    classes = [RequestMetricsMiddleware, ProfilingMiddleware, middleware.IPWhitelistMiddleware]
+
+    def test_async_chain_stays_async(self):
+        request = RequestFactory().get('/', REMOTE_ADDR='10.1.2.3')
+        for cls in self.classes:
+            with self.subTest(middleware=cls.__name__):
+                instance = cls(async_view)
+                self.assertTrue(iscoroutinefunction(instance))
+                self.assertEqual(async_to_sync(instance)(request).status_code, 200)
+
+    def test_sync_chain_stays_sync(self):
+        request = RequestFactory().get('/', REMOTE_ADDR='10.1.2.3')
+        for cls in self.classes:
+            with self.subTest(middleware=cls.__name__):
+                instance = cls(sync_view)
+                self.assertFalse(iscoroutinefunction(instance))
+                self.assertEqual(instance(request).status_code, 200)
+
+    def test_async_chain_still_blocks_disallowed_clients(self):
+        instance = middleware.IPWhitelistMiddleware(async_view)
+        with mock.patch.object(instance, 'custom_forbidden_response', return_value=HttpResponse(status=403)):
+            response = async_to_sync(instance)(RequestFactory().get('/', REMOTE_ADDR='192.168.1.5'))
+        self.assertEqual(response.status_code, 403)
+
+
+class ClientIpTests(SimpleTestCase):
+    def client_ip(self, forwarded_for, proxies=1):
+        request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=forwarded_for)
+        with mock.patch.object(middleware, 'TRUST_X_FORWARDED_FOR', True), \
+                mock.patch.object(middleware, 'TRUSTED_PROXY_COUNT', proxies):
+            return middleware.IPWhitelistMiddleware(sync_view).get_client_ip(request)
+
+    def test_client_supplied_entries_are_ignored(self):
+        self.assertEqual(self.client_ip('10.9.9.9, 203.0.113.7'), '203.0.113.7')
+
+    def test_entry_behind_several_proxies(self):
+        self.assertEqual(self.client_ip('10.9.9.9, 203.0.113.7, 172.16.0.2', proxies=2), '203.0.113.7')
+
+    def test_short_header_falls_back_to_peer_address(self):
+        self.assertEqual(self.client_ip('203.0.113.7', proxies=2), '10.0.0.1')
+
+
+class SSIDCacheTests(SimpleTestCase):
+    def test_concurrent_first_callers_wait_for_the_probe(self):
+        probes = []
+
+        def slow_detector():
+            probes.append(threading.get_ident())
+            time.sleep(0.1)
+            return 'Office'
+
+        cache = middleware.SSIDCache(60, slow_detector)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            values = list(executor.map(lambda _: cache.get(), range(4)))
+        self.assertEqual(values, ['Office'] * 4)
+        self.assertEqual(len(probes), 1)
+
+    def test_failed_probe_does_not_stop_refreshing(self):
+        cache = middleware.SSIDCache(60, mock.Mock(side_effect=[OSError('no wifi'), 'Office']))
+        with self.assertRaises(OSError):
+            cache.get()
+        self.assertEqual(cache.get(), 'Office')
@@ -0,0 +1,132 @@
+import asyncio
+import cProfile
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pandas as pd
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, modify_settings, override_settings
+from django.urls import reverse
+
+from employee_driver_management_app import dataset_store
+from employee_driver_management_app.async_utils import run_blocking
+from employee_driver_management_app.profiling import PROFILE_HEADER, ProfilingMiddleware, profiled_call
+
+
+def parse_in_pool():
+    return sum(range(1000))
+
+
+def pooled_view(request):
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        executor.submit(profiled_call(parse_in_pool)).result()
+    return HttpResponse('ok')
+
+
+async def async_pooled_view(request):
+    await run_blocking(parse_in_pool)
+    return HttpResponse('ok')
+
+
+class SingleProfiler(cProfile.Profile):
+    """cProfile as Python 3.12+ behaves: a second active profiler is refused"""
+
+    active = 0
+
+    def enable(self, *args, **kwargs):
+        if SingleProfiler.active:
+            raise ValueError('Another profiling tool is already active')
+        SingleProfiler.active += 1
+        self.running = True
+        super().enable(*args, **kwargs)
+
+    def disable(self):
+        super().disable()
+        if getattr(self, 'running', False):
+            self.running = False
+            SingleProfiler.active -= 1
+
+
+class ProfilingMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.settings = override_settings(PROFILING_TOKEN='secret', PROFILES_DIR=self.directory.name)
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+        self.factory = RequestFactory()
+
+    def summary(self, response):
+        with open(os.path.join(self.directory.name, f"{response['X-Profile-Id']}.txt")) as summary_file:
+            return summary_file.read()
+
+    def test_wrong_token_is_not_profiled(self):
+        response = ProfilingMiddleware(pooled_view)(self.factory.get('/', **{PROFILE_HEADER: 'guess'}))
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_pool_work_is_included(self):
+        response = ProfilingMiddleware(pooled_view)(self.factory.get('/', **{PROFILE_HEADER: 'secret'}))
+        self.assertIn('parse_in_pool', self.summary(response))
+
+    def test_run_blocking_work_is_included_under_asgi(self):
+        middleware = ProfilingMiddleware(async_pooled_view)
+        response = asyncio.run(middleware(self.factory.get('/', **{PROFILE_HEADER: 'secret'})))
+        self.assertIn('parse_in_pool', self.summary(response))
+
+    def test_profiled_call_is_a_no_op_outside_profiled_requests(self):
+        self.assertIs(profiled_call(parse_in_pool), parse_in_pool)
+
+
+@modify_settings(MIDDLEWARE={'remove': ['employee_driver_management_app.middleware.IPWhitelistMiddleware']})
+class ProfiledUploadTests(SimpleTestCase):
+    """A profiled multi-sheet upload, whose sheets are parsed on a thread pool"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        root = self.directory.name
+        self.settings = override_settings(
+            PROFILING_TOKEN='secret', PROFILES_DIR=os.path.join(root, 'profiles'), MEDIA_ROOT=os.path.join(root, 'media'),
+            SESSION_ENGINE='django.contrib.sessions.backends.cache',
+        )
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+        for patcher in (
+            mock.patch.object(dataset_store, 'get_dataset_store', return_value=None),
+            mock.patch('employee_management.views.get_retention_manager'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.path = os.path.join(root, 'roster.xlsx')
+        with pd.ExcelWriter(self.path, engine='openpyxl') as writer:
+            for sheet, email in (('Morning', 'a@x.com'), ('Evening', 'b@x.com')):
+                pd.DataFrame({'Name': [sheet], 'Email': [email]}).to_excel(writer, sheet_name=sheet, index=False)
+
+    def upload(self):
+        with open(self.path, 'rb') as roster_file:
+            response = self.client.post(reverse('handle_employee_form'), {'employee_file': roster_file},
+                                        **{PROFILE_HEADER: 'secret'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.client.session['data_dict']), 2)
+        return response
+
+    def test_profiled_upload_succeeds(self):
+        response = self.upload()
+        self.assertIn('X-Profile-Id', response)
+
+    def test_profiled_upload_succeeds_when_only_one_profiler_may_run(self):
+        SingleProfiler.active = 0
+        with mock.patch.object(cProfile, 'Profile', SingleProfiler):
+            response = self.upload()
+        self.assertIn('X-Profile-Id', response)
+        self.assertEqual(SingleProfiler.active, 0)
+
+    def test_upload_is_served_unprofiled_when_another_profiler_is_active(self):
+        SingleProfiler.active = 1  # e.g. a debugger or coverage
+        with mock.patch.object(cProfile, 'Profile', SingleProfiler):
+            response = self.upload()
+        self.assertNotIn('X-Profile-Id', response)
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from employee_driver_management_app import progress
+from employee_driver_management_app.progress import ProgressBroker
+
+
+class ProgressChannelTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.sender = ProgressBroker(self.directory.name)
+        # A second broker stands in for the worker process serving the stream
+        self.streamer = ProgressBroker(self.directory.name)
+
+    def test_stream_side_never_creates_a_channel(self):
+        self.assertIsNone(self.streamer.tail('job-12345678'))
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_events_reach_another_broker(self):
+        reporter = self.sender.reporter('job-12345678')
+        reporter.stage('send', 2)
+        reporter.step(recipient='a@example.com')
+
+        tail = self.streamer.tail('job-12345678')
+        self.assertEqual([event for _, event, _ in tail.read()], ['stage', 'progress'])
+        reporter.step(False, recipient='b@example.com')
+        reporter.finish(status='success')
+
+        events = tail.read()
+        self.assertEqual([event for _, event, _ in events], ['progress', 'done'])
+        self.assertEqual(events[0][2]['failed'], 1)
+        self.assertTrue(tail.finished)
+
+    def test_invalid_job_id_gives_a_silent_reporter(self):
+        reporter = self.sender.reporter('../etc')
+        reporter.stage('send', 1)
+        reporter.step()
+        self.assertIsNone(reporter.channel)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_stream_resumes_after_last_event_id(self):
+        reporter = self.sender.reporter('job-12345678')
+        reporter.stage('send', 1)
+        reporter.step()
+        reporter.finish()
+
+        frames = list(progress.iter_events(self.streamer.tail('job-12345678'), last_id=2))
+        self.assertEqual(frames[0], b"retry: 2000\n\n")
+        self.assertEqual(len(frames), 2)
+        self.assertIn(b"event: done", frames[1])
+
+    def test_idle_job_ends_the_stream(self):
+        self.sender.reporter('job-12345678').stage('send', 5)
+        tail = self.streamer.tail('job-12345678')
+        stale = time.time() - progress.IDLE_TIMEOUT - 1
+        os.utime(tail.path, (stale, stale))
+
+        frames = list(progress.iter_events(tail))
+        self.assertIn(b"event: done", frames[-1])
+        self.assertIn(b"stopped reporting", frames[-1])
+
+    def test_old_channels_are_pruned(self):
+        broker = ProgressBroker(self.directory.name, max_channels=3)
+        for number in range(5):
+            broker.reporter(f'job-0000000{number}')
+            path = os.path.join(self.directory.name, f'job-0000000{number}.jsonl')
+            os.utime(path, (time.time() - 100 + number, time.time() - 100 + number))
+        self.assertEqual(sorted(os.listdir(self.directory.name)),
+                         ['job-00000002.jsonl', 'job-00000003.jsonl', 'job-00000004.jsonl'])
@@ -0,0 +1,52 @@
+import os
+import tempfile
+
+import pandas as pd
+from django.test import SimpleTestCase
+
+from employee_driver_management_app.column_projection import ColumnProjection
+from employee_driver_management_app.sheet_ingest import (
+    SHEET_COLUMN, SheetIngestError, parse_sheet_selection, read_workbook_sheets
+)
+
+
+class SheetIngestTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'roster.xlsx')
+        with pd.ExcelWriter(self.path, engine='openpyxl') as writer:
+            pd.DataFrame({'Name': ['Asha', 'Ravi'], 'Email': ['a@x.com', 'r@x.com'], 'Notes': ['', 'x']}) \
+                .to_excel(writer, sheet_name='Morning', index=False)
+            pd.DataFrame({'Name': ['Meera'], 'Email': ['m@x.com'], 'Notes': ['y']}) \
+                .to_excel(writer, sheet_name='Evening', index=False)
+            pd.DataFrame({'Name': ['Kiran']}).to_excel(writer, sheet_name='NoEmail', index=False)
+            pd.DataFrame().to_excel(writer, sheet_name='Blank', index=False)
+
+    def test_valid_sheets_are_stacked_in_workbook_order(self):
+        data = read_workbook_sheets(self.path, ['Email'])
+        self.assertEqual(list(data['Name']), ['Asha', 'Ravi', 'Meera'])
+        self.assertEqual(list(data[SHEET_COLUMN]), ['Morning', 'Morning', 'Evening'])
+        self.assertEqual(
+            [(entry['sheet'], entry['status']) for entry in data.attrs['sheet_report']],
+            [('Morning', 'ingested'), ('Evening', 'ingested'), ('NoEmail', 'skipped'), ('Blank', 'skipped')],
+        )
+
+    def test_selected_sheet_names_ignore_case(self):
+        data = read_workbook_sheets(self.path, ['Email'], parse_sheet_selection('evening'))
+        self.assertEqual(list(data['Name']), ['Meera'])
+        self.assertNotIn(SHEET_COLUMN, data.columns)
+
+    def test_projection_limits_decoded_columns(self):
+        data = read_workbook_sheets(self.path, ['Email'], ['Morning'], projection=ColumnProjection(1, ['Email']))
+        self.assertEqual(list(data.columns), ['Name', 'Email'])
+
+    def test_unknown_or_unusable_sheets_raise(self):
+        with self.assertRaisesMessage(SheetIngestError, 'Sheet(s) not found: Night'):
+            read_workbook_sheets(self.path, ['Email'], ['Night'])
+        with self.assertRaisesMessage(SheetIngestError, 'No sheet could be ingested'):
+            read_workbook_sheets(self.path, ['Email'], ['NoEmail', 'Blank'])
+
+    def test_parse_sheet_selection(self):
+        self.assertEqual(parse_sheet_selection(' Morning, ,Evening '), ['Morning', 'Evening'])
+        self.assertIsNone(parse_sheet_selection(''))
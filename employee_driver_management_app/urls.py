@@ -19,8 +19,13 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 
+from .metrics import metrics_view
+from .progress import progress_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
+    path('progress/<str:job_id>', progress_view, name='send_progress'),
     path('', include('employee_management.urls')),
     path('', include('vendor_management.urls')),
     
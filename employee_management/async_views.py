@@ -0,0 +1,88 @@
+"""
+Async variants of the I/O-bound employee endpoints.
+
+Selected by ``settings.ASYNC_VIEWS`` when the app is served under ASGI. Session
+access uses Django's async session API and the blocking work (filtering,
+sorting, SMTP) runs on the shared executor, so the event loop keeps serving
+other dashboards while a batch is being sent.
+"""
+import json
+import logging
+
+from django.http import JsonResponse
+
+from employee_driver_management_app.async_utils import run_blocking
+from employee_driver_management_app.dataset_store import (
+    asession_batches, asession_columns, asession_rows, asession_view,
+)
+from employee_driver_management_app.exports import aexport_response
+from employee_driver_management_app.progress import PROGRESS
+from employee_driver_management_app.responses import atable_response
+from .views import dispatch_employee_emails
+
+logger = logging.getLogger('django')
+
+
+async def search_employee_data(request):
+    search_query = request.GET.get('search', '').strip().lower()
+
+    filtered_data = await asession_view(request.session, 'data_dict', search_query)
+    return atable_response(request, filtered_data)
+
+
+async def sort_employee_data(request):
+    column = request.GET.get('column')
+    direction = request.GET.get('direction', 'asc')
+
+    sorted_data = await asession_view(request.session, 'data_dict', '', column, direction)
+    return atable_response(request, sorted_data)
+
+
+async def export_employee_data(request):
+    search_query = request.GET.get('search', '').strip().lower()
+    column = request.GET.get('column')
+    direction = request.GET.get('direction', 'asc')
+
+    columns, batches = await asession_batches(request.session, 'data_dict', search_query, column, direction)
+    return await aexport_response(request, columns, batches, 'employee_roster')
+
+
+async def fetch_columns(request):
+    columns = await asession_columns(request.session, 'data_dict')
+    return JsonResponse({"columns": columns})
+
+
+async def send_employee_emails(request):
+    if request.method != 'POST':
+        return JsonResponse({"error": "Invalid request method"}, status=400)
+
+    progress = None
+    try:
+        data = json.loads(request.body.decode("utf-8"))
+        logger.info("Received Data: %s", data, extra={'payload': True})
+        # Created before the rows are loaded so the progress stream finds the job in time
+        progress = await run_blocking(PROGRESS.reporter, data.get("job_id"))
+
+        data_dict = await asession_rows(request.session, 'data_dict')
+        if not isinstance(data_dict, list) or not data_dict:
+            progress.finish(error="No data found")
+            return JsonResponse({"error": "No data found"}, status=400)
+
+        result, status = await run_blocking(
+            dispatch_employee_emails,
+            data,
+            data_dict,
+            progress,
+            quality_report=await request.session.aget('quality_report'),
+            roster_delta=await request.session.aget('roster_delta'),
+        )
+        return JsonResponse(result, status=status)
+
+    except json.JSONDecodeError:
+        logger.error("Invalid JSON format in request body")
+        return JsonResponse({"error": "Invalid JSON format"}, status=400)
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        if progress is not None:
+            progress.finish(error="Something went wrong")
+        return JsonResponse({"error": "Something went wrong"}, status=500)
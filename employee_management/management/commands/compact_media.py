@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from employee_driver_management_app.media_retention import MIN_IDLE_SECONDS, MediaRetentionManager
+
+
+class Command(BaseCommand):
+    help = "Index untracked media and evict uploads and vendor artifacts outside the retention budget"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age-days', type=float, default=settings.MEDIA_RETENTION_MAX_AGE_DAYS,
+                            help='Remove entries created longer ago than this (0 disables)')
+        parser.add_argument('--max-bytes', type=int, default=settings.MEDIA_RETENTION_MAX_BYTES,
+                            help='Evict least recently used entries until MEDIA_ROOT fits this size (0 disables)')
+        parser.add_argument('--min-age', type=float, default=MIN_IDLE_SECONDS,
+                            help='Seconds an untracked item must be idle before it is indexed')
+        parser.add_argument('--dry-run', action='store_true', help='Only list what would be removed')
+
+    def handle(self, *args, **options):
+        manager = MediaRetentionManager(
+            root=settings.MEDIA_ROOT,
+            max_age=options['max_age_days'] * 86400,
+            max_bytes=options['max_bytes'],
+        )
+        added = manager.rebuild(min_age=options['min_age'])
+        self.stdout.write(f"Indexed {added} untracked items")
+
+        victims = manager.enforce(dry_run=options['dry_run'])
+        for victim in victims:
+            self.stdout.write(f"  {victim['reason']:<8}{victim['size'] / (1024 * 1024):>10.1f} MB  {victim['path']}")
+
+        usage = manager.usage()
+        action = 'Would remove' if options['dry_run'] else 'Removed'
+        freed = sum(victim['size'] for victim in victims)
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {len(victims)} entries ({freed / (1024 * 1024):.1f} MB); "
+            f"{usage['entries']} entries ({usage['bytes'] / (1024 * 1024):.1f} MB) tracked"
+        ))
@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from employee_driver_management_app.mail_transports import SMTPConnectionPool, SpoolRelay
+from employee_management.views import Config
+
+
+class Command(BaseCommand):
+    help = "Deliver messages spooled by EMAIL_TRANSPORT=spool over pooled SMTP connections"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--spool-dir', default=settings.EMAIL_SPOOL_DIR)
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent SMTP connections')
+        parser.add_argument('--max-attempts', type=int, default=5, help='Attempts before a message moves to failed/')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between spool scans')
+        parser.add_argument('--once', action='store_true', help='Drain the spool once and exit')
+
+    def handle(self, *args, **options):
+        pool = SMTPConnectionPool(
+            Config.EMAIL_HOST, Config.EMAIL_PORT, Config.EMAIL_USE_TLS,
+            Config.EMAIL_HOST_USER, Config.EMAIL_HOST_PASSWORD, size=options['workers'],
+        )
+        relay = SpoolRelay(options['spool_dir'], pool, workers=options['workers'],
+                           max_attempts=options['max_attempts'])
+
+        recovered = relay.recover()
+        if recovered:
+            self.stdout.write(f"Requeued {recovered} messages left claimed by an earlier relay")
+
+        try:
+            while True:
+                result = relay.drain()
+                if result['delivered'] or result['failed']:
+                    self.stdout.write(f"Delivered {result['delivered']}, failed {result['failed']}")
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            pool.close()
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger('django')
+
+
+class RosterDeltaEngine:
+    """
+    Diffs two roster uploads keyed on a recipient column using per-row hashes
+
+    The delta is kept in the session, so it holds counts plus one key list:
+    the added and changed keys to notify, or, when that is the longer one,
+    the unchanged keys to skip. Either way it lists at most half of the
+    roster's recipients.
+    """
+
+    # Key values that never identify a recipient
+    EMPTY_KEYS = {'', 'n/a', 'nan', 'none'}
+
+    def __init__(self, key_column: str):
+        self.key_column = key_column
+
+    def _hash_by_key(self, records: List[Dict[str, Any]], columns: List[str]) -> pd.Series:
+        """
+        Hashes every row over ``columns`` and groups the hashes by normalized key
+
+        Args:
+            records: Roster rows as stored in the session
+            columns: Columns that take part in the comparison
+
+        Returns:
+            pd.Series: Sorted tuple of row hashes indexed by key
+        """
+        import pandas as pd
+
+        frame = pd.DataFrame.from_records(records, columns=columns).astype(str)
+        keys = frame[self.key_column].str.strip().str.lower()
+        row_hashes = pd.util.hash_pandas_object(frame, index=False)
+
+        valid = ~keys.isin(self.EMPTY_KEYS)
+        # A recipient may own several rows, so compare the whole set of their rows
+        return row_hashes[valid].groupby(keys[valid].values).agg(lambda h: tuple(sorted(h)))
+
+    def diff(self, previous: List[Dict[str, Any]], current: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Compares the current upload against the previous dataset
+
+        Args:
+            previous: Rows of the previous upload (may be empty)
+            current: Rows of the new upload
+
+        Returns:
+            Optional[Dict[str, Any]]: Counts and the keys to notify (or to skip), or
+            None if the key column is missing from the new upload
+        """
+        import pandas as pd
+
+        current_columns = list(current[0].keys()) if current else []
+        if self.key_column not in current_columns:
+            logger.warning(f"Roster delta skipped: key column '{self.key_column}' not found")
+            return None
+
+        previous_columns = list(previous[0].keys()) if previous else []
+        if self.key_column not in previous_columns:
+            previous = []
+
+        # Only columns present in both uploads can tell whether a row changed
+        shared_columns = [column for column in current_columns if column in previous_columns] or current_columns
+
+        current_hashes = self._hash_by_key(current, shared_columns)
+        previous_hashes = self._hash_by_key(previous, shared_columns) if previous else pd.Series(dtype=object)
+
+        current_keys = set(current_hashes.index)
+        previous_keys = set(previous_hashes.index)
+        common_keys = sorted(current_keys & previous_keys)
+
+        changed = [key for key in common_keys if current_hashes[key] != previous_hashes[key]]
+        added = sorted(current_keys - previous_keys)
+        notify = sorted(added + changed)
+        delta = {
+            'key_column': self.key_column,
+            'added_count': len(added),
+            'removed_count': len(previous_keys - current_keys),
+            'changed_count': len(changed),
+            'unchanged_count': len(common_keys) - len(changed),
+        }
+        if len(notify) <= delta['unchanged_count']:
+            delta['notify_keys'] = notify
+        else:
+            delta['skip_keys'] = sorted(current_keys - set(notify))
+
+        logger.info(
+            f"Roster delta on '{self.key_column}': {delta['added_count']} added, {delta['removed_count']} removed, "
+            f"{delta['changed_count']} changed, {delta['unchanged_count']} unchanged"
+        )
+        return delta
+
+    def filter_changed(self, rows: List[Dict[str, Any]], delta: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Keeps only the rows that belong to added or changed recipients
+
+        Args:
+            rows: Current roster rows
+            delta: Result of :meth:`diff`
+
+        Returns:
+            List[Dict[str, Any]]: Rows to notify
+        """
+        def key(row: Dict[str, Any]) -> str:
+            return str(row.get(self.key_column, '')).strip().lower()
+
+        if 'skip_keys' in delta:
+            skip = set(delta['skip_keys'])
+            return [row for row in rows if key(row) not in skip and key(row) not in self.EMPTY_KEYS]
+        notify = set(delta['notify_keys'])
+        return [row for row in rows if key(row) in notify]
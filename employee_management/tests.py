@@ -1,3 +1,107 @@
-from django.test import TestCase
+import json
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.cache import SessionStore
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from employee_driver_management_app.progress import PROGRESS
+
+from . import views
+from .roster_delta import RosterDeltaEngine
+from .views import group_rows_by_recipient
+
+
+def roster(*rows):
+    return [{'Email': email, 'Shift': shift} for email, shift in rows]
+
+
+class RosterDeltaEngineTests(SimpleTestCase):
+    def setUp(self):
+        self.engine = RosterDeltaEngine('Email')
+
+    def test_counts_added_removed_and_changed_recipients(self):
+        previous = roster(('a@x.com', 'AM'), ('b@x.com', 'AM'), ('c@x.com', 'PM'), ('d@x.com', 'PM'), ('e@x.com', 'PM'))
+        current = roster(('a@x.com', 'AM'), ('b@x.com', 'PM'), ('c@x.com', 'PM'), ('d@x.com', 'PM'), ('f@x.com', 'AM'))
+
+        delta = self.engine.diff(previous, current)
+        self.assertEqual(
+            {key: delta[key] for key in ('added_count', 'removed_count', 'changed_count', 'unchanged_count')},
+            {'added_count': 1, 'removed_count': 1, 'changed_count': 1, 'unchanged_count': 3},
+        )
+        # Fewer recipients to notify than to skip, so the notify list is the one kept
+        self.assertEqual(delta['notify_keys'], ['b@x.com', 'f@x.com'])
+        self.assertNotIn('skip_keys', delta)
+        self.assertEqual([row['Email'] for row in self.engine.filter_changed(current, delta)], ['b@x.com', 'f@x.com'])
+
+    def test_mostly_new_roster_stores_the_unchanged_keys(self):
+        previous = roster(('a@x.com', 'AM'))
+        current = roster(('a@x.com', 'AM'), ('b@x.com', 'AM'), ('c@x.com', 'AM'), ('N/A', 'AM'))
+
+        delta = self.engine.diff(previous, current)
+        self.assertEqual(delta['skip_keys'], ['a@x.com'])
+        self.assertNotIn('notify_keys', delta)
+        self.assertEqual([row['Email'] for row in self.engine.filter_changed(current, delta)], ['b@x.com', 'c@x.com'])
+
+    def test_a_recipient_with_several_rows_changes_as_a_whole(self):
+        previous = roster(('a@x.com', 'AM'), ('a@x.com', 'PM'), ('b@x.com', 'AM'))
+        current = roster(('a@x.com', 'PM'), ('a@x.com', 'AM'), ('b@x.com', 'AM'))
+        delta = self.engine.diff(previous, current)
+        self.assertEqual(delta['changed_count'], 0)
+
+        current = roster(('a@x.com', 'PM'), ('a@x.com', 'NIGHT'), ('b@x.com', 'AM'))
+        delta = self.engine.diff(previous, current)
+        self.assertEqual(len(self.engine.filter_changed(current, delta)), 2)
+
+    def test_columns_missing_from_one_upload_are_ignored(self):
+        previous = [{'Email': 'a@x.com', 'Shift': 'AM'}]
+        current = [{'Email': 'a@x.com', 'Shift': 'AM', 'Cab': '12'}]
+        self.assertEqual(self.engine.diff(previous, current)['changed_count'], 0)
+
+    def test_missing_key_column_gives_no_delta(self):
+        self.assertIsNone(self.engine.diff(roster(('a@x.com', 'AM')), [{'Name': 'Asha'}]))
+
+
+class GroupRowsByRecipientTests(SimpleTestCase):
+    def test_rows_are_grouped_case_insensitively_in_first_seen_order(self):
+        rows = [
+            {'Email': 'b@x.com', 'Shift': 'AM'},
+            {'Email': ' A@x.com', 'Shift': 'AM'},
+            {'Email': 'B@X.com ', 'Shift': 'PM'},
+            {'Email': 'a@x.com', 'Shift': 'PM'},
+        ]
+        grouped = group_rows_by_recipient(rows, 'Email')
+
+        # Each message goes to the spelling on the recipient's first row
+        self.assertEqual(list(grouped), ['b@x.com', 'A@x.com'])
+        self.assertEqual([row['Shift'] for row in grouped['b@x.com']], ['AM', 'PM'])
+        self.assertEqual([row['Shift'] for row in grouped['A@x.com']], ['AM', 'PM'])
+
+    def test_empty_roster(self):
+        self.assertEqual(group_rows_by_recipient([], 'Email'), {})
+
+
+class SendProgressTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.settings = override_settings(PROGRESS_DIR=directory.name)
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+
+    def test_channel_exists_before_the_rows_are_loaded(self):
+        def load_rows(session, key):
+            # A slow load must not make the progress stream give up on the job
+            self.assertIsNotNone(PROGRESS.tail('job-12345678'))
+            return []
+
+        request = RequestFactory().post('/ok', json.dumps({'job_id': 'job-12345678'}), content_type='application/json')
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+        with mock.patch.object(views, 'session_rows', side_effect=load_rows):
+            response = views.send_employee_emails(request)
+
+        self.assertEqual(response.status_code, 400)
+        events = PROGRESS.tail('job-12345678').read()
+        self.assertEqual(events[-1][1:], ('done', {'error': 'No data found'}))
@@ -1,15 +1,20 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# I/O-bound endpoints run as coroutines when served under ASGI
+io_views = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
 
     # path('', views.handle_employee_form, name='handle_employee_form'),
     path('employee_management/', views.handle_employee_form, name='handle_employee_form'),
-    path('ok', views.send_employee_emails, name='send_employee_emails'),
-    path('search_employee_data/', views.search_employee_data, name='search_employee_data'),
-    path('sort_employee_data/', views.sort_employee_data, name='sort_employee_data'),
+    path('ok', io_views.send_employee_emails, name='send_employee_emails'),
+    path('search_employee_data/', io_views.search_employee_data, name='search_employee_data'),
+    path('sort_employee_data/', io_views.sort_employee_data, name='sort_employee_data'),
+    path('export_employee_data/', io_views.export_employee_data, name='export_employee_data'),
     path('employee_message_template/', views.employee_message_template, name='employee_message_template'),   
-    path('fetch-columns/', views.fetch_columns, name='fetch_columns'),  
+    path('fetch-columns/', io_views.fetch_columns, name='fetch_columns'),  
 
 ]
 
@@ -1,18 +1,42 @@
+from __future__ import annotations
+
 import logging
-import pandas as pd
+from typing import TYPE_CHECKING
 from django.core.files.storage import FileSystemStorage
 from django.contrib import messages
 from django.shortcuts import render, redirect
 from django.http import HttpRequest, HttpResponse
 from concurrent.futures import ThreadPoolExecutor
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 from django.http import JsonResponse
 from django.conf import settings
 from dotenv import load_dotenv
-import smtplib
 import os
 import json
+import time
+from employee_driver_management_app.responses import table_response
+from employee_driver_management_app.exports import export_response
+from employee_driver_management_app.dataset_store import (
+    session_batches, session_columns, session_head, session_row_count, session_rows, session_view, store_session_rows,
+)
+from employee_driver_management_app.data_quality import DataQualityChecker
+from employee_driver_management_app.column_projection import ColumnProjection, columns_from_env
+from employee_driver_management_app.sheet_ingest import (
+    SheetIngestError, parse_sheet_selection, read_workbook_sheets,
+)
+from employee_driver_management_app.dispatch_plan import DispatchPlan
+from employee_driver_management_app.mail_transports import get_transport
+from employee_driver_management_app.media_retention import get_retention_manager
+from employee_driver_management_app.memory_budget import MemoryBudgetExceeded, PeakMemory, check_memory_budget
+from employee_driver_management_app.progress import PROGRESS
+from employee_driver_management_app.metrics import (
+    EMAIL_DELIVERY_SECONDS, EMAILS_FAILED, EMAILS_SENT, EMAIL_SEND_SECONDS
+)
+from .roster_delta import RosterDeltaEngine
+
+# pandas and the SMTP/MIME stack are imported on first use so that workers
+# serving only template pages don't pay for them at boot
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Configuration
 load_dotenv()
@@ -30,11 +54,18 @@ class Config:
     ALLOWED_EXTENSIONS = {'xlsx', 'xls', 'csv'}
     CHUNK_SIZE = 10000
     MAX_COLUMNS = 22
-    EMAIL_HOST = 'smtp.gmail.com'
-    EMAIL_PORT = 587
+    EMAIL_HOST = os.getenv("EMAIL_HOST", 'smtp.gmail.com')
+    EMAIL_PORT = int(os.getenv("EMAIL_PORT", 587))
+    EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "true").lower() == "true"  # Disable only for local SMTP sinks
+    EMAIL_TRANSPORT = os.getenv("EMAIL_TRANSPORT", "smtp")  # smtp, spool, memory or file
     EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
     EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
     MAX_WORKERS = 5  # For parallel email processing
+    DELTA_KEY_COLUMN = os.getenv("ROSTER_DELTA_KEY", "Email")  # Column that identifies a recipient across uploads
+    EMAIL_COLUMN = "Email"
+    REQUIRED_FIELDS = ["Email"]  # Rows missing any of these are excluded from sends
+    COLUMN_WHITELIST = columns_from_env("EMPLOYEE_COLUMNS")  # Optional; replaces the first-MAX_COLUMNS rule
+    TABLE_PREVIEW_ROWS = 500  # Rows rendered with the page; search and sort fetch the rest
 
 class FileHandler:
     @staticmethod
@@ -54,29 +85,53 @@ class FileHandler:
 
     """Process uploaded file and return DataFrame."""
     @staticmethod
-    def process_file(file_path: str) -> pd.DataFrame:
+    def process_file(file_path: str, sheets=None) -> pd.DataFrame:
+        import pandas as pd
+
         logger.info(f"Starting to process file: {file_path}")
+        sheet_report = None
         
         try:
+            # Only the first MAX_COLUMNS (or whitelisted) columns plus the required ones are decoded
+            projection = ColumnProjection(Config.MAX_COLUMNS, Config.REQUIRED_FIELDS, Config.COLUMN_WHITELIST)
+
+            # Sample the file first; refuse it before parsing if it won't fit the memory budget
+            memory_estimate = check_memory_budget(file_path, sheets, projection=projection)
+
             # Check if the file is a CSV
             if file_path.endswith('.csv'):
                 logger.info("File type: CSV")
                 logger.debug(f"Reading CSV in chunks of size: {Config.CHUNK_SIZE}")
-                chunks = pd.read_csv(file_path, chunksize=Config.CHUNK_SIZE, encoding='utf-8', low_memory=False)
+                header = pd.read_csv(file_path, nrows=0, encoding='utf-8').columns
+                chunks = pd.read_csv(file_path, chunksize=Config.CHUNK_SIZE, encoding='utf-8', low_memory=False,
+                                     usecols=projection.usecols(header))
                 data = pd.concat(chunks, ignore_index=True)
                 data = data.map(lambda x: x.strip() if isinstance(x, str) else x)
                 logger.info("CSV file successfully processed and concatenated.")
             else:
                 logger.info("File type: Excel")
-                data = pd.read_excel(file_path)
+                # Every (or every selected) sheet, validated per sheet, as one dataset
+                data = read_workbook_sheets(file_path, Config.REQUIRED_FIELDS, sheets, projection=projection)
+                sheet_report = data.attrs['sheet_report']
                 logger.info("Excel file successfully processed.")
 
             # Displaying the shape and head of the DataFrame for debugging
             logger.debug(f"DataFrame shape: {data.shape}")
             logger.debug(f"DataFrame head: \n{data.head()}")
 
-            # Limiting columns and filling NaN values
-            processed_data = data.iloc[:, :Config.MAX_COLUMNS].fillna("N/A")
+            # Validate recipients before NaN values are masked by the fill below
+            quality_report = DataQualityChecker(
+                email_columns=[Config.EMAIL_COLUMN],
+                required_columns=Config.REQUIRED_FIELDS,
+                recipient_column=Config.EMAIL_COLUMN,
+            ).check(data)
+
+            # Columns were already limited by the projection; fill NaN values
+            processed_data = data.fillna("N/A")
+            if sheet_report:
+                quality_report['sheets'] = sheet_report
+            quality_report['memory'] = memory_estimate
+            processed_data.attrs['quality_report'] = quality_report
             logger.info("Data processing completed with column limit and NaN handling.")
             return processed_data
 
@@ -91,43 +146,120 @@ class EmailService:
         self.sender_password = Config.EMAIL_HOST_PASSWORD
         self.smtp_host = Config.EMAIL_HOST
         self.smtp_port = Config.EMAIL_PORT
+        self.use_tls = Config.EMAIL_USE_TLS
         self.img_path = Config.BANNER_IMAGE_PATH
+        self.transport = get_transport(Config.EMAIL_TRANSPORT, self.smtp_host, self.smtp_port, self.use_tls,
+                                       self.sender_email, self.sender_password)
     
+    def build_message(self, subject, body, recipient):
+        """Build the MIME message for one recipient without sending it."""
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+
+        msg = MIMEMultipart()
+        msg['From'] = self.sender_email or ''
+        msg['To'] = recipient
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'html'))
+        return msg
+
+    def deliver(self, msg):
+        """Hand a built message to the configured transport (SMTP, spool, ...)."""
+        started = time.perf_counter()
+        self.transport.send(msg)
+        # Delivery alone, so dry-run estimates don't count message building twice
+        EMAIL_DELIVERY_SECONDS.observe(time.perf_counter() - started, app="employee")
+
     def send_email(self, subject, body, recipient):
+        import smtplib
+
         if not isinstance(recipient, str) or '@' not in recipient:
             logger.warning(f"Invalid email format: {recipient}")
+            EMAILS_FAILED.inc(app="employee")
             return False
 
+        started = time.perf_counter()
         try:
-            msg = MIMEMultipart()
-            msg['From'] = self.sender_email
-            msg['To'] = recipient
-            msg['Subject'] = subject
-            msg.attach(MIMEText(body, 'html'))
-
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.sender_email, self.sender_password)
-                server.send_message(msg)
+            self.deliver(self.build_message(subject, body, recipient))
 
             logger.info(f"Email sent successfully to {recipient}")
+            EMAILS_SENT.inc(app="employee")
+            EMAIL_SEND_SECONDS.observe(time.perf_counter() - started, app="employee")
             return True
 
         except smtplib.SMTPException as e:
             logger.error(f"SMTP error while sending email to {recipient}: {str(e)}")
         except Exception as e:
             logger.error(f"Unexpected error while sending email to {recipient}: {str(e)}")
+        EMAILS_FAILED.inc(app="employee")
         return False
 
+    @staticmethod
+    def format_employee_details(row, selected_details):
+        """Render one roster row's selected columns as an HTML block."""
+        return """
+            <div style="padding: 12px; font-size: 16px; background-color: #eef3ff; 
+                        border-left: 5px solid #4a90e2; margin: 12px 0;">
+                <p style="margin: 0; line-height: 1.6;">""" + "<br>".join(
+                    [f"• <strong>{col}</strong>: {row.get(col, '')}" for col in selected_details]
+                ) + """</p>
+            </div>
+            """
+
+    @staticmethod
+    def format_employee_email_body(top_template, bottom_template, details_html):
+        """Wrap the rendered detail blocks with the top and bottom templates."""
+        return f"""
+            <p>{top_template}</p<br>
+            <div style="
+                padding: 16px; 
+                font-size: 15px; 
+                background: linear-gradient(135deg, #f0f7ff, #dbe9ff); 
+                border-radius: 10px;
+                box-shadow: 0 4px 10px rgba(53, 114, 239, 0.15);
+                font-family: 'Segoe UI', Arial, sans-serif;
+                color: #2c3e50;
+                font-weight: 500;
+                line-height: 1.6;
+                text-align: left;
+            ">
+                {details_html}
+            </div>  
+            <p>{bottom_template}</p>
+            """
+
+
+def group_rows_by_recipient(rows, email_column):
+    """Group roster rows by normalized recipient email in a single pandas pass."""
+    if not rows:
+        return {}
+
+    import pandas as pd
+
+    emails = pd.Series([str(row.get(email_column, "")).strip() for row in rows])
+    positions = emails.groupby(emails.str.lower(), sort=False).indices
 
+    # Address the message to the spelling used on the recipient's first row
+    return {
+        emails.iat[indexes[0]]: [rows[i] for i in indexes]
+        for indexes in positions.values()
+    }
 
 
 
+
+
+def employee_form_context(request: HttpRequest) -> dict:
+    """Page context with a preview of the stored roster rather than every row"""
+    return {'data_dict': session_head(request.session, 'data_dict', Config.TABLE_PREVIEW_ROWS),
+            'row_count': session_row_count(request.session, 'data_dict'),
+            'quality_report': request.session.get('quality_report')}
+
+
 """Handle file upload and process employee data."""
 def handle_employee_form(request: HttpRequest) -> HttpResponse:
     if request.method != 'POST':
-        return render(request, 'front/employee.html', 
-                     {'data_dict': request.session.get('data_dict')})
+        return render(request, 'front/employee.html', employee_form_context(request))
     try:
         uploaded_file = request.FILES.get('employee_file')
         is_valid, error_message = FileHandler.validate_file(uploaded_file)
@@ -142,19 +274,44 @@ def handle_employee_form(request: HttpRequest) -> HttpResponse:
         fs = FileSystemStorage(location=employee_media_path)
         file_path = fs.save(uploaded_file.name, uploaded_file)
         full_path = fs.path(file_path)
+        get_retention_manager().track(full_path, 'upload')
         
         logging.info(f'Full Path is {full_path} and File path {file_path}')
 
         try:
-            data = FileHandler.process_file(full_path)
-            if data.empty:
-                raise ValueError("The uploaded file contains no data")
-
-            data_dict = data.to_dict(orient='records')
-            request.session['data_dict'] = data_dict
+            # Measured up to the session records, the point where the upload's memory use peaks
+            with PeakMemory(f"upload {uploaded_file.name}", "employee") as peak:
+                data = FileHandler.process_file(full_path, parse_sheet_selection(request.POST.get('sheets')))
+                if data.empty:
+                    raise ValueError("The uploaded file contains no data")
+
+                data_dict = data.to_dict(orient='records')
+            quality_report = data.attrs.get('quality_report')
+            quality_report['memory']['peak_bytes'] = peak.peak_bytes
+
+            # Diff against the previous upload so sends can target changed rows only; a first
+            # upload has nothing to compare against, so every row is new and no delta is kept
+            previous_data = session_rows(request.session, 'data_dict')
+            delta = RosterDeltaEngine(Config.DELTA_KEY_COLUMN).diff(previous_data, data_dict) if previous_data else None
+
+            store_session_rows(request.session, 'data_dict', data_dict)
+            request.session['roster_delta'] = delta
+            request.session['quality_report'] = quality_report
             messages.success(request, 'File uploaded and processed successfully!')
+            if delta:
+                messages.info(request, (
+                    f"Roster changes: {delta['added_count']} added, {delta['removed_count']} removed, "
+                    f"{delta['changed_count']} changed"
+                ))
+        except SheetIngestError as e:
+            logger.error(f"Sheet ingestion error: {str(e)}")
+            messages.error(request, str(e))
+        except MemoryBudgetExceeded as e:
+            logger.error(f"Upload over memory budget: {str(e)}")
+            messages.error(request, str(e))
         except Exception as e:
-            logging.error(f"Error is: {str(e)}")
+            logger.error(f"Error processing employee upload: {str(e)}", exc_info=True)
+            messages.error(request, f"Error processing file: {str(e)}")
 
         # finally:
         #     fs.delete(file_path)
@@ -163,46 +320,42 @@ def handle_employee_form(request: HttpRequest) -> HttpResponse:
         logger.error(f"Error processing file: {str(e)}", exc_info=True)
         messages.error(request, f"Error processing file: {str(e)}")
 
-    return render(request, 'front/employee.html', 
-                 {'data_dict': request.session.get('data_dict')})
+    return render(request, 'front/employee.html', employee_form_context(request))
 
 
 
 def search_employee_data(request):
     search_query = request.GET.get('search', '').strip().lower()
-    data_dict = request.session.get('data_dict', [])
 
     # If a search query exists, filter the data
-    if search_query:
-        filtered_data = [
-            row for row in data_dict
-            if any(search_query in str(value).lower() for value in row.values())
-        ]
-    else:
-        filtered_data = data_dict  # Show all data if no search query
-    return JsonResponse({'data': filtered_data})
+    filtered_data = session_view(request.session, 'data_dict', search_query)
+    return table_response(request, filtered_data)
 
 
 
 def sort_employee_data(request):
     column = request.GET.get('column')
     direction = request.GET.get('direction', 'asc')
-    data_dict = request.session.get('data_dict', [])
-
-    # Your data (assuming data_dict is available)
-    data_list = list(data_dict)  # Convert QuerySet to list if needed
 
     # Sorting logic
-    sorted_data = sorted(data_list, key=lambda x: x[column], reverse=(direction == "desc"))
+    sorted_data = session_view(request.session, 'data_dict', '', column, direction)
+
+    return table_response(request, sorted_data)
+
 
-    return JsonResponse({"data": sorted_data})
+def export_employee_data(request):
+    search_query = request.GET.get('search', '').strip().lower()
+    column = request.GET.get('column')
+    direction = request.GET.get('direction', 'asc')
+
+    # Export exactly what the table shows: current search, then current sort
+    columns, batches = session_batches(request.session, 'data_dict', search_query, column, direction)
+    return export_response(request, columns, batches, 'employee_roster')
 
 
 def fetch_columns(request):
-    data_dict = request.session.get('data_dict', [])
-    
-    # Extract column names from the first dictionary entry if available
-    columns = list(data_dict[0].keys()) if data_dict else []
+    # Read from the dataset's schema (or its first row) without loading the rows
+    columns = session_columns(request.session, 'data_dict')
 
     return JsonResponse({"columns": columns})
 
@@ -213,88 +366,126 @@ def employee_message_template(request):
 
 
 
+def dispatch_employee_emails(data, data_dict, progress, quality_report=None, roster_delta=None):
+    """
+    Send roster emails for a parsed request payload.
+
+    Shared by the sync and async send views; takes the session values as
+    arguments so it can run on a worker thread. With ``dry_run`` in the
+    payload the messages are built but not sent, and a plan is returned.
+    ``progress`` is the job's reporter, created by the view before it loaded
+    the rows so the progress stream finds the job in time.
+
+    Returns:
+        tuple[dict, int]: JSON response body and HTTP status
+    """
+    top_template = data.get("top_template", "").strip()
+    bottom_template = data.get("bottom_template", "").strip()
+    selected_details = data.get("selected_details", [])
+    changed_only = bool(data.get("changed_only", False))
+    dry_run = bool(data.get("dry_run", False))
+
+    logger.info("Top Template: %s", top_template, extra={'payload': True})
+    logger.info(f"Selected Details: {selected_details}")
+    logger.info("Bottom Template: %s", bottom_template, extra={'payload': True})
+
+    # Rows with invalid or missing emails were flagged at upload time
+    data_dict = DataQualityChecker.valid_rows(data_dict, quality_report)
+
+    if changed_only:
+        if not roster_delta:
+            error = "No roster changes recorded; upload a previous roster first to compare against"
+            progress.finish(error=error)
+            return {"error": error}, 400
+        data_dict = RosterDeltaEngine(roster_delta['key_column']).filter_changed(data_dict, roster_delta)
+        logger.info(f"Changed-only mode: notifying {len(data_dict)} rows")
+
+    # One message per recipient, covering every row they appear on
+    recipient_rows = group_rows_by_recipient(data_dict, Config.EMAIL_COLUMN)
+
+    progress.stage("plan" if dry_run else "send", len(recipient_rows))
+    email_service = EmailService()
+    plan = DispatchPlan("employee") if dry_run else None
+    email_sent_count = 0
+    rows_covered = 0
+    failed_emails = []
+
+    for email, rows in recipient_rows.items():
+        details_html = "".join(EmailService.format_employee_details(row, selected_details) for row in rows)
+        email_body = EmailService.format_employee_email_body(top_template, bottom_template, details_html)
+
+        if dry_run:
+            # Build the exact message SMTP would receive, but don't send it
+            plan.add(email, email_service.build_message("Roster Updated", email_body, email), rows=len(rows))
+            progress.step(recipient=email, rows=len(rows))
+            continue
+
+        logger.info(f"Sending email to {email} covering {len(rows)} row(s)")
+        logger.info("Email body for %s:\n%s", email, email_body, extra={'payload': True})
+
+        sent = email_service.send_email(subject="Roster Updated", body=email_body, recipient=email)
+        if sent:
+            email_sent_count += 1
+            rows_covered += len(rows)
+            logger.info(f"Successfully sent email to {email}")
+        else:
+            failed_emails.append(email)
+        progress.step(sent, recipient=email, rows=len(rows))
+
+    if dry_run:
+        result = {"status": "success", "dry_run": True, "total_rows": len(data_dict),
+                  "changed_only": changed_only, "plan": plan.result()}
+        progress.finish(**result)
+        return result, 200
+
+    result = {
+        "status": "success",
+        "emails_sent": email_sent_count,
+        "messages_sent": email_sent_count,
+        "rows_covered": rows_covered,
+        "total_rows": len(data_dict),
+        "failed_emails": failed_emails or None,
+        "changed_only": changed_only,
+    }
+    progress.finish(**result)
+    return result, 200
+
+
 def send_employee_emails(request):
     if request.method != 'POST':
         return JsonResponse({"error": "Invalid request method"}, status=400)
 
+    progress = None
     try:
         data = json.loads(request.body.decode("utf-8"))
-        logger.info(f"Received Data: {data}")
-        
-        top_template = data.get("top_template", "").strip()
-        bottom_template = data.get("bottom_template", "").strip()
-        selected_details = data.get("selected_details", [])
+        # Payload logs use lazy %-formatting so sampled-out records are never rendered
+        logger.info("Received Data: %s", data, extra={'payload': True})
+        # Live progress for the send popup (a no-op without a job id), created before the rows are
+        # loaded so the progress stream finds the job within JOB_START_SECONDS
+        progress = PROGRESS.reporter(data.get("job_id"))
 
-        logger.info(f"Top Template: {top_template}")
-        logger.info(f"Selected Details: {selected_details}")
-        logger.info(f"Bottom Template: {bottom_template.encode('ascii', 'ignore').decode()}")
-
-        data_dict = request.session.get('data_dict', [])
+        data_dict = session_rows(request.session, 'data_dict')
         if not isinstance(data_dict, list) or not data_dict:
             messages.error(request, "No data found. Please upload a valid file first.")
+            progress.finish(error="No data found")
             return JsonResponse({"error": "No data found"}, status=400)
 
-        email_service = EmailService()
-        email_sent_count = 0
-
-        for row in data_dict:
-            email = row.get("Email", "").strip()
-            if not email or '@' not in email:
-                logger.warning(f"Skipping row due to missing or invalid email: {row}")
-                continue
-            
-            # Convert employee data to HTML format
-            each_employee_data = """
-            <div style="padding: 12px; font-size: 16px; background-color: #eef3ff; 
-                        border-left: 5px solid #4a90e2; margin: 12px 0;">
-                <p style="margin: 0; line-height: 1.6;">""" + "<br>".join(
-                    [f"• <strong>{col}</strong>: {row.get(col, '')}" for col in selected_details]
-                ) + """</p>
-            </div>
-            """
-
-            # Construct full email body in HTML format
-            email_body = f"""
-            <p>{top_template}</p<br>
-            <div style="
-                padding: 16px; 
-                font-size: 15px; 
-                background: linear-gradient(135deg, #f0f7ff, #dbe9ff); 
-                border-radius: 10px;
-                box-shadow: 0 4px 10px rgba(53, 114, 239, 0.15);
-                font-family: 'Segoe UI', Arial, sans-serif;
-                color: #2c3e50;
-                font-weight: 500;
-                line-height: 1.6;
-                text-align: left;
-            ">
-                {each_employee_data}
-            </div>  
-            <p>{bottom_template}</p>
-            """
-
-            logger.info(f"Sending email to {email} with body:\n{email_body}")
-
-            try:
-                email_service.send_email(
-                    subject="Roster Updated",
-                    body=email_body,
-                    recipient=email,
-                )
-                email_sent_count += 1
-                logger.info(f"Successfully sent email to {email}")
-                
-                
-            except Exception as e:
-                logger.error(f"Failed to send email to {email}: {str(e)}")
-
-        return JsonResponse({"status": "success", "emails_sent": email_sent_count})
+        result, status = dispatch_employee_emails(
+            data,
+            data_dict,
+            progress,
+            quality_report=request.session.get('quality_report'),
+            roster_delta=request.session.get('roster_delta'),
+        )
+        return JsonResponse(result, status=status)
 
     except json.JSONDecodeError:
         logger.error("Invalid JSON format in request body")
         return JsonResponse({"error": "Invalid JSON format"}, status=400)
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}")
+        if progress is not None:
+            progress.finish(error="Something went wrong")
         return JsonResponse({"error": "Something went wrong"}, status=500)
 
 
@@ -0,0 +1,109 @@
+"""
+Async variants of the I/O-bound vendor endpoints.
+
+Selected by ``settings.ASYNC_VIEWS`` when the app is served under ASGI. Image
+rendering and SMTP delivery run on the shared executor so a long vendor batch
+doesn't hold the event loop.
+"""
+import json
+import logging
+
+from django.http import HttpRequest, HttpResponse, JsonResponse
+
+from employee_driver_management_app.async_utils import run_blocking
+from employee_driver_management_app.dataset_store import (
+    asession_batches, asession_columns, asession_row_count, asession_rows, asession_view,
+)
+from employee_driver_management_app.exports import aexport_response
+from employee_driver_management_app.data_quality import DataQualityChecker
+from employee_driver_management_app.progress import PROGRESS
+from employee_driver_management_app.responses import atable_response
+from .summary import build_vendor_summary, is_current, summary_payload
+from .views import dispatch_vendor_emails
+
+logger = logging.getLogger('django')
+
+
+async def search_vendor_data(request: HttpRequest) -> HttpResponse:
+    search_query = request.GET.get('search', '').strip().lower()
+
+    filtered_data = await asession_view(request.session, 'vendor_data_dict', search_query)
+    return atable_response(request, filtered_data)
+
+
+async def sort_vendor_data(request: HttpRequest) -> HttpResponse:
+    column = request.GET.get('column')
+    direction = request.GET.get('direction', 'asc')
+
+    sorted_data = await asession_view(request.session, 'vendor_data_dict', '', column, direction)
+    return atable_response(request, sorted_data)
+
+
+async def export_vendor_data(request: HttpRequest) -> HttpResponse:
+    search_query = request.GET.get('search', '').strip().lower()
+    column = request.GET.get('column')
+    direction = request.GET.get('direction', 'asc')
+
+    columns, batches = await asession_batches(request.session, 'vendor_data_dict', search_query, column, direction)
+    return await aexport_response(request, columns, batches, 'vendor_roster')
+
+
+async def vendor_summary(request: HttpRequest) -> HttpResponse:
+    summary = await request.session.aget('vendor_summary')
+    if not is_current(summary, await asession_row_count(request.session, 'vendor_data_dict')):
+        # Datasets stored before summaries existed are summarized once and kept
+        data_dict = await asession_rows(request.session, 'vendor_data_dict')
+        quality_report = await request.session.aget('vendor_quality_report')
+        summary = await run_blocking(build_vendor_summary, data_dict, quality_report)
+        await request.session.aset('vendor_summary', summary)
+
+    payload = summary_payload(summary, request.GET.get('vendor'))
+    if payload is None:
+        return JsonResponse({"error": "Unknown vendor"}, status=404)
+    return JsonResponse(payload)
+
+
+async def fetch_columns_vendor(request: HttpRequest) -> HttpResponse:
+    columns = await asession_columns(request.session, 'vendor_data_dict')
+    return JsonResponse({"columns": columns})
+
+
+async def send_vendor_emails(request: HttpRequest) -> HttpResponse:
+    """
+    Async counterpart of ``views.send_vendor_emails``.
+
+    Args:
+        request: HTTP request object.
+
+    Returns:
+        JsonResponse: JSON response with email processing results.
+    """
+    if request.method != 'POST':
+        logger.info("Request method is not POST")
+        return JsonResponse({"error": "Invalid method"}, status=400)
+
+    progress = None
+    try:
+        data = json.loads(request.body.decode("utf-8"))
+        # Created before the rows are loaded so the progress stream finds the job in time
+        progress = await run_blocking(PROGRESS.reporter, data.get("job_id"))
+
+        # Rows with invalid vendor emails were flagged at upload time and are skipped here.
+        stored_data = await asession_rows(request.session, 'vendor_data_dict')
+        vendor_data = DataQualityChecker.valid_rows(stored_data, await request.session.aget('vendor_quality_report'))
+        summary = await request.session.aget('vendor_summary')
+
+        # A missing or outdated summary is rebuilt from the rows being sent
+        return JsonResponse(await run_blocking(
+            dispatch_vendor_emails, data, vendor_data, progress,
+            summary if is_current(summary, len(stored_data)) else None
+        ))
+
+    except Exception as e:
+        logger.error(f"Unexpected error in send_vendor_emails: {str(e)}", exc_info=True)
+        if progress is not None:
+            progress.finish(error="An unexpected error occurred while sending emails")
+        return JsonResponse({
+            "error": "An unexpected error occurred while sending emails",
+            "details": str(e)
+        }, status=500)
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from io import BytesIO
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+from employee_driver_management_app.media_retention import get_retention_manager
+from employee_driver_management_app.metrics import ROUTE_PDFS, ROUTE_PDF_RENDER_SECONDS
+from .workspace import JobWorkspace
+
+logger = logging.getLogger('django')
+
+# Bumped whenever the page layout changes, so cached PDFs are not reused
+PDF_LAYOUT_VERSION = 1
+
+# A4 landscape, in inches
+PAGE_SIZE = (11.69, 8.27)
+
+# Table rows per page; longer routes continue on the next page
+ROWS_PER_PAGE = 25
+
+# Same colours as the route table images
+HEADER_COLOR = '#ff9900'
+STRIPE_COLOR = '#f9f9f9'
+BORDER_COLOR = '#dddddd'
+
+
+def content_hash(vendor_name: str, routes: Dict[Any, List[Dict[str, Any]]]) -> str:
+    """
+    Returns a key that changes whenever anything printed in the PDF changes
+
+    Args:
+        vendor_name: Vendor the bundle is for
+        routes: Selected details per route, in route order
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    # Column order matters for the output, so entries are hashed as ordered pairs
+    payload = [
+        PDF_LAYOUT_VERSION,
+        vendor_name,
+        [[str(route_no), [list(entry.items()) for entry in entries]] for route_no, entries in routes.items()],
+    ]
+    return hashlib.sha256(json.dumps(payload, default=str).encode('utf-8')).hexdigest()
+
+
+def render_route_pdf(vendor_name: str, routes: Dict[Any, List[Dict[str, Any]]]) -> bytes:
+    """
+    Renders every route of one vendor into a multi-page PDF, one table per route
+
+    Text is written as vector glyphs with a subset of the embedded font, so
+    a page is a few kilobytes instead of a full-size screenshot.
+
+    Args:
+        vendor_name: Vendor the bundle is for
+        routes: Selected details per route, in route order
+
+    Returns:
+        bytes: The PDF document
+    """
+    # The object-oriented API is used instead of pyplot, which keeps global state
+    import matplotlib
+    from matplotlib.backends.backend_pdf import PdfPages
+    from matplotlib.figure import Figure
+
+    buffer = BytesIO()
+    title = vendor_name.replace('_', ' ')
+    with matplotlib.rc_context({'pdf.fonttype': 42}):  # Embedded TrueType subset, selectable text
+        with PdfPages(buffer, metadata={'Title': f"{title} routes"}) as pdf:
+            for route_no, entries in routes.items():
+                columns = list(dict.fromkeys(key for entry in entries for key in entry))
+                pages = max((len(entries) + ROWS_PER_PAGE - 1) // ROWS_PER_PAGE, 1)
+                for page in range(pages):
+                    rows = entries[page * ROWS_PER_PAGE:(page + 1) * ROWS_PER_PAGE]
+                    figure = Figure(figsize=PAGE_SIZE)
+                    heading = f"{title} - Route {route_no}"
+                    figure.text(0.03, 0.95, heading if pages == 1 else f"{heading} ({page + 1}/{pages})",
+                                fontsize=14, fontweight='bold')
+                    axes = figure.add_axes((0.03, 0.03, 0.94, 0.88))
+                    axes.axis('off')
+                    if columns:
+                        _draw_table(axes, columns, rows)
+                    pdf.savefig(figure)
+    return buffer.getvalue()
+
+
+def _draw_table(axes, columns: List[str], rows: List[Dict[str, Any]]) -> None:
+    cell_text = [['' if entry.get(column) is None else str(entry.get(column)) for column in columns]
+                 for entry in rows]
+    table = axes.table(cellText=cell_text, colLabels=columns, loc='upper left', cellLoc='left')
+    table.auto_set_font_size(False)
+    table.set_fontsize(8)
+    table.auto_set_column_width(list(range(len(columns))))
+    for (row, _), cell in table.get_celld().items():
+        cell.set_edgecolor(BORDER_COLOR)
+        if row == 0:
+            cell.set_facecolor(HEADER_COLOR)
+            cell.get_text().set_color('white')
+            cell.get_text().set_fontweight('bold')
+        elif row % 2 == 0:
+            cell.set_facecolor(STRIPE_COLOR)
+
+
+class RoutePdfCache:
+    """
+    Content-addressed store of vendor route PDFs under ``MEDIA_ROOT/vendor/route_pdfs``
+
+    A bundle whose routes and selected details haven't changed since an
+    earlier batch is reused as is. Files are registered with media retention,
+    which evicts bundles that go unused.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.path.join(settings.MEDIA_ROOT, 'vendor', 'route_pdfs')
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_or_render(self, vendor_name: str, routes: Dict[Any, List[Dict[str, Any]]]) -> str:
+        """
+        Returns the path of the vendor's PDF, rendering it only on a cache miss
+
+        Args:
+            vendor_name: Vendor the bundle is for
+            routes: Selected details per route, in route order
+
+        Returns:
+            str: Path to the PDF
+        """
+        path = os.path.join(self.directory, f"{content_hash(vendor_name, routes)}.pdf")
+        retention = get_retention_manager()
+        # A hit refreshes the entry's last use. Eviction moves the file away in the same locked step
+        # that drops its entry, so if the touch missed the entry the file is checked again
+        if os.path.exists(path) and (retention.touch(path) or os.path.exists(path)):
+            ROUTE_PDFS.inc(result='hit')
+            logger.info(f"Route PDF for {vendor_name} reused from cache: {path}")
+            return path
+
+        started = time.perf_counter()
+        # Written atomically, so concurrent batches rendering the same bundle never see a partial file
+        JobWorkspace.atomic_write(path, render_route_pdf(vendor_name, routes))
+        ROUTE_PDF_RENDER_SECONDS.observe(time.perf_counter() - started)
+        ROUTE_PDFS.inc(result='render')
+        retention.track(path, 'route_pdf')
+        logger.info(f"Route PDF for {vendor_name} ({len(routes)} routes) saved: {path}")
+        return path
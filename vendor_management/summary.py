@@ -0,0 +1,139 @@
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from employee_driver_management_app.data_quality import DataQualityChecker
+from employee_driver_management_app.dataset_store import store_session_rows
+
+logger = logging.getLogger('django')
+
+# Bumped whenever the summary layout changes, so summaries stored in old sessions are rebuilt
+SUMMARY_VERSION = 1
+
+VENDOR_COLUMN = 'Vendor Names'
+EMAIL_COLUMN = 'Vendor Emails'
+ROUTE_COLUMN = 'Route No'
+
+
+def _text(value: Any) -> str:
+    return value.strip() if isinstance(value, str) else ''
+
+
+def build_vendor_summary(rows: List[Dict[str, Any]], quality_report: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Aggregates a vendor dataset per vendor and per route in one pass
+
+    Row counts cover every row; recipients and route runs cover only the
+    rows that can be sent (the ones outside the quality report's invalid
+    ranges), exactly as the send job sees them.
+
+    Args:
+        rows: Dataset rows as stored in the session
+        quality_report: Report produced by ``DataQualityChecker.check`` for the rows
+
+    Returns:
+        Dict[str, Any]: JSON-serializable summary, stored next to the dataset
+    """
+    started = time.perf_counter()
+    is_sendable = DataQualityChecker.row_filter(quality_report)
+    vendors: Dict[str, Dict[str, Any]] = {}
+    routes: Dict[str, Dict[str, Any]] = {}
+    route_runs = 0
+    previous_route = None
+
+    for position, row in enumerate(rows):
+        vendor_name = _text(row.get(VENDOR_COLUMN))
+        route = str(row.get(ROUTE_COLUMN, 'Unknown'))
+        sendable = is_sendable is None or is_sendable(position)
+
+        vendor = vendors.setdefault(vendor_name.replace(' ', '_'), {
+            'name': vendor_name, 'rows': 0, 'valid_rows': 0, 'routes': {}, 'recipients': {},
+        })
+        vendor['rows'] += 1
+        vendor['routes'][route] = None  # dicts keep first-seen order with O(1) membership
+        route_entry = routes.setdefault(route, {'rows': 0, 'vendors': {}})
+        route_entry['rows'] += 1
+        route_entry['vendors'][vendor_name] = None
+
+        if not sendable:
+            continue
+        vendor['valid_rows'] += 1
+        email = _text(row.get(EMAIL_COLUMN))
+        if vendor_name and email:
+            vendor['recipients'][email] = None
+        # The send job renders one image per run of consecutive rows on the same route
+        if route_runs == 0 or route != previous_route:
+            route_runs += 1
+        previous_route = route
+
+    for vendor in vendors.values():
+        vendor['routes'] = list(vendor['routes'])
+        vendor['route_count'] = len(vendor['routes'])
+        vendor['recipients'] = sorted(vendor['recipients'])
+    for route_entry in routes.values():
+        route_entry['vendors'] = list(route_entry['vendors'])
+
+    summary = {
+        'version': SUMMARY_VERSION,
+        'rows': len(rows),
+        'valid_rows': sum(vendor['valid_rows'] for vendor in vendors.values()),
+        'vendor_count': len(vendors),
+        'route_count': len(routes),
+        'route_runs': route_runs,
+        'recipient_count': sum(len(vendor['recipients']) for vendor in vendors.values()),
+        'vendors': vendors,
+        'routes': routes,
+    }
+    logger.info(
+        f"Vendor summary: {summary['vendor_count']} vendors, {summary['route_count']} routes, "
+        f"{summary['rows']} rows in {time.perf_counter() - started:.3f}s"
+    )
+    return summary
+
+
+def is_current(summary: Optional[Dict[str, Any]], row_count: int) -> bool:
+    """Whether a stored summary was built for a dataset of ``row_count`` rows with the current layout"""
+    return bool(summary) and summary.get('version') == SUMMARY_VERSION and summary.get('rows') == row_count
+
+
+def store_vendor_dataset(session, rows: List[Dict[str, Any]], quality_report: Optional[Dict[str, Any]],
+                         **extra: Any) -> Dict[str, Any]:
+    """
+    Saves a vendor dataset together with its quality report and summary
+
+    Every write of ``vendor_data_dict`` goes through here so the summary can
+    never describe a different dataset than the one in the session.
+
+    Args:
+        session: The request's session
+        rows: Dataset rows
+        quality_report: Report produced by ``DataQualityChecker.check``
+        extra: Other session keys written in the same update
+
+    Returns:
+        Dict[str, Any]: The new summary
+    """
+    summary = build_vendor_summary(rows, quality_report)
+    store_session_rows(session, 'vendor_data_dict', rows)
+    session.update({
+        'vendor_quality_report': quality_report,
+        'vendor_summary': summary,
+        **extra,
+    })
+    return summary
+
+
+def summary_payload(summary: Dict[str, Any], vendor: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Narrows a summary to one vendor when the endpoint is asked for it
+
+    Args:
+        summary: Stored summary
+        vendor: Vendor name as uploaded or with spaces replaced by '_'; None returns everything
+
+    Returns:
+        Optional[Dict[str, Any]]: Response body, or None for an unknown vendor
+    """
+    if not vendor:
+        return summary
+    return summary['vendors'].get(vendor.strip().replace(' ', '_'))
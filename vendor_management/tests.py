@@ -1,3 +1,69 @@
-from django.test import TestCase
+from io import BytesIO
 
-# Create your tests here.
+from django.contrib.sessions.backends.cache import SessionStore
+from django.test import SimpleTestCase
+from openpyxl import load_workbook
+
+from employee_driver_management_app.dataset_store import session_rows
+
+from .summary import build_vendor_summary, is_current, store_vendor_dataset, summary_payload
+from .workbook import build_vendor_workbook, build_vendor_workbooks, safe_sheet_name
+
+ROWS = [
+    {'S No': 1, 'Route No': 'R1', 'Name': 'Asha', 'Vendor Names': 'Golden Ikon', 'Vendor Emails': 'g@x.com, h@x.com'},
+    {'S No': 2, 'Route No': 'R1', 'Name': 'Ravi', 'Vendor Names': 'Golden Ikon', 'Vendor Emails': 'g@x.com, h@x.com'},
+    {'S No': 3, 'Route No': 'R2', 'Name': 'Meera', 'Vendor Names': 'Ikon', 'Vendor Emails': 'N/A'},
+    {'S No': 4, 'Route No': 'R1', 'Name': 'Kiran', 'Vendor Names': 'Golden Ikon', 'Vendor Emails': 'g@x.com, h@x.com'},
+]
+
+REPORT = {'invalid_count': 1, 'invalid_ranges': [[2, 3]], 'recipient_columns': ['Vendor Emails']}
+
+
+class VendorSummaryTests(SimpleTestCase):
+    def test_counts_cover_every_row_and_recipients_only_sendable_ones(self):
+        summary = build_vendor_summary(ROWS, REPORT)
+
+        self.assertEqual((summary['rows'], summary['valid_rows']), (4, 3))
+        self.assertEqual(summary['vendors']['Golden_Ikon']['recipients'], ['g@x.com, h@x.com'])
+        self.assertEqual(summary['vendors']['Ikon'], {
+            'name': 'Ikon', 'rows': 1, 'valid_rows': 0, 'routes': ['R2'], 'route_count': 1, 'recipients': [],
+        })
+        # The unsendable R2 row is not sent, so the three R1 rows render as one run
+        self.assertEqual(summary['route_runs'], 1)
+        self.assertEqual(build_vendor_summary(ROWS)['route_runs'], 3)
+        self.assertEqual(summary['routes']['R1']['vendors'], ['Golden Ikon'])
+
+    def test_payload_narrows_to_one_vendor(self):
+        summary = build_vendor_summary(ROWS)
+        self.assertEqual(summary_payload(summary, 'Golden Ikon')['rows'], 3)
+        self.assertIs(summary_payload(summary), summary)
+        self.assertIsNone(summary_payload(summary, 'Unknown'))
+
+    def test_store_keeps_summary_and_rows_together(self):
+        session = SessionStore()
+        summary = store_vendor_dataset(session, ROWS, REPORT, uploaded_file_path='roster.xlsx')
+
+        self.assertEqual(session['vendor_summary'], summary)
+        self.assertEqual(session['uploaded_file_path'], 'roster.xlsx')
+        self.assertEqual(len(session_rows(session, 'vendor_data_dict')), 4)
+        self.assertTrue(is_current(summary, 4))
+        self.assertFalse(is_current(summary, 5))
+
+
+class VendorWorkbookTests(SimpleTestCase):
+    def test_one_sheet_per_route_in_order(self):
+        workbook = load_workbook(BytesIO(build_vendor_workbook(ROWS)))
+        self.assertEqual(workbook.sheetnames, ['R1', 'R2'])
+        names = [row[2] for row in workbook['R1'].iter_rows(min_row=2, values_only=True)]
+        self.assertEqual(names, ['Asha', 'Ravi', 'Kiran'])
+
+    def test_sheet_names_are_valid_and_unique(self):
+        used = set()
+        self.assertEqual(safe_sheet_name('A/B:C', used), 'A_B_C')
+        self.assertEqual(safe_sheet_name('a_b_c', used), 'a_b_c~2')
+        self.assertEqual(len(safe_sheet_name('R' * 40, used)), 31)
+        self.assertEqual(safe_sheet_name("''", used), 'Sheet')
+
+    def test_failed_vendors_are_left_out(self):
+        workbooks = build_vendor_workbooks({'Ikon': ROWS[2:3], 'Broken': [{'Route No': object()}]})
+        self.assertEqual(list(workbooks), ['Ikon'])
@@ -1,43 +1,35 @@
-import pandas as pd
-import dataframe_image as dfi
-from datetime import datetime
-from django.conf import settings
 import logging
 import os
-import re
+import time
+from employee_driver_management_app.metrics import IMAGES_RENDERED, IMAGE_RENDER_SECONDS
+from .workspace import JobWorkspace, sanitize_filename
 
 logger = logging.getLogger('django')
 
-# Get the current date
-current_date = datetime.now().strftime("%Y-%m-%d")
 
 class TransportDataProcessor:
-    def __init__(self, data, previous_vedor_name):
-        # Define output path and create directory if it doesn't exist
-        self.output_media_path = getattr(settings, "MEDIA_ROOT", "media")  # Fallback to 'media' if MEDIA_ROOT is not set
-        self.output_media_path = os.path.join(self.output_media_path, "vendor", f"vendor_{current_date}")
+    def __init__(self, data, previous_vedor_name, workspace=None):
+        # Images go into the send job's private workspace; a standalone call gets a fresh one
+        self.workspace = workspace or JobWorkspace()
+        self.output_media_path = self.workspace.path
         self.previous_vedor_name = previous_vedor_name
-
-        if not os.path.exists(self.output_media_path):
-            os.makedirs(self.output_media_path, exist_ok=True)
-
         self.data = data
-        self.generate_table_image()
 
     def sanitize_filename(self, name):
         """Sanitizes route number to be a valid filename"""
-        return re.sub(r'[^\w\-_]', '_', str(name))  # Replace invalid characters with '_'
+        return sanitize_filename(name)
 
     def generate_table_image(self):
+        # Rendering dependencies are loaded on first use, not at URL import time
+        import pandas as pd
+        import dataframe_image as dfi
+
         vendor_dirs = set()
         for route_no, entries in self.data.items():
             df = pd.DataFrame(entries)
             sanitized_route_no = self.sanitize_filename(route_no)  # Ensure filename is safe
             sanitized_vendor_name = self.sanitize_filename(self.previous_vedor_name)
-            vendor_dir = os.path.join(self.output_media_path, sanitized_vendor_name)
-            if not os.path.exists(vendor_dir):
-                os.makedirs(vendor_dir, exist_ok=True)
-                
+            vendor_dir = self.workspace.vendor_dir(self.previous_vedor_name)
             vendor_dirs.add(vendor_dir)
 
             # Apply enhanced styling
@@ -74,7 +66,12 @@ class TransportDataProcessor:
             output_file = os.path.join(vendor_dir, f"{sanitized_vendor_name}_{sanitized_route_no}.png")
 
             try:
-                dfi.export(styled_df, output_file, max_cols=-1, max_rows=-1)
+                started = time.perf_counter()
+                # Render to a hidden temp file so the attachment scan never sees a partial PNG
+                with self.workspace.atomic_path(output_file) as temp_file:
+                    dfi.export(styled_df, temp_file, max_cols=-1, max_rows=-1)
+                IMAGE_RENDER_SECONDS.observe(time.perf_counter() - started)
+                IMAGES_RENDERED.inc()
                 logger.info(f"Image saved: {output_file}")
             except Exception as e:
                 logger.info(f"Error saving image for route {route_no}: {e}")
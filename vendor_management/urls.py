@@ -1,12 +1,18 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# I/O-bound endpoints run as coroutines when served under ASGI
+io_views = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [    
         path('vendor_management/', views.handle_vendor_form, name='handle_vendor_form'),
-        path('okay', views.send_vendor_emails, name='send_vendor_emails'),
-        path('search_vendor_data/', views.search_vendor_data, name='search_vendor_data'),
-        path('sort_vendor_data/', views.sort_vendor_data, name='sort_vendor_data'),
+        path('okay', io_views.send_vendor_emails, name='send_vendor_emails'),
+        path('search_vendor_data/', io_views.search_vendor_data, name='search_vendor_data'),
+        path('sort_vendor_data/', io_views.sort_vendor_data, name='sort_vendor_data'),
+        path('export_vendor_data/', io_views.export_vendor_data, name='export_vendor_data'),
+        path('vendor_summary/', io_views.vendor_summary, name='vendor_summary'),
         path('vendor_message_template/', views.vendor_message_template, name='vendor_message_template'),  
-        path('fetch-columns-vendor/', views.fetch_columns_vendor, name='fetch_columns_vendor'),  
+        path('fetch-columns-vendor/', io_views.fetch_columns_vendor, name='fetch_columns_vendor'),  
         # path('vendor_management/', views.vendor_view, name='vendor_view'),
         ]
\ No newline at end of file
@@ -1,23 +1,44 @@
+from __future__ import annotations
+
 import logging
-import pandas as pd
-from typing import Dict, List, Tuple, Optional
+from typing import TYPE_CHECKING, Dict, List, Tuple, Optional
 from django.core.files.storage import FileSystemStorage
 from django.contrib import messages
 from django.shortcuts import render, redirect
 from django.conf import settings
 from django.http import HttpRequest, HttpResponse, JsonResponse
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
-import smtplib
 import os
 from pathlib import Path
 import json
+import time
+from contextlib import ExitStack
 from dotenv import load_dotenv
+from .route_pdf import RoutePdfCache
 from .transport_image import TransportDataProcessor
-import pandas as pd
-from io import BytesIO
+from .summary import build_vendor_summary, is_current, store_vendor_dataset, summary_payload
+from .workbook import build_vendor_workbook, build_vendor_workbooks
+from .workspace import JobWorkspace
+from employee_driver_management_app.data_quality import DataQualityChecker
+from employee_driver_management_app.column_projection import ColumnProjection, columns_from_env
+from employee_driver_management_app.sheet_ingest import parse_sheet_selection, read_workbook_sheets
+from employee_driver_management_app.dispatch_plan import DispatchPlan
+from employee_driver_management_app.mail_transports import get_transport
+from employee_driver_management_app.media_retention import get_retention_manager
+from employee_driver_management_app.memory_budget import PeakMemory, check_memory_budget
+from employee_driver_management_app.progress import PROGRESS, ProgressReporter
+from employee_driver_management_app.metrics import (
+    EMAIL_DELIVERY_SECONDS, EMAILS_FAILED, EMAILS_SENT, EMAIL_SEND_SECONDS
+)
+from employee_driver_management_app.responses import table_response
+from employee_driver_management_app.exports import export_response
+from employee_driver_management_app.dataset_store import (
+    session_batches, session_columns, session_head, session_row_count, session_rows, session_view,
+)
+
+# pandas and the SMTP/MIME stack are imported on first use so that workers
+# serving only template pages don't pay for them at boot
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 load_dotenv()
@@ -32,18 +53,28 @@ class Config:
     MAX_COLUMNS = 29
     
     # Email configurations
-    EMAIL_HOST = 'smtp.gmail.com'
-    EMAIL_PORT = 587
+    EMAIL_HOST = os.getenv("EMAIL_HOST", 'smtp.gmail.com')
+    EMAIL_PORT = int(os.getenv("EMAIL_PORT", 587))
+    EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "true").lower() == "true"  # Disable only for local SMTP sinks
+    EMAIL_TRANSPORT = os.getenv("EMAIL_TRANSPORT", "smtp")  # smtp, spool, memory or file
     EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
     EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
     
     # Processing configurations
     MAX_WORKERS = 5
+
+    # Route attachments: 'images' (one PNG per route) or 'pdf' (one multi-page PDF per vendor)
+    ATTACHMENT_MODE = os.getenv("VENDOR_ATTACHMENT_MODE", "images").lower()
     
     # Required columns for vendor data
     REQUIRED_COLUMNS = [
         'S No', 'Route No', 'Name', 'Vendor Names','Vendor Emails'
     ]
+    EMAIL_COLUMNS = ['Vendor Emails']
+    COLUMN_WHITELIST = columns_from_env("VENDOR_COLUMNS")  # Optional; replaces the first-MAX_COLUMNS rule
+
+    # Rows rendered with the page; search and sort fetch the rest
+    TABLE_PREVIEW_ROWS = 500
 
 class FileHandlerError(Exception):
     """Custom exception for file handling related errors"""
@@ -93,26 +124,40 @@ class FileHandler:
             return False, "An unexpected error occurred during file validation"
 
     @staticmethod
-    def process_file(file_path: str) -> Optional[pd.DataFrame]:
+    def process_file(file_path: str, sheets: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
         """
         Processes the uploaded file and returns a DataFrame
         
         Args:
             file_path: Path to the uploaded file
+            sheets: Workbook sheets to ingest; None ingests every sheet
             
         Returns:
             Optional[pd.DataFrame]: Processed DataFrame or None if processing fails
         """
+        import pandas as pd
+
         logger.info(f"Processing file: {file_path}")
+        sheet_report = None
         
         try:
+            # Only the first MAX_COLUMNS (or whitelisted) columns plus the required ones are decoded
+            projection = ColumnProjection(Config.MAX_COLUMNS, Config.REQUIRED_COLUMNS, Config.COLUMN_WHITELIST)
+
+            # Sample the file first; refuse it before parsing if it won't fit the memory budget
+            memory_estimate = check_memory_budget(file_path, sheets, projection=projection)
+
             # Read file based on extension
             if file_path.endswith('.csv'):
-                chunks = pd.read_csv(file_path, chunksize=Config.CHUNK_SIZE, encoding='utf-8')
+                header = pd.read_csv(file_path, nrows=0, encoding='utf-8').columns
+                chunks = pd.read_csv(file_path, chunksize=Config.CHUNK_SIZE, encoding='utf-8',
+                                     usecols=projection.usecols(header))
                 data = pd.concat(chunks, ignore_index=True)
                 data = data.map(lambda x: x.strip() if isinstance(x, str) else x)
             else:
-                data = pd.read_excel(file_path)
+                # One dataset from every (or every selected) sheet, validated per sheet
+                data = read_workbook_sheets(file_path, Config.REQUIRED_COLUMNS, sheets, projection=projection)
+                sheet_report = data.attrs['sheet_report']
                 data = data.map(lambda x: x.strip() if isinstance(x, str) else x)
                 
             if data.empty:
@@ -122,8 +167,20 @@ class FileHandler:
             missing_columns = set(Config.REQUIRED_COLUMNS) - set(data.columns)
             if missing_columns:
                 raise FileHandlerError(f"Missing required columns: {', '.join(missing_columns)}")
-                
-            return data.iloc[:, :Config.MAX_COLUMNS].fillna("N/A")
+
+            # Validate vendor emails and required fields before NaN values are filled
+            quality_report = DataQualityChecker(
+                email_columns=Config.EMAIL_COLUMNS,
+                required_columns=Config.REQUIRED_COLUMNS,
+            ).check(data)
+
+            # Columns were already limited by the projection
+            processed_data = data.fillna("N/A")
+            if sheet_report:
+                quality_report['sheets'] = sheet_report
+            quality_report['memory'] = memory_estimate
+            processed_data.attrs['quality_report'] = quality_report
+            return processed_data
 
         except Exception as e:
             logger.error(f"File processing error: {str(e)}", exc_info=True)
@@ -132,66 +189,110 @@ class FileHandler:
 class EmailService:
     """Handles email composition and sending operations"""
     
-    def __init__(self):
-        """Initialize email service with credentials"""
+    def __init__(self, require_credentials: bool = True):
+        """
+        Initialize email service with credentials
+
+        Args:
+            require_credentials: Set to False for dry runs, which only build messages
+        """
         self.sender_email = Config.EMAIL_HOST_USER
         self.sender_password = Config.EMAIL_HOST_PASSWORD
         self.smtp_host = Config.EMAIL_HOST
         self.smtp_port = Config.EMAIL_PORT
+        self.use_tls = Config.EMAIL_USE_TLS
+        self.transport = get_transport(Config.EMAIL_TRANSPORT, self.smtp_host, self.smtp_port, self.use_tls,
+                                       self.sender_email, self.sender_password)
         
-        if not self.sender_email or not self.sender_password:
+        if require_credentials and (not self.sender_email or not self.sender_password):
             raise EmailServiceError("Email credentials not properly configured")
     
     
-    def send_emaill(self, subject, body, recipient, folder, vendor_entries,vendor_name):
-        
-        df = pd.DataFrame(vendor_entries)      # Convert to DataFrame
+    def build_message(self, subject, body, recipient, folder, vendor_name, workbook, route_pdf=None):
+        """
+        Builds the MIME message for one vendor without sending it
+
+        Args:
+            subject: Email subject
+            body: HTML body
+            recipient: Comma-separated recipient addresses
+            folder: The job's folder holding this vendor's route images
+            vendor_name: Vendor name used for the workbook file name
+            workbook: xlsx bytes of the vendor's rows
+            route_pdf: Path of the vendor's route PDF; when given it replaces the route images
+
+        Returns:
+            MIMEMultipart: Message with the workbook and route images (or PDF) attached
+        """
+        from email import encoders
+        from email.mime.base import MIMEBase
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+
+        msg = MIMEMultipart()
+        msg['From'] = self.sender_email or ''
+        msg['To'] = recipient
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'html'))
         
-        # Save DataFrame to an in-memory Excel file
-        excel_buffer = BytesIO()
-        with pd.ExcelWriter(excel_buffer, engine='xlsxwriter') as writer:
-            df.to_excel(writer, index=False, sheet_name=vendor_name)
-        excel_buffer.seek(0)  # Move cursor to the start of the buffer
+        # 🔹 Attach Excel File (Vendor Data)
+        part = MIMEBase("application", "octet-stream")
+        part.set_payload(workbook)
+        encoders.encode_base64(part)
+        part.add_header("Content-Disposition", f"attachment; filename={vendor_name}_Data.xlsx")
+        msg.attach(part)
+
+        if route_pdf:
+            # One bundle with every route of this vendor instead of one image per route
+            with open(route_pdf, "rb") as attachment:
+                part = MIMEBase("application", "pdf")
+                part.set_payload(attachment.read())
+            encoders.encode_base64(part)
+            part.add_header("Content-Disposition", f"attachment; filename={vendor_name}_Routes.pdf")
+            msg.attach(part)
+            return msg
+
+        # Attach all finished .png files from the job's vendor folder (hidden files are renders in progress)
+        for filename in sorted(os.listdir(folder)):
+            if filename.endswith(".png") and not filename.startswith("."):
+                file_path = os.path.join(folder, filename)
+                logger.info(f"IMAGE PATH .png: {file_path}")
+                
+                with open(file_path, "rb") as attachment:
+                    part = MIMEBase("application", "octet-stream")
+                    part.set_payload(attachment.read())
+
+                encoders.encode_base64(part)
+                part.add_header("Content-Disposition", f"attachment; filename={filename}")
+                msg.attach(part)
+        return msg
+
+    def deliver(self, msg) -> None:
+        """Hands a built message to the configured transport (SMTP, spool, ...)"""
+        started = time.perf_counter()
+        self.transport.send(msg)
+        # Delivery alone, so dry-run estimates don't count message building twice
+        EMAIL_DELIVERY_SECONDS.observe(time.perf_counter() - started, app="vendor")
+
+    def send_emaill(self, subject, body, recipient, folder, vendor_entries,vendor_name, workbook=None, route_pdf=None):
+        import smtplib
         
+        started = time.perf_counter()
+        # Send jobs pass the workbook built once per vendor; build it here for one-off calls
+        if workbook is None:
+            workbook = build_vendor_workbook(vendor_entries)
         
         if not isinstance(recipient, str) or '@' not in recipient:
             logger.warning(f"Invalid email format: {recipient}")
+            EMAILS_FAILED.inc(app="vendor")
             return False
 
         try:
-            msg = MIMEMultipart()
-            msg['From'] = self.sender_email
-            msg['To'] = recipient
-            msg['Subject'] = subject
-            msg.attach(MIMEText(body, 'html'))
-            
-            # 🔹 Attach Excel File (Vendor Data)
-            part = MIMEBase("application", "octet-stream")
-            part.set_payload(excel_buffer.getvalue())
-            encoders.encode_base64(part)
-            part.add_header("Content-Disposition", f"attachment; filename={vendor_name}_Data.xlsx")
-            msg.attach(part)
-
-            # Attach all .png files from the given folder
-            for filename in os.listdir(folder):
-                if filename.endswith(".png"):
-                    file_path = os.path.join(folder, filename)
-                    logger.info(f"IMAGE PATH .png: {file_path}")
-                    
-                    with open(file_path, "rb") as attachment:
-                        part = MIMEBase("application", "octet-stream")
-                        part.set_payload(attachment.read())
-
-                    encoders.encode_base64(part)
-                    part.add_header("Content-Disposition", f"attachment; filename={filename}")
-                    msg.attach(part)
-
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.sender_email, self.sender_password)
-                server.send_message(msg)
+            self.deliver(self.build_message(subject, body, recipient, folder, vendor_name, workbook, route_pdf))
 
             logger.info(f"Email with attachments sent successfully to {recipient}")
+            EMAILS_SENT.inc(app="vendor")
+            EMAIL_SEND_SECONDS.observe(time.perf_counter() - started, app="vendor")
             return True
 
         except smtplib.SMTPException as e:
@@ -199,6 +300,7 @@ class EmailService:
         except Exception as e:
             logger.error(f"Unexpected error while sending email to {recipient}: {str(e)}")
 
+        EMAILS_FAILED.inc(app="vendor")
         return False
     
     
@@ -253,6 +355,22 @@ class EmailService:
         """
 
 
+def vendor_form_context(request: HttpRequest) -> Dict:
+    """
+    Builds the vendor page context with a preview of the stored dataset.
+
+    Args:
+        request: HTTP request object.
+
+    Returns:
+        Dict: First ``Config.TABLE_PREVIEW_ROWS`` rows, total row count and quality report.
+    """
+    return {
+        'data_dict': session_head(request.session, 'vendor_data_dict', Config.TABLE_PREVIEW_ROWS),
+        'row_count': session_row_count(request.session, 'vendor_data_dict'),
+        'quality_report': request.session.get('vendor_quality_report'),
+    }
+
 
 def handle_vendor_form(request: HttpRequest) -> HttpResponse:
     """
@@ -266,7 +384,7 @@ def handle_vendor_form(request: HttpRequest) -> HttpResponse:
     """
     # Handle GET request
     if request.method != 'POST':
-        return render(request, 'front/vendor.html', {'data_dict': request.session.get('vendor_data_dict')})
+        return render(request, 'front/vendor.html', vendor_form_context(request))
 
     uploaded_file = request.FILES.get('vendor_file')
 
@@ -284,17 +402,20 @@ def handle_vendor_form(request: HttpRequest) -> HttpResponse:
     fs = FileSystemStorage(location=str(vendor_media_path))
     file_path = Path(fs.save(uploaded_file.name, uploaded_file))
     full_path = vendor_media_path / file_path
+    get_retention_manager().track(str(full_path), 'upload')
 
     try:
         # Process file
-        data = FileHandler.process_file(str(full_path))
-        vendor_data_dict = data.to_dict(orient='records')
-
-        # Store data in session
-        request.session.update({
-            'vendor_data_dict': vendor_data_dict,
-            'uploaded_file_path': str(full_path)
-        })
+        sheets = parse_sheet_selection(request.POST.get('sheets'))
+        # Measured up to the session records, the point where the upload's memory use peaks
+        with PeakMemory(f"upload {uploaded_file.name}", "vendor") as peak:
+            data = FileHandler.process_file(str(full_path), sheets)
+            vendor_data_dict = data.to_dict(orient='records')
+        quality_report = data.attrs.get('quality_report')
+        quality_report['memory']['peak_bytes'] = peak.peak_bytes
+
+        # Store data in session, with its per-vendor/per-route summary
+        store_vendor_dataset(request.session, vendor_data_dict, quality_report, uploaded_file_path=str(full_path))
         
         messages.success(request, 'File processed successfully!')
 
@@ -308,37 +429,287 @@ def handle_vendor_form(request: HttpRequest) -> HttpResponse:
         messages.error(request, "An unexpected error occurred while processing the file.")
         full_path.unlink(missing_ok=True)
 
-    return render(request, 'front/vendor.html', {'data_dict': request.session.get('vendor_data_dict')})
+    return render(request, 'front/vendor.html', vendor_form_context(request))
 
 
 def search_vendor_data(request):
     search_query = request.GET.get('search', '').strip().lower()
-    data_dict = request.session.get('vendor_data_dict', [])
 
     # If a search query exists, filter the data
-    if search_query:
-        filtered_data = [
-            row for row in data_dict
-            if any(search_query in str(value).lower() for value in row.values())
-        ]
-    else:
-        filtered_data = data_dict  # Show all data if no search query
-    return JsonResponse({'data': filtered_data})
+    filtered_data = session_view(request.session, 'vendor_data_dict', search_query)
+    return table_response(request, filtered_data)
 
 
 
 def sort_vendor_data(request):
     column = request.GET.get('column')
     direction = request.GET.get('direction', 'asc')
-    data_dict = request.session.get('vendor_data_dict', [])
-
-    # Your data (assuming data_dict is available)
-    data_list = list(data_dict)  # Convert QuerySet to list if needed
 
     # Sorting logic
-    sorted_data = sorted(data_list, key=lambda x: x[column], reverse=(direction == "desc"))
+    sorted_data = session_view(request.session, 'vendor_data_dict', '', column, direction)
+
+    return table_response(request, sorted_data)
+
 
-    return JsonResponse({"data": sorted_data})
+def export_vendor_data(request):
+    search_query = request.GET.get('search', '').strip().lower()
+    column = request.GET.get('column')
+    direction = request.GET.get('direction', 'asc')
+
+    # Export exactly what the table shows: current search, then current sort
+    columns, batches = session_batches(request.session, 'vendor_data_dict', search_query, column, direction)
+    return export_response(request, columns, batches, 'vendor_roster')
+
+
+def vendor_summary(request: HttpRequest) -> HttpResponse:
+    """
+    Returns the per-vendor and per-route aggregates of the uploaded dataset.
+
+    The summary is materialized when the dataset is stored, so this only
+    reads it back. ``?vendor=<name>`` narrows the response to one vendor.
+
+    Args:
+        request: HTTP request object.
+
+    Returns:
+        JsonResponse: The summary, or 404 for an unknown vendor.
+    """
+    summary = request.session.get('vendor_summary')
+    if not is_current(summary, session_row_count(request.session, 'vendor_data_dict')):
+        # Datasets stored before summaries existed are summarized once and kept
+        summary = build_vendor_summary(
+            session_rows(request.session, 'vendor_data_dict'),
+            request.session.get('vendor_quality_report')
+        )
+        request.session['vendor_summary'] = summary
+
+    payload = summary_payload(summary, request.GET.get('vendor'))
+    if payload is None:
+        return JsonResponse({"error": "Unknown vendor"}, status=404)
+    return JsonResponse(payload)
+
+
+def dispatch_vendor_emails(data: Dict, vendor_data: List[Dict], progress: ProgressReporter,
+                           summary: Optional[Dict] = None) -> Dict:
+    """
+    Renders route images and sends one email per vendor for a parsed payload.
+
+    Shared by the sync and async send views; takes the session rows as an
+    argument so it can run on a worker thread. With ``dry_run`` in the payload
+    the images and messages are built but nothing is sent.
+
+    Args:
+        data: Parsed request payload (templates and selected details).
+        vendor_data: Valid vendor rows from the session.
+        progress: The job's reporter, created by the view before it loaded the rows.
+        summary: Summary stored with the dataset; built from ``vendor_data`` when missing.
+
+    Returns:
+        Dict: Email processing results, or the dispatch plan for a dry run.
+    """
+    # Every send job renders into its own workspace so concurrent batches never share files.
+    workspace = JobWorkspace()
+    retention = get_retention_manager()
+    retention.track(workspace.path, 'vendor_job')
+    try:
+        # The workspace and route PDFs are leased until the last message is sent, so retention
+        # never evicts attachments of a running job
+        with retention.in_use(workspace.path), ExitStack() as leases:
+            return _dispatch_in_workspace(data, vendor_data, summary, workspace, leases, progress)
+    finally:
+        # Record the final size of the job's artifacts for the retention budget.
+        retention.track(workspace.path, 'vendor_job')
+
+
+def _dispatch_in_workspace(data: Dict, vendor_data: List[Dict], summary: Optional[Dict], workspace: JobWorkspace,
+                           leases: ExitStack, progress: ProgressReporter) -> Dict:
+    """Body of :func:`dispatch_vendor_emails`, run inside the job's leased workspace"""
+    # Extract required data from the request payload.
+    top_template = data.get("top_template", "").strip()
+    bottom_template = data.get("bottom_template", "").strip()
+    selected_details = data.get("selected_details", [])
+    dry_run = bool(data.get("dry_run", False))
+
+    # Extract unique vendor names and sanitize them.
+    # unique_vendor_names = {entry.get("Vendor Names", "").strip().replace(" ", "_") 
+    #                        for entry in vendor_data if "Vendor Names" in entry}
+
+
+    # Unique vendor emails mapped to sanitized vendor names, read from the materialized summary.
+    if summary is None:
+        summary = build_vendor_summary(vendor_data)
+    unique_vendor_email = {
+        vendor_name: set(vendor['recipients'])
+        for vendor_name, vendor in summary['vendors'].items() if vendor['recipients']
+    }
+
+    # Log extracted vendor emails.
+    logger.info("Vendor EMAILS: %s", unique_vendor_email, extra={'payload': True})
+
+    # In PDF mode each vendor's routes are collected and rendered as one bundle after the loop.
+    pdf_mode = Config.ATTACHMENT_MODE == "pdf"
+    vendor_routes = {}
+    vendors_image_dirs = []
+
+    progress.stage("render", len(unique_vendor_email) if pdf_mode else summary['route_runs'])
+
+    def render_route_group(entries, vendor_name, route_no):
+        if pdf_mode:
+            for route, route_entries in entries.items():
+                vendor_routes.setdefault(vendor_name, {}).setdefault(route, []).extend(route_entries)
+            return
+        processor = TransportDataProcessor(entries, vendor_name, workspace)
+        vendors_image_dirs.append(processor.generate_table_image())
+        progress.step(vendor=vendor_name, route=route_no)
+
+    # Dictionary to store route-wise vendor entries.
+    route_wise_entries = {}
+    vendor_data_dict = {} 
+    previous_route_no = None  # Keeps track of the last seen route number.
+    previous_vendor_name = None
+
+    # Iterate through vendor data to group entries by Route No.
+    for entry in vendor_data:
+        # Extract only the selected details for the current vendor entry.
+        selected_entry = {key: entry[key] for key in selected_details if key in entry}
+        current_route_no = entry.get("Route No", "Unknown")  # Default to 'Unknown' if missing.
+        current_vendor_name = entry.get("Vendor Names", "Unknown")
+        current_vendor_name = current_vendor_name.replace(' ', '_')
+
+        # Store all row data for each vendor name.
+        if current_vendor_name not in vendor_data_dict:
+            vendor_data_dict[current_vendor_name] = []
+        vendor_data_dict[current_vendor_name].append(entry) 
+
+        
+
+        # If Route No changes, process the collected route-wise entries.
+        if previous_route_no and current_route_no != previous_route_no:
+            render_route_group(route_wise_entries, previous_vendor_name, previous_route_no)
+
+            # Reset the dictionary for new route-wise entries.
+            route_wise_entries = {}
+
+            # Log separator for readability.
+            logger.info(f"{'~' * 100}")
+
+        # Ensure the route number key exists before appending new entries.
+        route_wise_entries.setdefault(current_route_no, []).append(selected_entry)
+
+        # Update the last seen Route No and Vendor Name.
+        previous_route_no = current_route_no   
+        previous_vendor_name = current_vendor_name   
+
+    # Process the final route, which has no following route to trigger it.
+    if route_wise_entries:
+        render_route_group(route_wise_entries, previous_vendor_name, previous_route_no)
+
+    # One PDF per vendor that has recipients, reused from the cache when its content is unchanged.
+    vendor_pdfs = {}
+    if pdf_mode:
+        pdf_cache = RoutePdfCache()
+        for vendor_name, routes in vendor_routes.items():
+            if vendor_name not in unique_vendor_email:
+                continue
+            try:
+                vendor_pdfs[vendor_name] = pdf_cache.get_or_render(vendor_name, routes)
+                leases.enter_context(get_retention_manager().in_use(vendor_pdfs[vendor_name]))
+                progress.step(vendor=vendor_name, routes=len(routes))
+            except Exception as e:
+                logger.error(f"Error rendering route PDF for {vendor_name}: {e}", exc_info=True)
+                progress.step(False, vendor=vendor_name, routes=len(routes))
+    
+    # Flatten and extract unique vendor directories.
+    flat_vendor_dirs = [item for sublist in vendors_image_dirs for item in sublist]
+    unique_vendor_dirs = set(flat_vendor_dirs)
+
+    # logger.info(f"Vendors DATA: {vendor_data_dict}")
+    
+    # Log extracted vendor directories.
+    # logger.info(f"Vendor IMAGE DIRECTORY: {unique_vendor_dirs}")
+    # logger.info(f"Vendor IMAGE LEN: {len(unique_vendor_dirs)}")
+
+    # Construct full email body in HTML format.
+    subject = "Roaster"
+    email_body = f"""
+    <p>{top_template}</p>
+    <p>{bottom_template}</p>
+    """
+
+    # Send emails to vendors with their respective PNG attachments.
+    success_count = 0
+    failed_emails = []
+    processed_emails = set()
+
+    # Only vendors with rendered route images (or a route PDF) are mailed. Folders are looked up
+    # by exact name; a substring match would mix up vendors like "Ikon" and "Golden_Ikon".
+    sendable_vendors = {
+        vendor_name: emails for vendor_name, emails in unique_vendor_email.items()
+        if vendor_name in vendor_data_dict and (
+            vendor_name in vendor_pdfs if pdf_mode else workspace.vendor_dir(vendor_name) in unique_vendor_dirs
+        )
+    }
+    # Write each mailed vendor's workbook once and reuse it for all of its recipients.
+    vendor_workbooks = build_vendor_workbooks({
+        vendor_name: vendor_data_dict[vendor_name] for vendor_name in sendable_vendors
+    })
+
+    progress.stage("plan" if dry_run else "send", len(sendable_vendors))
+    email_service = EmailService(require_credentials=not dry_run)
+    plan = DispatchPlan("vendor") if dry_run else None
+
+    for vendor_name, emails in sendable_vendors.items():
+        vendor_entries = vendor_data_dict[vendor_name]
+        folder = workspace.vendor_dir(vendor_name)
+        recipient_emails = ", ".join(emails)  # Convert set to comma-separated string.
+        try:
+            workbook = vendor_workbooks.get(vendor_name) or build_vendor_workbook(vendor_entries)
+        except Exception as e:
+            # One vendor's unwritable rows must not stop the emails to the others
+            logger.error(f"Error building workbook for {vendor_name}: {e}", exc_info=True)
+            failed_emails.extend(emails)
+            progress.step(False, vendor=vendor_name, recipients=sorted(emails))
+            continue
+
+        if dry_run:
+            # Build the exact message SMTP would receive, but don't send it
+            message = email_service.build_message(subject, email_body, recipient_emails, folder, vendor_name, workbook,
+                                                  vendor_pdfs.get(vendor_name))
+            plan.add(recipient_emails, message, vendor=vendor_name, rows=summary['vendors'][vendor_name]['valid_rows'],
+                     routes=summary['vendors'][vendor_name]['route_count'])
+            progress.step(vendor=vendor_name, recipients=sorted(emails))
+            continue
+
+        logger.info(f"Sending Email to: {recipient_emails}")
+        logger.info(f"Vendor Folder: {folder}")
+
+        email_sent = email_service.send_emaill(subject, email_body, recipient_emails, folder, vendor_entries,vendor_name,
+                                               workbook=workbook, route_pdf=vendor_pdfs.get(vendor_name))
+
+        # Track success/failure.
+        if email_sent:
+            success_count += 1
+            processed_emails.update(emails)
+        else:
+            failed_emails.extend(emails)
+        progress.step(email_sent, vendor=vendor_name, recipients=sorted(emails))
+
+    if dry_run:
+        result = {"status": "success", "dry_run": True, "plan": plan.result()}
+        progress.finish(**result)
+        return result
+
+    # Return processing results.
+    result = {
+        "status": "success",
+        "message": "Email processing completed",
+        "success_count": success_count,
+        "failed_count": len(failed_emails),
+        "total_unique_emails": len(processed_emails),
+        "failed_emails": failed_emails if failed_emails else None
+    }
+    progress.finish(**result)
+    return result
 
 
 def send_vendor_emails(request: HttpRequest) -> HttpResponse:
@@ -357,168 +728,35 @@ def send_vendor_emails(request: HttpRequest) -> HttpResponse:
         logger.info("Request method is not POST")
         return JsonResponse({"error": "Invalid method"}, status=400)
 
+    progress = None
     try:
         # Parse JSON data from the request body.
         data = json.loads(request.body.decode("utf-8"))
+        # Live progress for the send popup (a no-op without a job id), created before the rows are
+        # loaded so the progress stream finds the job within JOB_START_SECONDS.
+        progress = PROGRESS.reporter(data.get("job_id"))
 
-        # Extract required data from the request payload.
-        top_template = data.get("top_template", "").strip()
-        bottom_template = data.get("bottom_template", "").strip()
-        selected_details = data.get("selected_details", [])
-
-        # Retrieve vendor data and file path from the session.
-        vendor_data = request.session.get('vendor_data_dict', [])
-        file_path = request.session.get('uploaded_file_path', "")
-
-        # Extract unique vendor names and sanitize them.
-        # unique_vendor_names = {entry.get("Vendor Names", "").strip().replace(" ", "_") 
-        #                        for entry in vendor_data if "Vendor Names" in entry}
-
-
-        # Extract unique vendor emails mapped to vendor names.
-        unique_vendor_email = {}
-        for entry in vendor_data:
-            vendor_name = entry.get("Vendor Names", "").strip()
-            vendor_email = entry.get("Vendor Emails", "").strip()
-
-            # Validate and store vendor emails
-            if vendor_name and vendor_email and "@" in vendor_email:
-                sanitized_name = vendor_name.replace(" ", "_")
-                unique_vendor_email.setdefault(sanitized_name, set()).add(vendor_email)
-
-        # Log extracted vendor emails.
-        logger.info(f"Vendor EMAILS: {unique_vendor_email}")
-
-        # Dictionary to store route-wise vendor entries.
-        vendors_image_dirs = []
-        route_wise_entries = {}
-        vendor_data_dict = {} 
-        previous_route_no = None  # Keeps track of the last seen route number.
-        previous_vendor_name = None
-
-        # Iterate through vendor data to group entries by Route No.
-        for entry in vendor_data:
-            # Extract only the selected details for the current vendor entry.
-            selected_entry = {key: entry[key] for key in selected_details if key in entry}
-            current_route_no = entry.get("Route No", "Unknown")  # Default to 'Unknown' if missing.
-            current_vendor_name = entry.get("Vendor Names", "Unknown")
-            current_vendor_name = current_vendor_name.replace(' ', '_')
-            vendor_email = entry.get("Vendor Emails", "").strip()
-            
-            # Skip invalid emails.
-            if '@' not in vendor_email:
-                continue
-
-            # Store all row data for each vendor name.
-            if current_vendor_name not in vendor_data_dict:
-                vendor_data_dict[current_vendor_name] = []
-            vendor_data_dict[current_vendor_name].append(entry) 
-
-            
-
-            # If Route No changes, process the collected route-wise entries.
-            if previous_route_no and current_route_no != previous_route_no:
-                processor = TransportDataProcessor(route_wise_entries, previous_vendor_name)
-                vendors_image_directory = processor.generate_table_image()
-                vendors_image_dirs.append(vendors_image_directory)
-
-                # Reset the dictionary for new route-wise entries.
-                route_wise_entries = {}
+        # Retrieve vendor data from the session.
+        # Rows with invalid vendor emails were flagged at upload time and are skipped here.
+        stored_data = session_rows(request.session, 'vendor_data_dict')
+        vendor_data = DataQualityChecker.valid_rows(stored_data, request.session.get('vendor_quality_report'))
+        summary = request.session.get('vendor_summary')
 
-                # Log separator for readability.
-                logger.info(f"{'~' * 100}")
-
-            # Ensure the route number key exists before appending new entries.
-            route_wise_entries.setdefault(current_route_no, []).append(selected_entry)
-
-            # Update the last seen Route No and Vendor Name.
-            previous_route_no = current_route_no   
-            previous_vendor_name = current_vendor_name   
-        
-        # Flatten and extract unique vendor directories.
-        flat_vendor_dirs = [item for sublist in vendors_image_dirs for item in sublist]
-        unique_vendor_dirs = set(flat_vendor_dirs)
-
-        # logger.info(f"Vendors DATA: {vendor_data_dict}")
-        
-        # Log extracted vendor directories.
-        # logger.info(f"Vendor IMAGE DIRECTORY: {unique_vendor_dirs}")
-        # logger.info(f"Vendor IMAGE LEN: {len(unique_vendor_dirs)}")
-
-        # Construct full email body in HTML format.
-        subject = "Roaster"
-        email_body = f"""
-        <p>{top_template}</p>
-        <p>{bottom_template}</p>
-        """
-
-        # Send emails to vendors with their respective PNG attachments.
-        success_count = 0
-        failed_emails = []
-        processed_emails = set()
-
-        for vendor_name, emails in unique_vendor_email.items():
-            if vendor_name in vendor_data_dict:
-                vendor_entries = vendor_data_dict[vendor_name]
-                for folder in unique_vendor_dirs:
-                    if vendor_name in folder:  # Check if vendor name is part of the folder path.
-                        recipient_emails = ", ".join(emails)  # Convert set to comma-separated string.
-                        logger.info(f"Sending Email to: {recipient_emails}")
-                        logger.info(f"Vendor Folder: {folder}")
-                        # logger.info(f"Vendor name: {vendor_entries}")
-                        
-
-                        email_service = EmailService()
-                        email_sent = email_service.send_emaill(subject, email_body, recipient_emails, folder, vendor_entries,vendor_name)
-
-                        # # Track success/failure.
-                        # if email_sent:
-                        #     success_count += 1
-                        #     processed_emails.update(emails)
-                        # else:
-                        #     failed_emails.extend(emails)
-
-        # Return processing results.
-        return JsonResponse({
-            "message": "Email processing completed",
-            "success_count": success_count,
-            "failed_count": len(failed_emails),
-            "total_unique_emails": len(processed_emails),
-            "failed_emails": failed_emails if failed_emails else None
-        })
+        # A missing or outdated summary is rebuilt from the rows being sent
+        return JsonResponse(dispatch_vendor_emails(
+            data, vendor_data, progress, summary if is_current(summary, len(stored_data)) else None
+        ))
 
     except Exception as e:
         logger.error(f"Unexpected error in send_vendor_emails: {str(e)}", exc_info=True)
+        if progress is not None:
+            progress.finish(error="An unexpected error occurred while sending emails")
         return JsonResponse({
             "error": "An unexpected error occurred while sending emails",
             "details": str(e)
         }, status=500)
 
 
-
-
-def cleanup_vendor_files(vendor_media_path: str, vendor_name: str, vendor_file_name: str)-> None:
-    """
-    Cleans up temporary vendor files after email processing
-    
-    Args:
-        vendor_media_path: Path to vendor media directory
-        vendor_name: Name of the vendor
-        vendor_file_name: Path to vendor Excel file
-    """
-    # Remove generated images
-    for filename in os.listdir(vendor_media_path):
-        if (filename.lower().endswith((".png", ".jpg", ".jpeg")) and 
-            vendor_name.lower().replace(" ", "_") in filename.lower()):
-            file_path = os.path.join(vendor_media_path, filename)
-            os.remove(file_path)
-            logger.debug(f"Removed temporary image: {file_path}")
-    
-    # Remove generated Excel file
-    os.remove(vendor_file_name)
-    logger.debug(f"Removed temporary Excel file: {vendor_file_name}")
-    
-    
 def vendor_view(request):
     return render(request, 'front/vendor.html')
     
@@ -527,8 +765,6 @@ def vendor_message_template(request):
 
 
 def fetch_columns_vendor(request):
-    data_dict = request.session.get('vendor_data_dict', [])    
-    
-    # Extract column names from the first dictionary entry if available
-    columns = list(data_dict[0].keys()) if data_dict else []
+    # Read from the dataset's schema (or its first row) without loading the rows
+    columns = session_columns(request.session, 'vendor_data_dict')
     return JsonResponse({"columns": columns})
\ No newline at end of file
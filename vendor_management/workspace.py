@@ -0,0 +1,87 @@
+import logging
+import os
+import re
+import shutil
+import tempfile
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger('django')
+
+
+def sanitize_filename(name) -> str:
+    """Sanitizes a vendor name or route number to be a valid filename"""
+    return re.sub(r'[^\w\-_]', '_', str(name))  # Replace invalid characters with '_'
+
+
+class JobWorkspace:
+    """
+    Private directory tree for one vendor send job.
+
+    Layout: ``<MEDIA_ROOT>/vendor/vendor_<date>/<job_id>/<vendor>/``. The date
+    is taken when the job starts and every job gets its own ``job_id``, so
+    concurrent batches and leftovers from earlier runs never share a folder.
+    """
+
+    def __init__(self, root: Optional[str] = None, job_id: Optional[str] = None):
+        media_root = getattr(settings, "MEDIA_ROOT", "media")  # Fallback to 'media' if MEDIA_ROOT is not set
+        root = root or os.path.join(media_root, "vendor", f"vendor_{datetime.now().strftime('%Y-%m-%d')}")
+        self.job_id = job_id or f"job_{datetime.now().strftime('%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.path = os.path.join(root, self.job_id)
+        os.makedirs(self.path, exist_ok=False)
+        logger.info(f"Created job workspace: {self.path}")
+
+    def vendor_dir(self, vendor_name: str) -> str:
+        """Returns (and creates) the directory holding one vendor's artifacts"""
+        path = os.path.join(self.path, sanitize_filename(vendor_name))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def vendor_files(self, vendor_name: str, suffix: str = ".png") -> List[str]:
+        """Lists the finished files of one vendor, ignoring in-progress temp files"""
+        path = os.path.join(self.path, sanitize_filename(vendor_name))
+        if not os.path.isdir(path):
+            return []
+        return sorted(
+            os.path.join(path, filename) for filename in os.listdir(path)
+            if filename.endswith(suffix) and not filename.startswith(".")
+        )
+
+    @staticmethod
+    @contextmanager
+    def atomic_path(final_path: str) -> Iterator[str]:
+        """
+        Yields a hidden temporary path next to ``final_path`` and moves it into
+        place only once the caller finished writing it
+
+        Args:
+            final_path: Destination of the file
+
+        Returns:
+            Iterator[str]: Temporary path to write to
+        """
+        directory, filename = os.path.split(final_path)
+        fd, temp_path = tempfile.mkstemp(prefix=f".{filename}.", suffix=os.path.splitext(filename)[1], dir=directory)
+        os.close(fd)
+        try:
+            yield temp_path
+            os.replace(temp_path, final_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @classmethod
+    def atomic_write(cls, final_path: str, data: bytes) -> None:
+        """Writes ``data`` so readers see either the old file or the complete new one"""
+        with cls.atomic_path(final_path) as temp_path:
+            with open(temp_path, "wb") as temp_file:
+                temp_file.write(data)
+
+    def cleanup(self) -> None:
+        """Removes the whole job directory"""
+        shutil.rmtree(self.path, ignore_errors=True)
+        logger.info(f"Removed job workspace: {self.path}")